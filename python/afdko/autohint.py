@@ -10,7 +10,7 @@ autohint -h
 autohint -u
 autohint -hfd
 autohint -pfd
-autohint [-g <glyph list>] [-gf <filename>] [-xg <glyph list>] [-xgf <filename>] [-cf path] [-a] [-logOnly] [-log <logFile path>] [-r] [-q] [-c] [-nf] [-ns] [-nb] [-wd] [-o <output font path>]  font-path
+autohint [-g <glyph list>] [-gf <filename>] [-xg <glyph list>] [-xgf <filename>] [-cf path] [-a] [-logOnly] [-log <logFile path>] [-r] [-q] [-c] [-nf] [-ns] [-nb] [-wd] [-jobs <N>] [-cache <dir>] [-cacheSize <MB>] [-o <output font path>]  font-path
 
 Auto-hinting program for PostScript and OpenType/CFF fonts.
 """
@@ -148,6 +148,20 @@ alignment zones in an "fontinfo" file.
 
 -wd	write changed glyphs to default layer instead of '%s'
 
+-jobs <N>  Hint glyphs in N worker processes. Glyphs are sent to the
+	workers in groups that share the same FDDict, and the results are
+	applied to the font in glyph order. The default is 1.
+
+-cache <dir>  Keep a cache of hinting results in the directory <dir>.
+	Entries are keyed by the glyph's unhinted outline, the FDDict values
+	and the hinting options, so the cache can be shared between fonts
+	(sibling weights, instances, rebuilt masters) and between runs. The
+	number of cache hits and misses is logged at the end of the run.
+
+-cacheSize <MB>  Maximum size of the hint cache, in megabytes. The least
+	recently used entries are removed when the cache grows beyond this
+	size. The default is 200 MB.
+
 autohint can also apply different sets of alignment zones while hinting
 a particular set of glyphs. This is useful for name-keyed fonts, which,
 unlike CID fonts, only have one set of global alignment zones and stem
@@ -444,7 +458,7 @@ import os
 import re
 import time
 import tempfile
-from fontTools.misc.py23 import open, tounicode
+from fontTools.misc.py23 import open, tobytes, tounicode
 from fontTools.ttLib import TTFont, getTableModule
 import plistlib
 import warnings
@@ -452,12 +466,22 @@ from afdko import fdkutils, ufotools
 from afdko.beztools import *
 import traceback
 import shutil
+import multiprocessing
+import hashlib
+from collections import deque
 
 try:
     from psautohint import AUTOHINTEXE
 except ImportError:
     AUTOHINTEXE = "autohintexe"
 
+try:
+    # The hinting library, linked as a Python extension module. When it is
+    # available, glyphs are hinted in-process rather than by autohintexe.
+    from psautohint import _psautohint
+except ImportError:
+    _psautohint = None
+
 # warnings.simplefilter("ignore", RuntimeWarning) # supress waring about use of os.tempnam().
 
 kACIDKey = "AutoHintKey"
@@ -489,6 +513,9 @@ class ACOptions:
 		self.debug = 0
 		self.allowDecimalCoords = 0
 		self.writeToDefaultLayer = 0
+		self.jobs = 1
+		self.cacheDir = None
+		self.cacheSize = HintCache.kDefaultMaxSize
 
 class ACOptionParseError(Exception):
 	pass
@@ -505,6 +532,382 @@ class ACHintError(Exception):
 class FDKEnvironmentError(Exception):
 	pass
 
+class HintEngine(object):
+	"""
+	Runs the auto-hinting library over a stream of hinting jobs, so that
+	callers do not have to write temp files and spawn one autohintexe
+	process per glyph.
+
+	A job is a tuple (glyphName, fontInfo, bezString), where fontInfo is the
+	text form of the FDDict used for the glyph. hintGlyphs() yields
+	(glyphName, newBezString, log) tuples in job order; newBezString is None
+	if the glyph could not be processed.
+
+	When the psautohint extension module is available, glyphs are hinted
+	in-process. Otherwise, and always in report mode (doAlign/doStems), each
+	run of consecutive jobs that share a fontInfo string is written to a temp
+	directory and handed to a single autohintexe invocation. If that run
+	reports an error or leaves a glyph without output, its glyphs are run
+	again one at a time, so that each glyph gets its own result and log. In
+	report mode, newBezString holds the stem or alignment zone report for the
+	glyph.
+
+	If numJobs is greater than 1, runs of consecutive jobs that share a
+	fontInfo string are sent in chunks to a pool of worker processes, each
+	of which runs its own engine. The results are still yielded in job order.
+
+	If a HintCache is given, results for glyphs whose bez data, fontInfo
+	and hinting flags match a cached entry are taken from the cache, and
+	new results are added to it.
+	"""
+	kBatchSize = 100
+	kChunkSize = 25
+	kBezSuffix = ".bez"
+	kReportSuffix = ".rpt"
+
+	def __init__(self, verbose=1, allowChanges=0, noHintSub=0,
+			allowDecimalCoords=0, doAlign=0, doStems=0, allStems=0,
+			debug=0, useLibrary=True, numJobs=1, cache=None):
+		self.settings = dict(verbose=verbose, allowChanges=allowChanges,
+			noHintSub=noHintSub, allowDecimalCoords=allowDecimalCoords,
+			doAlign=doAlign, doStems=doStems, allStems=allStems, debug=debug,
+			useLibrary=useLibrary)
+		self.numJobs = numJobs
+		self.cache = cache
+		self.verbose = verbose
+		self.allowChanges = allowChanges
+		self.noHintSub = noHintSub
+		self.allowDecimalCoords = allowDecimalCoords
+		self.doAlign = doAlign
+		self.doStems = doStems
+		self.allStems = allStems
+		self.debug = debug
+		self.reportMode = doAlign or doStems
+		self.useLibrary = useLibrary and (_psautohint is not None) and not self.reportMode
+		self.tempDir = None
+		self.tempFI = None
+		self.lastFontInfo = None
+
+	def hintGlyphs(self, jobs, knownResults=None):
+		# knownResults: optional dict of glyph name -> hinted bez string for
+		# glyphs that do not need to be hinted again. These are passed
+		# through in job order. Cache hits are added to this dict.
+		if knownResults is None:
+			knownResults = {}
+		if self.cache is not None:
+			for result in self.hintGlyphsWithCache(jobs, knownResults):
+				yield result
+			return
+		for result in self.runJobs(jobs, knownResults):
+			yield result
+
+	def getCacheFlags(self):
+		# Everything besides the bez data and the fontinfo that can change
+		# the hinting result.
+		if _psautohint is not None:
+			version = _psautohint.version
+		else:
+			version = ""
+		return "%s %s %s %s %s %s %s" % (version, self.allowChanges,
+			self.noHintSub, self.allowDecimalCoords, self.doAlign,
+			self.doStems, self.allStems)
+
+	def hintGlyphsWithCache(self, jobs, knownResults):
+		flags = self.getCacheFlags()
+		cacheKeys = {}
+
+		def lookUpJobs():
+			for job in jobs:
+				name, fontInfo, bezString = job
+				if name not in knownResults:
+					key = self.cache.makeKey(flags, fontInfo, bezString)
+					newBezString = self.cache.get(key)
+					if newBezString is None:
+						cacheKeys[name] = key
+					else:
+						knownResults[name] = newBezString
+				yield job
+
+		for result in self.runJobs(lookUpJobs(), knownResults):
+			key = cacheKeys.pop(result[0], None)
+			if key and result[1]:
+				self.cache.put(key, result[1])
+			yield result
+
+	def runJobs(self, jobs, knownResults):
+		if self.numJobs > 1:
+			for result in self.hintGlyphsInPool(jobs, knownResults):
+				yield result
+			return
+
+		batch = []
+		toRun = []
+		for name, fontInfo, bezString in jobs:
+			if name in knownResults:
+				result = [name, knownResults[name], ""]
+				if not batch:
+					yield tuple(result)
+					continue
+			elif self.useLibrary:
+				yield name, self.hintWithLibrary(fontInfo, bezString), ""
+				continue
+			else:
+				if toRun and ((len(toRun) >= self.kBatchSize) or (fontInfo != toRun[0][1])):
+					self.runBatch(toRun)
+					for result in batch:
+						yield tuple(result)
+					batch = []
+					toRun = []
+				result = [name, None, ""]
+				toRun.append((name, fontInfo, bezString, result))
+			batch.append(result)
+		if toRun:
+			self.runBatch(toRun)
+		for result in batch:
+			yield tuple(result)
+
+	def hintGlyphsInPool(self, jobs, knownResults):
+		pool = multiprocessing.Pool(self.numJobs)
+		pending = deque()
+		maxPending = 2 * self.numJobs
+		chunk = []
+		chunkKnownResults = {}
+		chunkFontInfo = None
+		try:
+			for job in jobs:
+				name, fontInfo, bezString = job
+				if name in knownResults:
+					chunkKnownResults[name] = knownResults[name]
+				else:
+					if (chunkFontInfo is not None) and ((len(chunk) >= self.kChunkSize) or (fontInfo != chunkFontInfo)):
+						pending.append(pool.apply_async(_hintChunk,
+							(self.settings, chunk, chunkKnownResults)))
+						chunk = []
+						chunkKnownResults = {}
+					chunkFontInfo = fontInfo
+				chunk.append(job)
+				# Hand back finished chunks as soon as possible, and don't let
+				# the queue of outstanding chunks grow without bound.
+				while pending and (pending[0].ready() or (len(pending) > maxPending)):
+					for result in pending.popleft().get():
+						yield result
+			if chunk:
+				pending.append(pool.apply_async(_hintChunk,
+					(self.settings, chunk, chunkKnownResults)))
+			while pending:
+				for result in pending.popleft().get():
+					yield result
+			pool.close()
+		except:
+			pool.terminate()
+			raise
+		finally:
+			pool.join()
+
+	def hintGlyph(self, name, fontInfo, bezString):
+		# Returns (newBezString, log) for a single glyph.
+		for result in self.hintGlyphs([(name, fontInfo, bezString)]):
+			return result[1:]
+
+	def hintWithLibrary(self, fontInfo, bezString):
+		try:
+			newBezString = _psautohint.autohint(tobytes(fontInfo),
+				tobytes(bezString), bool(self.allowChanges),
+				not self.noHintSub, not self.allowDecimalCoords)
+		except _psautohint.error:
+			return None
+		return tounicode(newBezString)
+
+	def getArgs(self):
+		args = []
+		if self.reportMode or not self.verbose:
+			args.append("-q")
+		if self.reportMode:
+			if self.doAlign:
+				args.append("-ra")
+			else:
+				args.append("-rs")
+			if self.allStems:
+				args.append("-a")
+		else:
+			if not self.allowChanges:
+				args.append("-e")
+			if self.noHintSub:
+				args.append("-n")
+			if self.allowDecimalCoords:
+				args.append("-d")
+			args.extend(["-s", NEWBEZ_SUFFIX])
+		return " ".join(args)
+
+	def writeFontInfo(self, fontInfo):
+		# The fontinfo temp file is only rewritten when the FDDict changes.
+		if self.tempDir is None:
+			self.tempDir = tempfile.mkdtemp()
+			self.tempFI = os.path.join(self.tempDir, "fontinfo")
+		if fontInfo != self.lastFontInfo:
+			with open(self.tempFI, "w") as fp:
+				fp.write(tounicode(fontInfo))
+			self.lastFontInfo = fontInfo
+
+	def runBatch(self, toRun):
+		# toRun: list of (name, fontInfo, bezString, result) entries that
+		# share the same fontInfo. The hinted bez string (or the report) is
+		# stored in result[1], and the autohintexe log in result[2].
+		self.writeFontInfo(toRun[0][1])
+		if (len(toRun) > 1) and self.isQuiet():
+			log = self.runAutohintexe(toRun)
+			if (not log) and all(entry[3][1] is not None for entry in toRun):
+				return
+			# autohintexe stops at the first glyph that it fails on, and its
+			# messages can't be matched up with the glyphs they are about, so
+			# the glyphs are run again one at a time.
+			for entry in toRun:
+				entry[3][1] = None
+		for entry in toRun:
+			entry[3][2] = self.runAutohintexe([entry])
+
+	def isQuiet(self):
+		# autohintexe only prints errors and warnings when run with '-q'.
+		return self.reportMode or not self.verbose
+
+	def runAutohintexe(self, toRun):
+		# Runs autohintexe on the bez data of the toRun entries, stores each
+		# glyph's output in its result[1], and returns the log.
+		if self.reportMode:
+			outSuffix = self.kReportSuffix
+		else:
+			outSuffix = NEWBEZ_SUFFIX
+		bezPaths = []
+		for i, entry in enumerate(toRun):
+			bezPath = os.path.join(self.tempDir, "%s%s" % (i, self.kBezSuffix))
+			with open(bezPath, "w") as bp:
+				bp.write(tounicode(entry[2]))
+			bezPaths.append(bezPath)
+
+		command = "%s %s -f \"%s\" %s 2>&1" % (AUTOHINTEXE, self.getArgs(),
+			self.tempFI, " ".join("\"%s\"" % path for path in bezPaths))
+		if self.debug:
+			print(command)
+		log = fdkutils.runShellCmd(command)
+
+		for entry, bezPath in zip(toRun, bezPaths):
+			outPath = bezPath + outSuffix
+			if os.path.exists(outPath):
+				with open(outPath, "r", encoding='utf-8') as bp:
+					entry[3][1] = bp.read()
+				os.remove(outPath)
+			os.remove(bezPath)
+		return log
+
+	def close(self):
+		if self.tempDir is not None:
+			if self.debug:
+				print("Left AC temp files in %s" % self.tempDir)
+			else:
+				shutil.rmtree(self.tempDir, ignore_errors=True)
+			self.tempDir = None
+			self.lastFontInfo = None
+
+
+class HintCache(object):
+	"""
+	On-disk cache of hinting results, keyed by a hash of the unhinted bez
+	data, the FDDict fontinfo string and the hinting flags. The cache
+	directory can be shared by several fonts and autohint runs, so that
+	identical outlines in sibling weights, instances or rebuilt masters are
+	only hinted once.
+
+	Each entry is a file named by its key. Hits refresh the entry's
+	modification time; when the cache is closed, the least recently used
+	entries are removed until the total size is at most maxSize bytes.
+	"""
+	kDefaultMaxSize = 200 * 1024 * 1024
+
+	def __init__(self, cacheDir, maxSize=kDefaultMaxSize):
+		self.cacheDir = cacheDir
+		self.maxSize = maxSize
+		self.hits = 0
+		self.misses = 0
+		if not os.path.isdir(cacheDir):
+			os.makedirs(cacheDir)
+
+	@staticmethod
+	def makeKey(*parts):
+		hasher = hashlib.sha256()
+		for part in parts:
+			hasher.update(tobytes(part, encoding='utf-8'))
+			hasher.update(b"\0")
+		return hasher.hexdigest()
+
+	def getPath(self, key):
+		return os.path.join(self.cacheDir, key[:2], key)
+
+	def get(self, key):
+		path = self.getPath(key)
+		try:
+			with open(path, "r", encoding='utf-8') as fp:
+				value = fp.read()
+			os.utime(path, None)
+		except (IOError, OSError):
+			self.misses += 1
+			return None
+		self.hits += 1
+		return value
+
+	def put(self, key, value):
+		path = self.getPath(key)
+		dirPath = os.path.dirname(path)
+		try:
+			if not os.path.isdir(dirPath):
+				os.makedirs(dirPath)
+			# Write to a temp file first, so that other processes sharing the
+			# cache never see a partial entry.
+			fd, tempPath = tempfile.mkstemp(dir=dirPath)
+			with open(fd, "w", encoding='utf-8') as fp:
+				fp.write(tounicode(value))
+			if os.path.exists(path):
+				os.remove(tempPath)
+			else:
+				os.rename(tempPath, path)
+		except (IOError, OSError):
+			pass
+
+	def prune(self):
+		entries = []
+		totalSize = 0
+		for dirPath, dirNames, fileNames in os.walk(self.cacheDir):
+			for fileName in fileNames:
+				path = os.path.join(dirPath, fileName)
+				try:
+					stat = os.stat(path)
+				except OSError:
+					continue
+				entries.append((stat.st_mtime, stat.st_size, path))
+				totalSize += stat.st_size
+		if totalSize <= self.maxSize:
+			return
+		entries.sort()
+		for mtime, size, path in entries:
+			try:
+				os.remove(path)
+			except OSError:
+				continue
+			totalSize -= size
+			if totalSize <= self.maxSize:
+				break
+
+	def close(self):
+		self.prune()
+
+
+def _hintChunk(settings, chunk, knownResults):
+	# Runs in a worker process of HintEngine.hintGlyphsInPool().
+	engine = HintEngine(**settings)
+	try:
+		return list(engine.hintGlyphs(chunk, knownResults))
+	finally:
+		engine.close()
+
 def logMsg(*args):
 	for arg in args:
 		msg = str(arg).strip()
@@ -738,6 +1141,25 @@ def getOptions():
 			options.allowDecimalCoords = True
 		elif arg =="-wd":
 			options.writeToDefaultLayer = 1
+		elif arg in ["-jobs", "--jobs"]:
+			i = i +1
+			try:
+				options.jobs = int(sys.argv[i])
+			except (IndexError, ValueError):
+				raise ACOptionParseError("Option Error: option '-jobs' must be followed by the number of worker processes.")
+			if options.jobs < 1:
+				raise ACOptionParseError("Option Error: the number of worker processes must be at least 1.")
+		elif arg == "-cache":
+			i = i +1
+			if (i == numOptions) or (sys.argv[i][0] == "-"):
+				raise ACOptionParseError("Option Error: option '-cache' must be followed by the path to the hint cache directory.")
+			options.cacheDir = sys.argv[i]
+		elif arg == "-cacheSize":
+			i = i +1
+			try:
+				options.cacheSize = int(float(sys.argv[i]) * 1024 * 1024)
+			except (IndexError, ValueError):
+				raise ACOptionParseError("Option Error: option '-cacheSize' must be followed by the maximum cache size in megabytes.")
 		elif arg[0] == "-":
 			raise ACOptionParseError("Option Error: Unknown option <%s>." %  arg)
 		else:
@@ -1049,11 +1471,6 @@ def hintFile(options):
 	if not glyphList:
 		raise ACFontError("Error: selected glyph list is empty for font <%s>." % fontFileName)
 
-	# temp file names for input and output bez files, and for the fontinfo file.
-	tempBez = fdkutils.get_temp_file_path()
-	tempBezNew = '{}{}'.format(tempBez, NEWBEZ_SUFFIX)
-	tempFI = fdkutils.get_temp_file_path()
-
 	psName = fontData.getPSName()
 
 	if (not options.logOnly) and options.usePlistFile:
@@ -1106,11 +1523,7 @@ def hintFile(options):
 		fontData.close()
 		return
 
-	if fdGlyphDict == None:
-		fdDict = fontDictList[0]
-		with open(tempFI, "w") as fp:
-			fp.write(tounicode(fdDict.getFontInfo()))
-	else:
+	if fdGlyphDict != None:
 		if not options.verbose:
 			logMsg("Note: Using alternate FDDict global values from fontinfo file for some glyphs. Remove option '-q' to see which dict is used for which glyphs.")
 
@@ -1119,143 +1532,112 @@ def hintFile(options):
 	# 	Get charstring.
 	removeHints = 1
 	isCID = fontData.isCID()
-	lastFDIndex = None
 	reportCB = ACreport
 	anyGlyphChanged = 0
-	pListChanged = 0
 	if isCID:
 		options.noFlex = 1
 
-	if options.verbose:
-		verboseArg = ""
-	else:
-		verboseArg = " -q"
-		dotCount = 0
-		curTime = time.time()
-
-	if options.allowChanges:
-		suppressEditArg = ""
+	if options.cacheDir:
+		hintCache = HintCache(options.cacheDir, options.cacheSize)
 	else:
-		suppressEditArg = " -e"
-
-	if options.noHintSub:
-		supressHintSubArg = " -n"
-	else:
-		supressHintSubArg = ""
-
-	if options.allowDecimalCoords:
-		decimalArg = " -d"
-	else:
-		decimalArg = ""
-
-	dotCount = 0
-	seenGlyphCount = 0
-	processedGlyphCount = 0
-	for name in glyphList:
-		prevACIdentifier = None
-		seenGlyphCount +=1
-
-		# 	Convert to bez format
-		bezString, width, hasHints = fontData.convertToBez(name, removeHints, options.verbose, options.hintAll)
-		processedGlyphCount += 1
-		if bezString == None:
-			continue
-
-		if "mt" not in bezString:
-			# skip empty glyphs.
-			continue
-		# get new fontinfo string if FD array index has changed, as
-		# as each FontDict has different alignment zones.
-		gid = fontData.getGlyphID(name)
-		if isCID: #
-			fdIndex = fontData.getfdIndex(gid)
-			if not fdIndex == lastFDIndex:
-				lastFDIndex = fdIndex
-				fdDict = fontData.getFontInfo(psName, path, options.allow_no_blues, options.noFlex, options.vCounterGlyphs, options.hCounterGlyphs, fdIndex)
-				with open(tempFI, "w") as fp:
-					fp.write(tounicode(fdDict.getFontInfo()))
-		else:
-			if (fdGlyphDict != None):
-				try:
-					fdIndex = fdGlyphDict[name][0]
-				except KeyError:
-					# use default dict.
-					fdIndex = 0
-				if lastFDIndex != fdIndex:
+		hintCache = None
+	engine = HintEngine(options.verbose, options.allowChanges,
+		options.noHintSub, options.allowDecimalCoords, debug=options.debug,
+		numJobs=options.jobs, cache=hintCache)
+
+	# Glyphs are collected lazily by hintJobs(), and handed to the hinting
+	# engine as a stream of (name, fontInfo, bezString) jobs. The state
+	# shared with the result loop below is kept in these containers.
+	glyphInfo = {} # key: glyph name, value: (width, prevACIdentifier)
+	knownResults = {} # key: glyph name, value: hinted bez from the plist file.
+	counts = {"seen": 0, "processed": 0, "pListChanged": 0}
+
+	def hintJobs():
+		lastFDIndex = None
+		fdDict = fontDictList[0]
+		fontInfo = fdDict.getFontInfo()
+		# 	Convert to bez format. For UFO fonts, the GLIF files are read
+		# ahead of the glyph being converted.
+		for name, bezString, width, hasHints in fontData.convertGlyphsToBez(glyphList, removeHints, options.verbose, options.hintAll):
+			prevACIdentifier = None
+			counts["seen"] += 1
+			counts["processed"] += 1
+			if bezString == None:
+				continue
+
+			if "mt" not in bezString:
+				# skip empty glyphs.
+				continue
+			# get new fontinfo string if FD array index has changed, as
+			# as each FontDict has different alignment zones.
+			gid = fontData.getGlyphID(name)
+			if isCID: #
+				fdIndex = fontData.getfdIndex(gid)
+				if not fdIndex == lastFDIndex:
 					lastFDIndex = fdIndex
-					fdDict = fontDictList[fdIndex]
-					with open(tempFI, "w") as fp:
-						fp.write(tounicode(fdDict.getFontInfo()))
-
-
-		# 	Build autohint point list identifier
-
-		oldBezString = ""
-		oldHintBezString = ""
-		if (not options.logOnly) and options.usePlistFile:
-			# If the glyph is not in the  plist file, then we skip it unless kReHintUnknown is set.
-			# If the glyph is in the plist file and the outline has changed, we hint it.
-			ACidentifier = makeACIdentifier(bezString)
-			try:
-				(prevACIdentifier, ACtime, oldBezString, oldHintBezString) =  fontPlist[kACIDKey][name]
-			except ValueError:
-				(prevACIdentifier, ACtime) =  fontPlist[kACIDKey][name]
-				oldBezString = oldHintBezString = ""
-			except KeyError:
-				pListChanged = 1 # Didn't have an entry in tempList file, so we will add one.
-				if hasHints and not options.rehint:
-					# Glyphs is hinted, but not referenced in the plist file. Skip it unless options.rehint is seen
-					if  not isNewPlistFile:
-						# Comment only if there is a plist file; otherwise, we'd be complaining for almost every glyph.
-						logMsg("%s Skipping glyph - it has hints, but it is not in the hint info plist file." % aliasName(name))
-						dotCount = 0
-					continue
-			if prevACIdentifier and (prevACIdentifier == ACidentifier): # there is an entry in the plist file and it matches what's in the font.
-				if hasHints and not (options.hintAll or options.rehint):
-					continue
+					fdDict = fontData.getFontInfo(psName, path, options.allow_no_blues, options.noFlex, options.vCounterGlyphs, options.hCounterGlyphs, fdIndex)
+					fontInfo = fdDict.getFontInfo()
 			else:
-				pListChanged = 1
+				if (fdGlyphDict != None):
+					try:
+						fdIndex = fdGlyphDict[name][0]
+					except KeyError:
+						# use default dict.
+						fdIndex = 0
+					if lastFDIndex != fdIndex:
+						lastFDIndex = fdIndex
+						fdDict = fontDictList[fdIndex]
+						fontInfo = fdDict.getFontInfo()
+
+
+			# 	Build autohint point list identifier
+
+			oldBezString = ""
+			oldHintBezString = ""
+			if (not options.logOnly) and options.usePlistFile:
+				# If the glyph is not in the  plist file, then we skip it unless kReHintUnknown is set.
+				# If the glyph is in the plist file and the outline has changed, we hint it.
+				ACidentifier = makeACIdentifier(bezString)
+				try:
+					(prevACIdentifier, ACtime, oldBezString, oldHintBezString) =  fontPlist[kACIDKey][name]
+				except ValueError:
+					(prevACIdentifier, ACtime) =  fontPlist[kACIDKey][name]
+					oldBezString = oldHintBezString = ""
+				except KeyError:
+					counts["pListChanged"] = 1 # Didn't have an entry in tempList file, so we will add one.
+					if hasHints and not options.rehint:
+						# Glyphs is hinted, but not referenced in the plist file. Skip it unless options.rehint is seen
+						if  not isNewPlistFile:
+							# Comment only if there is a plist file; otherwise, we'd be complaining for almost every glyph.
+							logMsg("%s Skipping glyph - it has hints, but it is not in the hint info plist file." % aliasName(name))
+						continue
+				if prevACIdentifier and (prevACIdentifier == ACidentifier): # there is an entry in the plist file and it matches what's in the font.
+					if hasHints and not (options.hintAll or options.rehint):
+						continue
+				else:
+					counts["pListChanged"] = 1
 
-		if options.verbose:
-			if fdGlyphDict:
-				logMsg("Hinting %s with fdDict %s." % (aliasName(name), fdDict.DictName) )
+			if options.verbose:
+				if fdGlyphDict:
+					logMsg("Hinting %s with fdDict %s." % (aliasName(name), fdDict.DictName) )
+				else:
+					logMsg("Hinting %s." % aliasName(name))
 			else:
-				logMsg("Hinting %s." % aliasName(name))
-		else:
-			logMsg(".,")
+				logMsg(".,")
 
-		# 	Call auto-hint library on bez string.
-		with open(tempBez, "wt") as bp:
-			bp.write(tounicode(bezString))
+			if oldBezString != "" and oldBezString == bezString:
+				knownResults[name] = oldHintBezString
 
-		#print "oldBezString", oldBezString
-		#print ""
-		#print "bezString", bezString
+			glyphInfo[name] = (width, prevACIdentifier)
+			yield name, fontInfo, bezString
 
-		if oldBezString != "" and oldBezString == bezString:
-			newBezString = oldHintBezString
-		else:
-			if os.path.exists(tempBezNew):
-				os.remove(tempBezNew)
-			command = AUTOHINTEXE + " %s%s%s%s -s %s -f \"%s\" \"%s\"" % (verboseArg, suppressEditArg, supressHintSubArg, decimalArg, NEWBEZ_SUFFIX, tempFI, tempBez)
-			if  options.debug:
-				print(command)
-			report = fdkutils.runShellCmd(command)
-			if report:
-				if not options.verbose:
-					logMsg("") # end series of "."
-				logMsg(report)
-			if os.path.exists(tempBezNew):
-				bp = open(tempBezNew, "rt")
-				newBezString = bp.read()
-				bp.close()
-				if options.debug:
-					print("Wrote AC fontinfo data file to %s" % tempFI)
-					print("Wrote AC output bez file to %s" % tempBezNew)
-				else:
-					os.remove(tempBezNew)
-			else:
-				newBezString = None
+	# 	Call auto-hint library on bez strings.
+	for name, newBezString, report in engine.hintGlyphs(hintJobs(), knownResults):
+		width, prevACIdentifier = glyphInfo.pop(name)
+		if report:
+			if not options.verbose:
+				logMsg("") # end series of "."
+			logMsg(report)
 
 		if not newBezString:
 			if not options.verbose:
@@ -1281,15 +1663,20 @@ def hintFile(options):
 			if options.allowChanges:
 				if prevACIdentifier and (prevACIdentifier != ACidentifier):
 					logMsg("\t%s Glyph outline changed" % aliasName(name))
-					dotCount = 0
 
 			fontPlist[kACIDKey][name] = (ACidentifier, time.asctime(), bezString, newBezString )
 
+	engine.close()
+	pListChanged = counts["pListChanged"]
+	seenGlyphCount = counts["seen"]
+	processedGlyphCount = counts["processed"]
+
 	if not options.verbose:
 		print() # print final new line after progress dots.
 
-	if  options.debug:
-		print("Wrote input AC bez file to %s" % tempBez)
+	if hintCache is not None:
+		hintCache.close()
+		logMsg("Hint cache %s: %s hits, %s misses." % (options.cacheDir, hintCache.hits, hintCache.misses))
 
 	if not options.logOnly:
 		if anyGlyphChanged:
@@ -1155,6 +1155,13 @@ class CFFFontData:
 			bezString = None
 		return bezString, t2Wdth, hasHints
 
+	def convertGlyphsToBez(self, glyphList, removeHints, beVerbose, doAll=False):
+		# Yields (glyphName, bezString, width, hasHints) for each glyph, as
+		# convertToBez() returns them.
+		for glyphName in glyphList:
+			bezString, width, hasHints = self.convertToBez(glyphName, removeHints, beVerbose, doAll)
+			yield glyphName, bezString, width, hasHints
+
 	def updateFromBez(self, bezData, glyphName, width, beVerbose):
 		t2Program = [width] + convertBezToT2(bezData)
 		if t2Program:
@@ -8,13 +8,16 @@ Build a variable font from a designspace file and the UFO master source fonts.
 
 python buildcff2vf.py -h
 python buildcff2vf.py -u
-python buildcff2vf.py <path to designspace file> (<optional path to output
-                                                               variable font>)
+python buildcff2vf.py [-p] [-jobs <n>] <path to designspace file>
+                       (<optional path to output variable font>)
 """
 
 __help__ = __usage__ + """
 Options:
 -p   Use 'post' table format 3.
+-jobs <n>   Read and merge the master glyph data in n worker processes.
+     Default is the number of CPUs. Use '-jobs 1' to do all the work in
+     the main process.
 
 The script makes a number of assumptions.
 1) all the master source fonts are blend compatible in all their data.
@@ -46,11 +49,13 @@ https://github.com/fonttools/fonttools
 import collections
 import io
 import logging
+import multiprocessing
 import os
 import sys
+from array import array
 
 from fontTools import varLib, version as fontToolsVersion
-from fontTools.misc.py23 import tobytes
+from fontTools.misc.py23 import tobytes, StringIO
 from fontTools.ttLib import TTFont, newTable
 from fontTools.cffLib import (VarStoreData, buildOpcodeDict,
                               privateDictOperators)
@@ -61,6 +66,10 @@ try:
     import xml.etree.cElementTree as ET
 except ImportError:
     import xml.etree.ElementTree as ET
+try:
+    import numpy
+except ImportError:
+    numpy = None
 from pkg_resources import parse_version
 
 XML = ET.XML
@@ -68,6 +77,7 @@ XMLElement = ET.Element
 xmlToString = ET.tostring
 
 kMaxStack = 48
+kMaxGlyphShardSize = 256
 kTempCFFSuffix = ".temp.cff"
 kTempCFF2File = "test.cff2"
 
@@ -249,6 +259,23 @@ class OpListPen(T2CharStringPen):
         return self.opList
 
 
+def fixNumber(value):
+    # The merged point arrays hold float values. Whole numbers are given
+    # back as ints, which is how the charstrings encode them.
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+def newPointArray(ptList, numMasters):
+    # Returns a flat (args x masters) array for an op of the default
+    # master, with the default master's values in column 0, and zeros
+    # for the other masters.
+    pointArray = array('d', [0]) * (len(ptList) * numMasters)
+    pointArray[::numMasters] = array('d', ptList)
+    return pointArray
+
+
 class CFF2GlyphData(object):
     hintOpList = ('hintmask', 'cntrmask', 'hstem', 'vstem', 'hstemhm',
                   'vstemhm')
@@ -257,38 +284,64 @@ class CFF2GlyphData(object):
         self.glyphName = glyphName
         self.gid = gid
         self.masterFontList = masterFontList
-        self.charstringList = []
         self.mmCharString = None
-
-    def addCharString(self, t2CharString):
-        self.charstringList.append(t2CharString)
-
-    def buildOpList(self, t2Index, supportHints):
-        t2String = self.charstringList[t2Index]
-        t2Pen = OpListPen(supportHints)
+        self.numMasters = 0
+        self.opList = None
+        # Op lists with hints, as extracted from each master's charstring.
+        self.masterOpLists = {}
+
+    def getCharString(self, t2Index):
+        return self.masterFontList[t2Index].charStringIndex[self.gid]
+
+    def releaseCharStrings(self):
+        # The CFF charstrings INDEX reloads a charstring from the font
+        # file if it is asked for again.
+        for masterFont in self.masterFontList:
+            masterFont.charStringIndex[self.gid] = None
+        self.masterOpLists = {}
+
+    def extractOpList(self, t2Index):
+        t2String = self.getCharString(t2Index)
+        t2Pen = OpListPen(True)
         subrs = getattr(t2String.private, "Subrs", [])
         extractor = OpListExtractor(t2Pen, subrs, t2String.globalSubrs,
                                     t2String.private.nominalWidthX,
                                     t2String.private.defaultWidthX)
         extractor.execute(t2String)
-        opList = t2Pen.getCharString(t2String.private, t2String.globalSubrs)
+        return t2Pen.getCharString(t2String.private, t2String.globalSubrs)
+
+    def buildOpList(self, t2Index, supportHints):
+        # Each master charstring is run through the extractor only once.
+        # Later calls, such as when the merge restarts without hints, get
+        # a new copy of the saved op list, since merging changes it.
+        masterOpList = self.masterOpLists.get(t2Index)
+        if masterOpList is None:
+            masterOpList = self.masterOpLists[t2Index] = self.extractOpList(
+                t2Index)
         if t2Index == 0:
-            # For the master font path, promote all coordinates to a list.
-            for _, ptList in opList:
-                for i, item in enumerate(ptList):
-                    ptList[i] = [item]
+            # For the master font path, put the args of each op in an array
+            # with room for the values of all the masters. Hint masks are
+            # not blended, and stay as they are.
+            opList = [[op, list(ptList) if op in ('hintmask', 'cntrmask')
+                       else newPointArray(ptList, self.numMasters)]
+                      for op, ptList in masterOpList
+                      if supportHints or op not in self.hintOpList]
+        else:
+            opList = [[op, list(ptList)] for op, ptList in masterOpList
+                      if supportHints or op not in self.hintOpList]
         return opList
 
     def buildMMData(self):
         # Build MM charstring, and list of  points.
         # First, build a list of path entries for the default master.
-        # Each entry is [opName,  [ [arg0], [arg1],..[argn] ].
-        # Note that each arg is a list: this is so we can add the corresponding
-        # arg from each successive master font design, and end up with
-        # [opName,  [ [arg.0.0,...,arg.0.k-1],
-        # [arg.1.0,...,arg.1.k-1],..,[arg.n-1.0,...,arg.n-1.k-1] ]
+        # Each entry is [opName,  array('d', [arg.0.0,...,arg.0.k-1,
+        # arg.1.0,...,arg.1.k-1,..,arg.n-1.0,...,arg.n-1.k-1])]
         # where n is the number of arguments for the opName,
-        # and k is the number of master designs.
+        # and k is the number of master designs. The values of arg.j for
+        # the default master design are filled in first, and those of each
+        # successive master design as it is merged.
+        # Hint mask entries are [opName, [hintMaskBytes]].
+        self.numMasters = len(self.masterFontList)
         supportHints = True
         self.opList = opList = self.buildOpList(0, supportHints)
         numOps = len(opList)
@@ -298,7 +351,7 @@ class CFF2GlyphData(object):
         # converting from UFO to Type1 can convert flat curves to lines.
         blendError = False
         i = 1
-        while i < len(self.charstringList):
+        while i < len(self.masterFontList):
             opList2 = self.buildOpList(i, supportHints)
             i += 1
             opIndex = op2Index = 0
@@ -314,7 +367,7 @@ class CFF2GlyphData(object):
                 except IndexError:
                     print("Path mismatch: different number of points. "
                           "Glyph name: %s. " % self.glyphName,
-                          "font index: %s. " % i - 1,
+                          "font index: %s. " % (i - 1),
                           "master font path: %s. " %
                           self.masterFontList[0].srcPath,
                           "Delta font path: %s." %
@@ -349,7 +402,8 @@ class CFF2GlyphData(object):
 
                 try:
                     self.mergePointList(masterPointList, pointList,
-                                        masterOp in ('hintmask', 'cntrmask'))
+                                        masterOp in ('hintmask', 'cntrmask'),
+                                        i - 1)
                 except IndexError:
                     if supportHints and masterOp in self.hintOpList or (
                        token in self.hintOpList):
@@ -371,27 +425,27 @@ class CFF2GlyphData(object):
         # folowed by the other master values.
         if not supportHints:
             print("\t skipped incompatible hint data for", self.glyphName)
+        self.releaseCharStrings()
         return blendError
 
-    def mergePointList(self, masterPointList, pointList, isHintMask):
-        i = 0
-        while i < len(masterPointList):
-            if isHintMask:
-                # can't blend hint masks. Just use the first one.
-                masterPointList[i].append(masterPointList[i][0])
-            else:
-                masterPointList[i].append(pointList[i])
-            i += 1
+    def mergePointList(self, masterPointList, pointList, isHintMask,
+                       masterIndex):
+        if isHintMask:
+            # can't blend hint masks. Just use the first one.
+            return
+        numArgs = len(masterPointList) // self.numMasters
+        if len(pointList) < numArgs:
+            raise IndexError("too few args in master %s" % masterIndex)
+        masterPointList[masterIndex::self.numMasters] = array(
+            'd', pointList[:numArgs])
 
     def updateLineToCurve(self, pointList):
         # pointList has a lineto that needs to be a flat curve.
         # Convert to curve by pre-pending [0,0], and appending [0,0]
-        if isinstance(pointList[0], list):
-            numMasters = len(pointList[0])
-            pointList.insert(0, [0] * numMasters)
-            pointList.insert(0, [0] * numMasters)
-            pointList.append([0] * numMasters)
-            pointList.append([0] * numMasters)
+        if isinstance(pointList, array):
+            zeros = array('d', [0]) * (2 * self.numMasters)
+            pointList[0:0] = zeros
+            pointList.extend(zeros)
         else:
             pointList.insert(0, 0)
             pointList.insert(0, 0)
@@ -436,7 +490,68 @@ def getInsertGID(origGID, fontGlyphNameList, mergedGlyphNameList):
     return None
 
 
-def buildMasterList(inputPaths):
+# Master fonts opened by a glyph worker process.
+gWorkerMasterFonts = None
+
+
+def initGlyphWorker(inputPaths):
+    global gWorkerMasterFonts
+    gWorkerMasterFonts = [openOpenTypeFile(path) for path in inputPaths]
+
+
+def buildGlyphShard(glyphShard):
+    # Runs in a glyph worker process. Merges the master op lists of each
+    # (glyphName, gid) in glyphShard, and returns a
+    # (glyphName, opList, blendError, log text) entry for each glyph, up to
+    # the first one with a blend error.
+    results = []
+    stdout = sys.stdout
+    for glyphName, gid in glyphShard:
+        sys.stdout = log = StringIO()
+        try:
+            cff2GlyphData = CFF2GlyphData(glyphName, gid, gWorkerMasterFonts)
+            blendError = cff2GlyphData.buildMMData()
+        finally:
+            sys.stdout = stdout
+        results.append((glyphName, cff2GlyphData.opList, blendError,
+                        log.getvalue()))
+        if blendError:
+            break
+    return results
+
+
+def buildMMGlyphData(cff2GlyphList, inputPaths, numJobs):
+    # Fills in the merged op list of each glyph in cff2GlyphList. Returns
+    # True if the masters of a glyph could not be merged.
+    if numJobs < 2 or len(cff2GlyphList) < 2:
+        for cff2GlyphData in cff2GlyphList.values():
+            if cff2GlyphData.buildMMData():
+                return True
+        return False
+
+    # The shards are handed out in glyph order, and their results are used
+    # in that order, so the log is the same as when working serially.
+    glyphIDList = [(glyphName, cff2GlyphData.gid) for glyphName, cff2GlyphData
+                   in cff2GlyphList.items()]
+    shardSize = max(1, min(kMaxGlyphShardSize,
+                           len(glyphIDList) // (numJobs * 4)))
+    glyphShards = [glyphIDList[i:i + shardSize]
+                   for i in range(0, len(glyphIDList), shardSize)]
+    pool = multiprocessing.Pool(numJobs, initGlyphWorker, (inputPaths,))
+    try:
+        for results in pool.imap(buildGlyphShard, glyphShards):
+            for glyphName, opList, blendError, log in results:
+                sys.stdout.write(log)
+                cff2GlyphList[glyphName].opList = opList
+                if blendError:
+                    return True
+    finally:
+        pool.terminate()
+        pool.join()
+    return False
+
+
+def buildMasterList(inputPaths, numJobs=1):
     blendError = False
     cff2FontList = []
     # Collect all the charstrings.
@@ -445,16 +560,15 @@ def buildMasterList(inputPaths):
     baseFont = openOpenTypeFile(inputPaths[0])
     cff2FontList.append(baseFont)
 
-    # Get the master source data for all the glyphs.
+    # Get the master source data for all the glyphs. The charstrings are
+    # read from the master fonts only when a glyph is merged, and released
+    # once it has been merged.
     fontGlyphList = baseFont.ttFont.getGlyphOrder()
     for glyphName in fontGlyphList:
         gid = baseFont.charStrings.charStrings[glyphName]
         cff2GlyphData = CFF2GlyphData(glyphName, gid, cff2FontList)
         cff2GlyphList[glyphName] = cff2GlyphData
 
-        t2CharString = baseFont.charStringIndex[gid]
-        cff2GlyphData.addCharString(t2CharString)
-
     for fontPath in inputPaths[1:]:
         print("Opening", fontPath)
         masterFont = openOpenTypeFile(fontPath)
@@ -465,17 +579,10 @@ def buildMasterList(inputPaths):
             if gid != cff2GlyphData.gid:
                 raise ACFontError("GID in master font did not match GID in "
                                   "base font: %s." % glyphName)
-            t2CharString = masterFont.charStringIndex[gid]
-            cff2GlyphData.addCharString(t2CharString)
 
     # Now build MM versions.
     print("Reading glyph data...")
-    blendError = False
-    for glyphName in fontGlyphList:
-        cff2GlyphData = cff2GlyphList[glyphName]
-        blendError = cff2GlyphData.buildMMData()
-        if blendError:
-            break
+    blendError = buildMMGlyphData(cff2GlyphList, inputPaths, numJobs)
     if blendError:
         print("Failed to blend master designs.")
         return None, None, None, None, blendError
@@ -546,54 +653,105 @@ def pointsDiffer(pointList):
     return val
 
 
-def appendBlendOp(op, pointList, varModel):
+def getBlendDeltas(argArray, numMasters, varModel):
+    """
+    argArray is a flat array('d') of the master values of each argument of a
+    glyph's operators:
+    [
+      m0, m1..mn, # values for each master for arg 0
+      ...
+    ]
+    Returns a list with an entry for each argument: None if the argument has
+    the same value in all masters, else varModel.getDeltas(masterValues).
+
+    With NumPy, the deltas for all the arguments are computed together, one
+    master column at a time. The arithmetic is the same, and done in the same
+    order, as in VariationModel.getDeltas(), so the results are identical.
+    """
+    numArgs = len(argArray) // numMasters
+    if numpy is None or not numArgs:
+        deltaList = []
+        for argIndex in range(numArgs):
+            start = argIndex * numMasters
+            argEntry = [fixNumber(value) for value in
+                        argArray[start:start + numMasters]]
+            deltaList.append(varModel.getDeltas(argEntry)
+                             if pointsDiffer(argEntry) else None)
+        return deltaList
+
+    values = numpy.frombuffer(argArray, dtype=numpy.float64).reshape(
+        numArgs, numMasters)
+    differs = (values != values[:, :1]).any(axis=1)
+    blendIndexes = numpy.flatnonzero(differs).tolist()
+    deltaList = [None] * numArgs
+    if not blendIndexes:
+        return deltaList
+
+    values = values[blendIndexes]
+    mapping = varModel.reverseMapping
+    deltaWeights = varModel.deltaWeights
+    out = numpy.empty_like(values)
+    for i, weights in enumerate(deltaWeights):
+        delta = values[:, mapping[i]]
+        for j, weight in weights.items():
+            delta = delta - out[:, j] * weight
+        out[:, i] = delta
+    # getDeltas() returns the master value itself, rather than a float,
+    # for the masters that have no delta weights.
+    copyIndexes = [i for i, weights in enumerate(deltaWeights)
+                   if not weights]
+    for argIndex, deltas in zip(blendIndexes, out.tolist()):
+        start = argIndex * numMasters
+        for i in copyIndexes:
+            deltas[i] = fixNumber(argArray[start + mapping[i]])
+        deltaList[argIndex] = deltas
+    return deltaList
+
+
+def appendBlendOp(op, pointList, deltaList, numMasters):
     blendStack = []
-    numBlends = len(pointList)
-    # pointList is arranged as:
+    # pointList is a flat array arranged as:
     # [
-    #   [m0, m1..mn] # values for each master for arg 0
-    #   [m0, m1..mn] # values for each master for arg 1
+    #   m0, m1..mn, # values for each master for arg 0
+    #   m0, m1..mn, # values for each master for arg 1
     #   ...
-    #   [m0, m1..mn] # values for each master for arg numBlends
+    #   m0, m1..mn, # values for each master for arg numBlends
     # ]
+    # or [hintMaskBytes] for a hint mask op.
+    # deltaList has the matching getBlendDeltas() entry for each arg.
     # The CFF2 blend operator expects first the series of args 0-numBlends
     # from the first master
     blendList = []
     if op in ('hintmask', 'cntrmask'):
         blendStack.append(op)
-        blendStack.append(pointList[0][0])
+        blendStack.append(pointList[0])
         return blendStack
-    for argEntry in pointList:
-        masterArg = argEntry[0]
-        if pointsDiffer(argEntry):
+    for masterArg, deltas in zip(pointList[::numMasters], deltaList):
+        masterArg = fixNumber(masterArg)
+        if deltas is not None:
             blendStack.append(masterArg)
-            blendList.append(argEntry)
+            blendList.append(deltas)
         else:
             if blendList:
-                for masterValues in blendList:
-                    deltas = varModel.getDeltas(masterValues)
-                    # First item in 'deltas' is the default master value;
-                    # for CFF2 data, that has already been written.
-                    blendStack.extend(deltas[1:])
-                numBlends = len(blendList)
-                blendStack.append(numBlends)
-                blendStack.append('blend')
+                appendBlendDeltas(blendStack, blendList)
                 blendList = []
             blendStack.append(masterArg)
     if blendList:
-        for masterValues in blendList:
-            deltas = varModel.getDeltas(masterValues)
-            # First item in 'deltas' is the default master value;
-            # for CFF2 data, that has already been written.
-            blendStack.extend(deltas[1:])
-        numBlends = len(blendList)
-        blendStack.append(numBlends)
-        blendStack.append('blend')
-        blendList = []
+        appendBlendDeltas(blendStack, blendList)
     blendStack.append(op)
     return blendStack
 
 
+def appendBlendDeltas(blendStack, blendList):
+    for deltas in blendList:
+        # First item in 'deltas' is the default master value;
+        # for CFF2 data, that has already been written.
+        blendStack.extend(deltas[1:])
+    numBlends = len(blendList)
+    blendStack.append(numBlends)
+    blendStack.append('blend')
+
+
 def buildMMCFFTables(baseFont, privateDictList, cff2GlyphList, varModel):
 
     # Build the blended PrivateDicts.
@@ -648,15 +806,29 @@ def buildMMCFFTables(baseFont, privateDictList, cff2GlyphList, varModel):
             pd.rawDict[key] = dataList
 
     # Now update all the charstrings.
+    numMasters = len(varModel.locations)
     fontGlyphList = baseFont.ttFont.getGlyphOrder()
     for glyphName in fontGlyphList:
         gid = baseFont.charStrings.charStrings[glyphName]
         t2CharString = baseFont.charStringIndex[gid]
         cff2GlyphData = cff2GlyphList[glyphName]
         t2CharString.decompile()
+        opList = cff2GlyphData.opList
+        argArray = array('d')
+        for op, pointList in opList:
+            if op not in ('hintmask', 'cntrmask'):
+                argArray.extend(pointList)
+        glyphDeltaList = getBlendDeltas(argArray, numMasters, varModel)
+        argIndex = 0
         newProgram = []
-        for op, pointList in cff2GlyphData.opList:
-            blendStack = appendBlendOp(op, pointList, varModel)
+        for op, pointList in opList:
+            if op in ('hintmask', 'cntrmask'):
+                deltaList = None
+            else:
+                numArgs = len(pointList) // numMasters
+                deltaList = glyphDeltaList[argIndex:argIndex + numArgs]
+                argIndex += numArgs
+            blendStack = appendBlendOp(op, pointList, deltaList, numMasters)
             newProgram.extend(blendStack)
         t2CharString = T2CharString(private=t2CharString.private,
                                     globalSubrs=t2CharString.globalSubrs)
@@ -930,7 +1102,7 @@ def addSTATTable(varFont, varFontPath):
 
 
 def buildCFF2Font(varFontPath, varFont, varModel, masterPaths,
-                  post_format_3=False):
+                  post_format_3=False, numJobs=1):
     """Build CFF2 font from the master designs. default font is first."""
     numMasters = len(masterPaths)
     inputPaths = reorderMasters(varModel.mapping, masterPaths)
@@ -938,7 +1110,7 @@ def buildCFF2Font(varFontPath, varFont, varModel, masterPaths,
     # Since we have re-ordered the master master data to be the same
     # as the varModel.location order, the mappings are flat.
     (baseFont, privateDictList, cff2GlyphList, fontGlyphList, blendError) = \
-        buildMasterList(inputPaths)
+        buildMasterList(inputPaths, numJobs)
     if blendError:
         return blendError
     buildMMCFFTables(baseFont, privateDictList, cff2GlyphList, varModel)
@@ -968,6 +1140,18 @@ def run(args=None):
     if '-p' in args:
         post_format_3 = True
         args.remove('-p')
+    numJobs = multiprocessing.cpu_count()
+    if '-jobs' in args:
+        i = args.index('-jobs')
+        try:
+            numJobs = int(args[i + 1])
+        except (IndexError, ValueError):
+            numJobs = 0
+        if numJobs < 1:
+            print("Quitting. Option '-jobs' must be followed by the number of "
+                  "worker processes.")
+            return
+        del args[i:i + 2]
 
     if parse_version(fontToolsVersion) < parse_version("3.19"):
         print("Quitting. The Python fonttools module must be at least 3.19.0 "
@@ -988,7 +1172,7 @@ def run(args=None):
     varFont, varModel, masterPaths = varLib.build(designSpacePath, otfFinder)
 
     blendError = buildCFF2Font(varFontPath, varFont, varModel, masterPaths,
-                               post_format_3)
+                               post_format_3, numJobs)
     if not blendError:
         print("Built variable font '%s'" % (varFontPath))
 
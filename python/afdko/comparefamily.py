@@ -12,7 +12,7 @@ __copyright__ = """Copyright 2015 Adobe Systems Incorporated (http://www.adobe.c
 __usage__ = """
 comparefamily 2.1.1 Sep 18 2018
 
-comparefamily [u] -h] [-d <directory path>] [-tolerance <n>] -rm] [-rn] [-rp] [-nohints] [-l] [-rf] [-st n1,..] [-ft n1,..]
+comparefamily [u] -h] [-d <directory path>] [-tolerance <n>] -rm] [-rn] [-rp] [-nohints] [-l] [-rf] [-st n1,..] [-ft n1,..] [-jobs <n>] [-cache <dir>]
 where 'n1' stands for the number of a test, such as "-st 26" to run Single Test 26.
 
 Program for checking many font development problems, both within a
@@ -70,6 +70,16 @@ comparefamily will look in the specified directory and examine and
    -ft n1,n2,n3..:  Execute only the listed family tests. For
         example: '-ft 1,18". The max family test number is 21.
 
+   -jobs <n>:  Use n worker processes to read the fonts and to run the
+        single face tests. Default is the number of CPUs. The report is
+        the same, and in the same order, whatever the number of jobs.
+
+   -cache <dir>:  Keep a fact sheet for each font in the directory <dir>,
+        with the data that the tests use from the font tables and glyphs.
+        A font that has not changed since the last run with the same cache
+        directory is read from its fact sheet instead of being measured again.
+        Fact sheets written by another version of comparefamily are not used.
+
 
 
 comparefamily now depends on some configurable data for a few tests.
@@ -93,14 +103,24 @@ import struct
 import re
 import copy
 import math
+import numbers
+import multiprocessing
+import hashlib
+import io
+import json
+import tempfile
 
 from fontTools import ttLib
-from fontTools.misc.py23 import tounicode, byteord
+from fontTools.misc.py23 import basestring, tobytes, tounicode, byteord, BytesIO, StringIO
+from fontTools.misc.psCharStrings import SimpleT2Decompiler
+from fontTools.pens.boundsPen import BoundsPen
 
 from afdko import fdkutils
 
 
 gDesignSpaceTolerance = 0 # don't complain about metrics differences greater than this amount.
+gNumJobs = multiprocessing.cpu_count() # number of worker processes used to read fonts and run single face tests.
+gFactCacheDir = None # directory of the font fact sheets; None for no caching.
 
 kFixedPitchExceptionList = [
 							"OCRB",
@@ -906,7 +926,7 @@ class compare_family_font:
 			self.path = path
 
 
-def readGlyphInfo(cmpfFont):
+def readGlyphInfo(cmpfFont, glyphFacts=None):
 
 	# Get glyph name list.
 	glyphnames = cmpfFont.ttFont.getGlyphOrder()
@@ -961,58 +981,105 @@ def readGlyphInfo(cmpfFont):
 		cmpfFont.isFixedPitchfromHMTX = len(widthsDict) == 1
 
 
-	# Use tx to get RSB
-	### glyph[tag] {gname,enc,width,{left,bottom,right,top}}
-	# glyph[1] {space,0x0020,250,{0,0,0,0}}
-	command = "tx -mtx \"%s\" 2>&1" % (cmpfFont.path)
-	report = fdkutils.runShellCmd(command)
-	metrics = re.findall(r"glyph\S+\s+{([^,]+),[^,]+,([^,]+),{([-0-9]+),([-0-9]+),([-0-9]+),([-0-9]+)}}", report)
-	if not metrics:
-		print("Error: Quitting. Could not run 'tx' against the font %s to get font metrics." % cmpfFont.path)
-		print("\t tx log output <" + report + ">.")
-		sys.exit(0)
-	cmpfFont.metricsDict = {}
-	for entry in metrics:
-		valList = [eval(val) for val in entry[1:]]
-		cmpfFont.metricsDict[entry[0]] = valList
-	# use spot to get ligature defintions.
-	command = "spot -t GSUB=7 \"%s\" 2>&1" % (cmpfFont.path)
-	report = fdkutils.runShellCmd(command)
-	if cmpfFont.isTTF:
-		report = re.sub(r"(\S+)@\d+", r"\1", report)
-	if cmpfFont.isCID:
-		report = re.sub(r"\\(\d+)", r"\1", report)
-	cmpfFont.ligDict = {}
+	if glyphFacts is None:
+		glyphFacts = getGlyphMetrics(cmpfFont.ttFont), getLigatureDict(cmpfFont.ttFont), getHintDict(cmpfFont.ttFont)
+	cmpfFont.metricsDict, cmpfFont.ligDict, cmpfFont.hintDict = glyphFacts
+
+
+def getGlyphFacts(path):
+	# Returns the glyph metrics dict, the ligature dict and the hint dict of
+	# a font. Only takes and returns plain data, so that it can run in a
+	# worker process.
+	ttFont = ttLib.TTFont(path, lazy=True)
+	try:
+		return getGlyphMetrics(ttFont), getLigatureDict(ttFont), getHintDict(ttFont)
+	finally:
+		ttFont.close()
+
+
+def getGlyphMetrics(ttFont):
+	# Returns {glyph name: [width, left, bottom, right, top]}. The bounding
+	# box is that of the outline, rounded out to integer values. Glyphs with
+	# no outline get a box of all zeros.
+	glyphSet = ttFont.getGlyphSet()
+	metricsDict = {}
+	for glyphName in ttFont.getGlyphOrder():
+		glyph = glyphSet[glyphName]
+		pen = BoundsPen(glyphSet)
+		glyph.draw(pen)
+		if pen.bounds:
+			xMin, yMin, xMax, yMax = pen.bounds
+			bounds = [int(math.floor(xMin)), int(math.floor(yMin)), int(math.ceil(xMax)), int(math.ceil(yMax))]
+		else:
+			bounds = [0, 0, 0, 0]
+		metricsDict[glyphName] = [glyph.width] + bounds
+	return metricsDict
+
+
+def getHintDict(ttFont):
+	# Returns {glyph name: stem hint list} for the glyphs of a CFF font that
+	# draw anything. See T2HintExtractor for the stem hint entries.
+	hintDict = {}
+	if 'CFF ' not in ttFont:
+		return hintDict
+	cff = ttFont['CFF '].cff
+	charStrings = cff[cff.fontNames[0]].CharStrings
+	for glyphName in ttFont.getGlyphOrder():
+		t2CharString = charStrings[glyphName]
+		private = getattr(t2CharString, "private", None)
+		hintExtractor = T2HintExtractor(getattr(private, "Subrs", []), t2CharString.globalSubrs, private)
+		hintList = hintExtractor.getStems(t2CharString)
+		if hintExtractor.isMarking:
+			hintDict[glyphName] = hintList
+	return hintDict
+
+
+def getLigatureDict(ttFont):
+	# Returns {ligature glyph name: [component name list, ...]} for the
+	# ligature substitutions of the kLigFeatureList features in the GSUB table.
+	ligDict = {}
+	if 'GSUB' not in ttFont:
+		return ligDict
+	gsub = ttFont['GSUB'].table
+	if not (gsub.FeatureList and gsub.LookupList):
+		return ligDict
+
+	# A lookup used by several features is credited to the first of them,
+	# as in the 'spot -t GSUB' dump.
+	lookupFeatureDict = {}
+	for featureRecord in gsub.FeatureList.FeatureRecord:
+		for lookupIndex in featureRecord.Feature.LookupListIndex:
+			if lookupIndex not in lookupFeatureDict:
+				lookupFeatureDict[lookupIndex] = featureRecord.FeatureTag
+
+	lookupList = gsub.LookupList.Lookup
+	doneLookups = set()
 	for ligfeatureTag in kLigFeatureList:
-		pat = re.compile(r"# Printing lookup \d+ in feature '%s'[^\r\n]+[\r\n](.+?)(?=[\r\n][\r\n])" % ligfeatureTag, re.DOTALL)
-		subTableList = re.findall(pat,  report)
-		if subTableList:
-			for subtable in subTableList:
-				ligList = re.findall(r"sub(?:stitute)*\s+(.+?)\s+by\s+([^;]+);",subtable)
-				for ligEntry in ligList:
-					if "[" in ligEntry[0]:
-						continue # can't be a ligature if the input contains a class entry
-					lig = ligEntry[1].strip()
-
-					if " " in lig:
-						continue # it is a ligature subs only if it has one output.
-
-					ligCompInput = ligEntry[0].strip()
-
-					# clean up contextual outptu for spot.
-					if "lookup" in ligCompInput:
-						ligCompInput = re.sub(r"lookup\s\d+", "", ligCompInput)
-						ligCompInput = re.sub(r";", "", ligCompInput)
-
-					ligCompList = ligCompInput.split()
-					if "'" in  ligCompInput: # If contextual , filter out all but the input string.
-						ligCompList = filter(lambda name: name[-1] == "'", ligCompList)
-						ligCompList = map(lambda name: name[:-1], ligCompList)
-					if len(ligCompList) < 2:
-						continue # it is a ligature subs only if input has nore than one entry
-					compList = cmpfFont.ligDict.get(lig, [])
-					compList.append(ligCompList)
-					cmpfFont.ligDict[lig] = compList
+		for featureRecord in gsub.FeatureList.FeatureRecord:
+			if featureRecord.FeatureTag != ligfeatureTag:
+				continue
+			for lookupIndex in featureRecord.Feature.LookupListIndex:
+				if (lookupIndex in doneLookups) or (lookupFeatureDict[lookupIndex] != ligfeatureTag):
+					continue
+				doneLookups.add(lookupIndex)
+				lookup = lookupList[lookupIndex]
+				for subtable in lookup.SubTable:
+					if lookup.LookupType == 7:
+						if subtable.ExtensionLookupType != 4:
+							continue
+						subtable = subtable.ExtSubTable
+					elif lookup.LookupType != 4:
+						continue
+					ligatures = subtable.ligatures
+					for firstGlyph in sorted(ligatures.keys(), key=ttFont.getGlyphID):
+						for ligature in ligatures[firstGlyph]:
+							ligCompList = [firstGlyph] + list(ligature.Component)
+							if len(ligCompList) < 2:
+								continue # it is a ligature subs only if input has nore than one entry
+							compList = ligDict.get(ligature.LigGlyph, [])
+							compList.append(ligCompList)
+							ligDict[ligature.LigGlyph] = compList
+	return ligDict
 
 def readCFFTable(cmpfFont):
 	# get 'CFF ' table private dict
@@ -1413,7 +1480,11 @@ def readhheaTable(cmpfFont):
 
 
 def handle_datafork_file(path):
-	tt = ttLib.TTFont(path)
+	# Read the font data into memory, so that forked worker processes
+	# do not share the position of an open font file.
+	with open(path, "rb") as f:
+		data = f.read()
+	tt = ttLib.TTFont(BytesIO(data))
 	return tt
 
 
@@ -1480,6 +1551,117 @@ def get_fontinfo(pathname, type):
 
 	return ttFont
 
+def encodeFact(value):
+	# Converts a font fact to a JSON value. JSON objects are only used to
+	# tag the types that JSON doesn't have, so that decodeFact() gives back
+	# exactly the same value.
+	if isinstance(value, bytes):
+		return {"bytes": tounicode(value, "latin-1")}
+	elif isinstance(value, tuple):
+		return {"tuple": [encodeFact(item) for item in value]}
+	elif isinstance(value, list):
+		return [encodeFact(item) for item in value]
+	elif isinstance(value, dict):
+		return {"dict": [[encodeFact(key), encodeFact(item)] for key, item in value.items()]}
+	elif (value is None) or isinstance(value, (bool, numbers.Integral, float, basestring)):
+		return value
+	raise TypeError("Can't store %r in a fact sheet." % type(value))
+
+def decodeFact(value):
+	if isinstance(value, list):
+		return [decodeFact(item) for item in value]
+	elif isinstance(value, dict):
+		if "bytes" in value:
+			return tobytes(value["bytes"], "latin-1")
+		elif "tuple" in value:
+			return tuple(decodeFact(item) for item in value["tuple"])
+		return dict((decodeFact(key), decodeFact(item)) for key, item in value["dict"])
+	return value
+
+def getCodeVersion():
+	# Identifies the code that wrote a fact sheet: the afdko release, and
+	# the contents of this script, which can change between releases.
+	try:
+		import pkg_resources
+		afdkoVersion = pkg_resources.get_distribution("afdko").version
+	except Exception:
+		afdkoVersion = ""
+	hasher = hashlib.sha256()
+	try:
+		with open(os.path.splitext(__file__)[0] + ".py", "rb") as fp:
+			hasher.update(fp.read())
+	except (IOError, OSError):
+		pass
+	return "%s %s" % (afdkoVersion, hasher.hexdigest())
+
+class FontFactCache(object):
+	# Directory of per-font fact sheets. A fact sheet holds the font data
+	# that is set by the table readers and readGlyphInfo(), and the report
+	# text they printed. It is stored as JSON under a hash of the font path
+	# and the version of the code, and is used only if the content hash of
+	# the font file has not changed.
+
+	def __init__(self, cacheDir):
+		self.cacheDir = cacheDir
+		self.codeVersion = getCodeVersion()
+		self.hits = 0
+		self.misses = 0
+		if not os.path.isdir(cacheDir):
+			os.makedirs(cacheDir)
+
+	def getPath(self, fontPath):
+		key = "%s\n%s" % (self.codeVersion, os.path.abspath(fontPath))
+		keyHash = hashlib.sha256(key.encode("utf-8")).hexdigest()
+		return os.path.join(self.cacheDir, keyHash + ".json")
+
+	@staticmethod
+	def getContentHash(fontPath):
+		hasher = hashlib.sha256()
+		with open(fontPath, "rb") as fp:
+			for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+				hasher.update(chunk)
+		return hasher.hexdigest()
+
+	def get(self, fontPath, contentHash):
+		try:
+			with io.open(self.getPath(fontPath), "r", encoding="utf-8") as fp:
+				factSheet = json.load(fp)
+			if (factSheet["version"] != self.codeVersion) or (factSheet["contentHash"] != contentHash):
+				factSheet = None
+			else:
+				factSheet["facts"] = decodeFact(factSheet["facts"])
+		except Exception:
+			factSheet = None
+		if factSheet is None:
+			self.misses += 1
+			return None
+		self.hits += 1
+		return factSheet
+
+	def put(self, fontPath, contentHash, facts, report):
+		path = self.getPath(fontPath)
+		try:
+			factSheet = {"version": self.codeVersion, "contentHash": contentHash, "facts": encodeFact(facts), "report": tounicode(report)}
+			data = json.dumps(factSheet, ensure_ascii=True, sort_keys=True)
+			# Write to a temp file first, so that a run that is stopped
+			# part way never leaves a partial fact sheet.
+			fd, tempPath = tempfile.mkstemp(dir=self.cacheDir)
+			with os.fdopen(fd, "wb") as fp:
+				fp.write(data.encode("ascii"))
+			if os.path.exists(path):
+				os.remove(path)
+			os.rename(tempPath, path)
+		except (IOError, OSError, TypeError):
+			pass
+
+
+# Font attributes that are not stored in the fact sheets. Most refer to the
+# loaded font, and are set up again on every run.
+kNotCachedFontAttributes = ["ttFont", "path", "contentHash", "isTTF", "isCID", "topDict", "FDArray"]
+
+def getFontFacts(cmpfFont):
+	return dict((key, value) for key, value in vars(cmpfFont).items() if key not in kNotCachedFontAttributes)
+
 # Get all the .otf file from the directory, read in the font info and build a font list
 def build_fontlist_from_dir(directory):
 	global fontlist
@@ -1491,6 +1673,10 @@ def build_fontlist_from_dir(directory):
 		return []
 
 	fontlist = []
+	factCache = None
+	if gFactCacheDir:
+		factCache = FontFactCache(gFactCacheDir)
+	newFontList = [] # fonts that were not found in the fact cache.
 	for i in range(len(dirlist)):
 		filename = dirlist[i]
 		path = os.path.join(directory, filename )
@@ -1508,24 +1694,87 @@ def build_fontlist_from_dir(directory):
 				cmpfFont.isTTF = 0
 			else:
 				cmpfFont.isTTF = 1
-			readNameTable(cmpfFont)
-			readheadTable(cmpfFont)
-			readhheaTable(cmpfFont)
-			readOS2Table(cmpfFont)
-			readpostTable(cmpfFont)
 			if 'CFF ' in cmpfFont.ttFont.keys():
 				readCFFTable(cmpfFont)
 			else:
 				cmpfFont.isCID = 0
 				cmpfFont.topDict = None
-			readGlyphInfo(cmpfFont)
 			fontlist.append(cmpfFont)
 
+			factSheet = None
+			if factCache:
+				cmpfFont.contentHash = factCache.getContentHash(path)
+				factSheet = factCache.get(path, cmpfFont.contentHash)
+			if factSheet:
+				vars(cmpfFont).update(factSheet["facts"])
+				sys.stdout.write(factSheet["report"])
+				continue
+
+			# Keep what the table readers report, so that it can be
+			# written again when the font is read from its fact sheet.
+			stdout = sys.stdout
+			sys.stdout = report = StringIO()
+			try:
+				readNameTable(cmpfFont)
+				readheadTable(cmpfFont)
+				readhheaTable(cmpfFont)
+				readOS2Table(cmpfFont)
+				readpostTable(cmpfFont)
+			finally:
+				sys.stdout = stdout
+			cmpfFont.loadReport = report.getvalue()
+			sys.stdout.write(cmpfFont.loadReport)
+			newFontList.append(cmpfFont)
+
+	# Measuring all the glyphs is by far the slowest part of reading a font,
+	# so this is done for all the fonts at once in the worker processes.
+	if gNumJobs > 1:
+		glyphFactsList = runInPool(getGlyphFacts, [cmpfFont.path for cmpfFont in newFontList])
+	else:
+		glyphFactsList = [None] * len(newFontList)
+	for cmpfFont, glyphFacts in zip(newFontList, glyphFactsList):
+		readGlyphInfo(cmpfFont, glyphFacts)
+		report = cmpfFont.loadReport
+		del cmpfFont.loadReport
+		if factCache:
+			factCache.put(cmpfFont.path, cmpfFont.contentHash, getFontFacts(cmpfFont), report)
+
+	if factCache:
+		print("Read %s of %s fonts from the fact cache." % (factCache.hits, len(fontlist)))
+
 	if not fontlist:
 		print("No TrueType or OpenType files found in the directory. ", directory)
 
 	return None
 
+
+def getForkContext():
+	# The single face tests are run in forked worker processes, which share
+	# the fontlist of the parent. Returns None if the platform cannot fork.
+	if not hasattr(os, "fork"):
+		return None
+	try:
+		return multiprocessing.get_context("fork")
+	except AttributeError:
+		return multiprocessing # Python 2 always forks on POSIX.
+	except ValueError:
+		return None
+
+
+def runInPool(func, argList, context=multiprocessing):
+	# Returns [func(args) for args in argList], using up to gNumJobs worker
+	# processes. The results are in the order of argList.
+	numJobs = min(gNumJobs, len(argList))
+	if numJobs < 2 or context is None:
+		return [func(args) for args in argList]
+	sys.stdout.flush()
+	pool = context.Pool(numJobs)
+	try:
+		return pool.map(func, argList, chunksize=1)
+	finally:
+		pool.close()
+		pool.join()
+
 def doSingleTest1():
 	global fontlist
 
@@ -2108,15 +2357,92 @@ def doSingleTest17():
 						print("\t\t" + name)
 
 
-hintPat = re.compile(r"(?:(\s-*[0-9.]+)(\s-*[0-9.]+)*)\s([a-z]+)")
-def checkHintEntry(entry, missingHintsGlyphs, glyphBox, fontPSName):
+class StopHintExtraction(Exception):
+	pass
+
+class T2HintExtractor(SimpleT2Decompiler):
+	# Collects the stem hints that are in effect at the start of a Type 2
+	# charstring, as a list of (low, high, op) entries. op is one of 'hstem',
+	# 'vstem', 'topedge' or 'bottomedge'; high is None for the edge hints.
+	# If the first hintmask comes before the first moveto, only the stems it
+	# selects are kept. isMarking is set if the charstring draws anything.
+
+	def reset(self):
+		SimpleT2Decompiler.reset(self)
+		self.stemList = []
+		self.stemEdge = {"h": 0, "v": 0}
+		self.foundWidth = False
+		self.isMarking = False
+
+	def getStems(self, t2CharString):
+		self.reset()
+		try:
+			self.execute(t2CharString)
+		except StopHintExtraction:
+			pass
+		return self.stemList
+
+	def addStems(self, direction):
+		args = self.popall()
+		if (len(args) % 2) and not self.foundWidth:
+			args = args[1:]
+		self.foundWidth = True
+		self.hintCount = self.hintCount + len(args) // 2
+		edge = self.stemEdge[direction]
+		for i in range(0, len(args) - 1, 2):
+			low = fixNumber(edge + args[i])
+			edge = high = fixNumber(low + args[i+1])
+			if direction == "h" and args[i+1] == -20:
+				self.stemList.append((low, None, "topedge"))
+			elif direction == "h" and args[i+1] == -21:
+				self.stemList.append((high, None, "bottomedge"))
+			else:
+				self.stemList.append((low, high, direction + "stem"))
+		self.stemEdge[direction] = edge
+
+	def op_hstem(self, index):
+		self.addStems("h")
+	op_hstemhm = op_hstem
+
+	def op_vstem(self, index):
+		self.addStems("v")
+	op_vstemhm = op_vstem
+
+	def op_hintmask(self, index):
+		if self.operandStack:
+			self.addStems("v")
+		self.foundWidth = True
+		hintMaskBytes, index = SimpleT2Decompiler.op_hintmask(self, index)
+		self.stemList = [stem for i, stem in enumerate(self.stemList) if byteord(hintMaskBytes[i >> 3]) & (0x80 >> (i & 7))]
+		self.isMarking = True
+		raise StopHintExtraction
+
+	def op_cntrmask(self, index):
+		if self.operandStack:
+			self.addStems("v")
+		self.foundWidth = True
+		return SimpleT2Decompiler.op_cntrmask(self, index)
+
+	def op_rmoveto(self, index):
+		self.isMarking = True
+		raise StopHintExtraction
+	op_hmoveto = op_vmoveto = op_rmoveto
+
+	def op_endchar(self, index):
+		# An endchar with 4 or more arguments is a seac accented glyph.
+		self.isMarking = len(self.operandStack) >= 4
+		raise StopHintExtraction
+
+def fixNumber(value):
+	# Drop the rounding error from sums of Type 2 fixed-point numbers.
+	value = round(value, 2)
+	if value == int(value):
+		value = int(value)
+	return value
+
+def checkHintEntry(name, hintList, missingHintsGlyphs, glyphBox, fontPSName):
 	errorCount = 0
 	errMsgs = []
-	name = entry[0]
-	if entry[-1] == "endchar": # non-marking char
-		return errorCount
-
-	hintList = hintPat.findall(entry[2])
 	if not hintList:
 		missingHintsGlyphs.append(name)
 		return errorCount
@@ -2131,9 +2457,7 @@ def checkHintEntry(entry, missingHintsGlyphs, glyphBox, fontPSName):
 
 		glyphBBoxSize = max-min
 
-		lo = eval(lo)
-		if high:
-			high = eval(high)
+		if high is not None:
 			stemWidth = high-lo
 			if stemWidth < 0:
 				errMsgs +=  ["Error: hint %s %s %s in glyph %s has a negative stem width. %s." % (lo, high, op, name, fontPSName)]
@@ -2161,7 +2485,6 @@ def checkHintEntry(entry, missingHintsGlyphs, glyphBox, fontPSName):
 def doSingleTest18():
 	print("\nSingle Face Test 18: Hint Check.  Verify that there is at least one hint for each charstring in each font, and that no charstring is > 32K limit for Mac OSX 10.3.x and earlier.")
 	recursionLevel = 0
-	txDumpMathPat = re.compile(r"glyph\[\d+\] \{([^,]+),[^\s]+\s+(\S+)\s+width(.+?)(move|endchar)", re.DOTALL)
 	for cmpfFont in fontlist:
 
 		# Get glyph name list.
@@ -2187,7 +2510,7 @@ def doSingleTest18():
 			recursionLevel = 0
 			t2CharString = charStrings[key]
 			if not t2CharString.bytecode:
-				t2CharString,compile()
+				t2CharString.compile()
 			if len(t2CharString.bytecode) > 32767:
 				print("Error: charstring for glyph %s is greater than 32k bytes. this can cause problems in Mac OSX 1.3.x and earlier." % (key))
 
@@ -2195,17 +2518,13 @@ def doSingleTest18():
 		if not doStemWidthChecks:
 			return
 
-		command = "tx -dump -6 \"%s\" 2>&1" % (cmpfFont.path)
-		report = fdkutils.runShellCmd(command)
-		if not re.search(r"## glyph", report[:1000]):
-			print("Error: could not check hinting for %s. 'tx' command found some error. See following log." % (cmpfFont.PostScriptName1))
-			print(report)
-			return
-		hintList = txDumpMathPat.findall(report)
 		errorCount = 0
-		for entry in hintList:
-			glyphBox = cmpfFont.metricsDict[entry[0]][-4:]
-			errorCount += checkHintEntry(entry, missingHintsGlyphs, glyphBox, cmpfFont.PostScriptName1)
+		for key in glyphnames:
+			if key not in cmpfFont.hintDict:
+				continue # non-marking glyph
+			hintList = cmpfFont.hintDict[key]
+			glyphBox = cmpfFont.metricsDict[key][-4:]
+			errorCount += checkHintEntry(key, hintList, missingHintsGlyphs, glyphBox, cmpfFont.PostScriptName1)
 			if errorCount > 40:
 				print("Ending processing of hint errors - too many to enumerate.")
 				break
@@ -3310,55 +3629,53 @@ def doSingleTest34():
 		except AttributeError:
 			pass
 
+# Single face tests that add data to the fonts for use by later tests. These
+# are run in the main process before any of the other single face tests.
+kSingleTestSetupList = [19, 24]
+
+def runSingleTest(funcName):
+	# Runs a single face test, and returns its report text.
+	stdout = sys.stdout
+	sys.stdout = report = StringIO()
+	try:
+		globals()[funcName]()
+	finally:
+		sys.stdout = stdout
+	return report.getvalue()
+
 def doSingleFaceTests(singleTestList, familyTestList):
 	global doStemWidthChecks
 
 	if (singleTestList or familyTestList):
-		if singleTestList:
-			g = globals()
-			for val in singleTestList:
-				funcName = "doSingleTest%s" % (val)
-				if funcName not in g:
-					print("Error: cannot find function '%s' to execute." % (funcName))
-					continue
-				exec("%s()" % (funcName))
+		testList = []
+		g = globals()
+		for val in singleTestList:
+			funcName = "doSingleTest%s" % (val)
+			if funcName not in g:
+				print("Error: cannot find function '%s' to execute." % (funcName))
+				continue
+			testList.append(funcName)
 	else:
-		doSingleTest1()
-		doSingleTest2()
-		doSingleTest3()
-		doSingleTest4()
-		doSingleTest5()
-		doSingleTest6()
-		doSingleTest7()
-		doSingleTest8()
-		doSingleTest9()
-		doSingleTest10()
-		doSingleTest11()
-		doSingleTest12()
-		doSingleTest13()
-		doSingleTest14()
-		doSingleTest15()
-		doSingleTest16()
-		doSingleTest17()
-		if ('CFF ' in fontlist[0].ttFont.keys()):
-			doSingleTest18()
-		doSingleTest19()
-		doSingleTest20()
-		doSingleTest21()
-		doSingleTest22()
-		doSingleTest23()
-		doSingleTest24()
-		doSingleTest25()
-		doSingleTest26()
-		doSingleTest27()
-		doSingleTest28()
-		doSingleTest29()
+		testNumList = list(range(1, 30))
 		if ('CFF ' in fontlist[0].ttFont.keys()):
-			doSingleTest30()
-			doSingleTest31()
-			doSingleTest32()
-			doSingleTest33()
-			doSingleTest34()
+			testNumList += list(range(30, 35))
+		else:
+			testNumList.remove(18)
+		testList = ["doSingleTest%s" % (val) for val in testNumList]
+
+	# The tests do not depend on each other once the set-up tests have
+	# run, so the rest are run concurrently. The reports are written in
+	# the order of testList.
+	setupList = ["doSingleTest%s" % (val) for val in kSingleTestSetupList]
+	reportDict = {}
+	for funcName in testList:
+		if funcName in setupList:
+			reportDict[funcName] = runSingleTest(funcName)
+	workList = [funcName for funcName in testList if funcName not in reportDict]
+	for funcName, report in zip(workList, runInPool(runSingleTest, workList, getForkContext())):
+		reportDict[funcName] = report
+	for funcName in testList:
+		sys.stdout.write(reportDict[funcName])
 
 def doFamilyTest1():
 	global compatibleFamilyList3
@@ -4979,13 +5296,13 @@ def print_std_charset_report(charSetName):
 
 
 def read_options():
-	global gDesignSpaceTolerance
+	global gDesignSpaceTolerance, gNumJobs, gFactCacheDir
 	directory = logfilename = charSetName = ""
 	nreport = mreport = preport = creport  = doFeatureReportOnly = 0
 	doStemWidthChecks = 1
 	singleTestList = []
 	familyTestList = []
-	flags = ['-h', '-u', '-d', '-rn', '-rm', '-rp', '-l', '-nohints', '-rc', '-rf', '-st', '-ft', '-tolerance',]
+	flags = ['-h', '-u', '-d', '-rn', '-rm', '-rp', '-l', '-nohints', '-rc', '-rf', '-st', '-ft', '-tolerance', '-jobs', '-cache']
 	i = 1
 	directory = os.curdir # default
 	while i < (len(sys.argv)):
@@ -5047,6 +5364,21 @@ def read_options():
 				except:
 					print("Error: argument for option '-tolerance' must be an integer design space value.")
 					sys.exit()
+			elif option == 13:
+				i = i + 1
+				try:
+					gNumJobs = int(sys.argv[i])
+				except (IndexError, ValueError):
+					gNumJobs = 0
+				if gNumJobs < 1:
+					print("Error: argument for option '-jobs' must be a positive integer number of processes.")
+					sys.exit()
+			elif option == 14:
+				i = i + 1
+				if i >= len(sys.argv):
+					print("Error: option '-cache' must be followed by the path to the fact cache directory.")
+					sys.exit()
+				gFactCacheDir = sys.argv[i]
 			else:
 				print("Argument '%s'  is not recognized." % (sys.argv[i]))
 				print(__usage__)
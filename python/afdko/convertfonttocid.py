@@ -6,15 +6,16 @@ convertfonttocid.py. v 1.13.0 Aug 28 2018
 Convert a Type 1 font to CID, given multiple hint dict defs in the
 "fontinfo" file. See autohint help, with the "-hfd" option, or the makeotf
 user guide for details on this format. The output file produced by
-convertFontToCID() is a CID Type 1 font, no matter what the input is.
+convertFontToCID() is a CID-keyed CFF font, no matter what the input is.
 
 PROCEDURE:
 1. convertFontToCID()
    - read 'fontinfo' file
-   - getGlyphList(): get list of glyph names (via 'tx -dump -4')
-   - getFontBBox(): get FontBBox (via 'tx -mtx -2')
-   - getFontName(): get FontName (via 'tx -dump -0')
-   - getBlueFuzz(): get BlueFuzz (via 'tx -dump -0')
+   - readCFFFontSet(): read the font's CFF data with fontTools; fonts that
+     are not OpenType/CFF are first converted to CFF (via 'tx -cff +b')
+   - getCFFGlyphList(): get list of glyph names
+   - getCFFFontBBox(): get FontBBox
+   - getCFFBlueFuzz(): get BlueFuzz
 
 2. parseFontInfoFile()
    - parse 'fontinfo' file
@@ -28,38 +29,31 @@ PROCEDURE:
            merged into a single CID font that will have the same glyph
            order as the original font.
 
-4. makeTempFonts()
-   - generate a Type1 font (via 'tx -t1 -g ...') for each FDDict;
-     the fonts are subsets of the original font.
-   - fixFontDict():
-     - convert each name-keyed Type1 font to text (via 'detype1')
-     - fix FontName
-     - fix FontMatrix
-     - fix StemSnapH
-     - fix StemSnapV
-     - fix LanguageGroup
-     - fix BlueValues
-     - fix OtherBlues
-     - convert text font back to Type1 (via 'type1')
-
-5. merge_fonts()
-   - makeCIDFontInfo():
-     - get the original font's FontDict (via 'tx -0')
-     - assemble and save a temporary 'cidfontinfo' file
-   - makeGAFile():
-     - generate temporary glyph alias file for each FDDict
-   - convert each name-keyed Type1 font to CID-keyed (via 'mergefonts')
-   - merge all CID-keyed fonts (via 'mergefonts')
+4. makeCIDFont()
+   - makeCIDTopDict(): make the CID-keyed top dict from the original
+     font's top dict
+   - makeFontDict(): make a font dict for each FDDict, with the
+     FontName, FontMatrix, StemSnapH, StemSnapV, LanguageGroup, BlueValues
+     and OtherBlues fixed up as given in the 'fontinfo' file
+   - build the FDSelect and re-key the charstrings by CID, keeping the
+     glyph order of the original font
+
+5. compile the CID-keyed CFF font and save it to the output path
 
 """
 
 from __future__ import print_function, absolute_import
 
+import math
 import os
 import re
 import sys
 
-from fontTools.misc.py23 import open, tounicode, tobytes
+from fontTools.cffLib import (CFFFontSet, CharStrings, FDArrayIndex,
+                              FDSelect, FontDict, PrivateDict, TopDict)
+from fontTools.misc.arrayTools import unionRect
+from fontTools.misc.py23 import open, BytesIO
+from fontTools.ttLib import TTFont
 
 from afdko import fdkutils
 
@@ -144,38 +138,35 @@ kFDDictKeys = (kOtherFDDictKeys + kBlueValueKeys + kOtherBlueValueKeys +
                kRunTimeFDDictKeys)
 
 
-# CID stuff
-kRequiredCIDFontInfoFields = [
-    "FontName",
-    "Registry",
-    "Ordering",
-    "Supplement",
-]
-
-kOptionalFields = [
-    "FSType",
-    "Weight",
-    "Trademark",
+# Name-keyed font top dict keys that are not copied to the CID-keyed font.
+kNameKeyedTopDictKeys = [
+    "charset",
+    "Encoding",
+    "CharStrings",
+    "Private",
+    "version",
+    "Notice",
+    "Copyright",
     "FullName",
     "FamilyName",
-    "version",
-    "AdobeCopyright",
-    "Trademark",
+    "Weight",
 ]
-kCIDFontInfokeyList = kRequiredCIDFontInfoFields + kOptionalFields
-
-TX_FIELDS = [  # [field name in tx, key name in cidfontinfo, value]
-    ["FontName", "FontName", ""],
-    ["FullName", "FullName", ""],
-    ["FamilyName", "FamilyName", ""],
-    ["version", "version", ""],
-    ["Notice", "AdobeCopyright", ""],
-    ["Copyright", "AdobeCopyright", ""],
-    ["Trademark", "Trademark", ""],
-    ["FSType", "FSType", ""],
-    ["Weight", "Weight", ""],
+
+# Private dict keys that are set only from the FDDict.
+kFDDictPrivateKeys = [
+    "StemSnapH",
+    "StemSnapV",
+    "LanguageGroup",
+    "OtherBlues",
 ]
 
+# Number of decimal places the glyph bounds are rounded to.
+kBBoxPrecision = 3
+
+# Longest top dict string value 'mergefonts' would read from a
+# 'cidfontinfo' file, including the enclosing parentheses.
+kMaxCIDFontInfoValueLen = 127
+
 
 class FontInfoParseError(Exception):
     pass
@@ -792,246 +783,290 @@ def makeSortedGlyphLists(glyphList, fdGlyphDict):
     return glyphSetList
 
 
-def fixFontDict(tempPath, fdDict):
-    txtPath = fdkutils.get_temp_file_path()
-    command = "detype1 \"%s\" \"%s\" 2>&1" % (tempPath, txtPath)
-    log = fdkutils.runShellCmd(command)
-    if log:
-        print(log)
+def readCFFFontSet(fPath):
+    """
+    Returns the fontTools CFFFontSet for the font file, and the TTFont
+    used for compiling it. OpenType/CFF fonts are read directly; other
+    font formats are first converted to a bare CFF font (via 'tx -cff +b').
+    """
+    with open(fPath, "rb") as fp:
+        isOTF = fp.read(4) == b"OTTO"
+    if isOTF:
+        ttFont = TTFont(fPath, recalcBBoxes=False)
+        return ttFont['CFF '].cff, ttFont
 
-    with open(txtPath, "r", encoding='utf-8') as fp:
+    tempPath = fdkutils.get_temp_file_path()
+    command = "tx -cff +b \"%s\" \"%s\" 2>&1" % (fPath, tempPath)
+    report = fdkutils.runShellCmd(command)
+    with open(tempPath, "rb") as fp:
         data = fp.read()
+    if ("fatal" in report) or ("error" in report) or not data:
+        print(report)
+        raise FontParseError("Error: Failed running 'tx -cff +b' on file "
+                             "%s" % fPath)
+    cffFontSet = CFFFontSet()
+    cffFontSet.decompile(BytesIO(data), None)
+    topDict = cffFontSet.topDictIndex[0]
+    # tx omits the charset operator when it can use the default (offset 0)
+    # charset, which the fontTools reader does not fall back to.
+    if "charset" not in topDict.rawDict:
+        topDict.rawDict["charset"] = 0
+    restoreFamilyBlues(fPath, topDict.Private)
+    return cffFontSet, TTFont(recalcBBoxes=False)
+
+
+def restoreFamilyBlues(fPath, privateDict):
+    """
+    'tx -cff' drops the FamilyBlues and FamilyOtherBlues values that are
+    the same as the BlueValues and OtherBlues. Since the FDDicts may later
+    replace the latter, copy the original values back from the source font.
+    """
+    command = "tx -dump -0 \"%s\" 2>&1" % fPath
+    data = fdkutils.runShellCmd(command)
+    if not data:
+        raise FontInfoParseError("Error: Failed getting log from tx from %s, "
+                                 "when trying to get FamilyBlues." % fPath)
 
-    # fix font name. We always search for it, as it is always present,
-    # and we can use the following white space to get the file new line.
-    m = re.search(r"(/FontName\s+/\S+\s+def)(\s+)", data)
-    newLine = m.group(2)
-    if not m:
-        raise FontParseError("Failed to find FontName in input font! "
-                             "%s" % tempPath)
-    if fdDict.FontName:
-        target = "/FontName /%s def" % fdDict.FontName
-        data = data[:m.start(1)] + target + data[m.end(1):]
-
-    # fix em square
-    if fdDict.OrigEmSqUnits:
-        m = re.search(r"/FontMatrix\s+\[.+?\]\s+def", data)
-        if not m:
-            raise FontParseError("Failed to find FontMatrix in input font! "
-                                 "%s" % tempPath)
-        emUnits = getattr(fdDict, 'OrigEmSqUnits')
-        a = 1.0 / emUnits
-        target = "/FontMatrix [%s 0 0 %s 0 0] def" % (a, a)
-        data = data[:m.start()] + target + data[m.end():]
-
-    # fix StemSnapH. Remove StemSnapH if fdDict.StemSnapH
-    # is not defined, else set it.
-    m = re.search(r"/StemSnapH\s+\[.+?\]\s+def", data)
-    if fdDict.DominantH:
-        target = "/StemSnapH %s def" % fdDict.DominantH
-        data = data[:m.start()] + target + data[m.end():]
-        insertIndex = m.start() + len(target)
-    else:
+    for key in ["FamilyBlues", "FamilyOtherBlues"]:
+        if key in privateDict.rawDict:
+            continue
+        m = re.search(r"\n%s\s+\{([^}]*)\}" % key, data)
         if m:
-            data = data[:m.start()] + data[m.end():]
+            privateDict.rawDict[key] = parseNumberList(
+                m.group(1).replace(",", " "))
 
-    # fix StemSnapV.  Remove StemSnapV entry if fdDict.StemSnapV
-    # is not defined, else set it.
-    m = re.search(r"/StemSnapV\s+\[.+?\]\s+def", data)
-    if fdDict.DominantV:
-        target = "/StemSnapV %s def" % fdDict.DominantV
-        data = data[:m.start()] + target + data[m.end():]
-        insertIndex = m.start() + len(target)
-    else:
-        if m:
-            data = data[:m.start()] + data[m.end():]
 
-    # LanguageGroup. Remove LanguageGroup entry if
-    # fdDict.LanguageGroup is not defined, else set it.
-    if fdDict.LanguageGroup:
-        m = re.search(r"/LanguageGroup\s+\d+\s+def", data)
-        if not m:
-            target = "%s/LanguageGroup %s def" % (newLine,
-                                                  fdDict.LanguageGroup)
-            data = data[:insertIndex] + data[insertIndex] + target + \
-                data[insertIndex:]
-        else:
-            target = "/LanguageGroup %s def" % fdDict.LanguageGroup
-            data = data[:m.start()] + target + data[m.end():]
-    else:
-        m = re.search(r"/LanguageGroup\s+\d+\s+def", data)
-        if m:
-            data = data[:m.start()] + data[m.end():]
+def getCFFGlyphList(fPath, topDict):
+    """
+    Returns the list of glyph names in GID order, the way getGlyphList()
+    does for the original font.
+    """
+    if hasattr(topDict, "ROS"):
+        raise FontParseError("Error: The font file %s is already "
+                             "CID-keyed." % fPath)
+    nameList = list(topDict.charset)
+    if '.notdef' not in nameList:
+        raise FontParseError("Error: The font file %s does not have a "
+                             "'.notdef'." % fPath)
+    elif nameList[0] != '.notdef':
+        raise FontParseError("Error: '.notdef' is not the first glyph of "
+                             "font file %s" % fPath)
+    return nameList
 
-    # Fix BlueValues. Must be present.
-    if fdDict.BlueValues:
-        m = re.search(r"/BlueValues\s+\[.+?\]\s+def", data)
-        if not m:
-            raise FontParseError("Failed to find BlueValues in input font! "
-                                 "%s" % tempPath)
-        target = "/BlueValues %s def" % fdDict.BlueValues
-        data = data[:m.start()] + target + data[m.end():]
-        insertIndex = m.start() + len(target)
-
-    # Fix OtherBlues, if present. Remove if there are no OtherBlues entry.
-    m = re.search(r"/OtherBlues\s+\[.+?\]\s+def", data)
-    if fdDict.OtherBlues:
-        if not m:
-            target = "%s/OtherBlues %s def" % (newLine, fdDict.OtherBlues)
-            data = data[:insertIndex] + target + data[insertIndex:]
+
+def getCFFFontBBox(topDict):
+    """
+    Returns the union of the glyph bounds, rounded out to integers,
+    as reported by getFontBBox().
+    """
+    charStrings = topDict.CharStrings
+    fontBBox = None
+    for glyphName in topDict.charset:
+        bounds = charStrings[glyphName].calcBounds(charStrings)
+        if not bounds or not any(bounds):
+            continue
+        if fontBBox is None:
+            fontBBox = bounds
         else:
-            target = "/OtherBlues %s def" % fdDict.OtherBlues
-            data = data[:m.start()] + target + data[m.end():]
-    else:
-        if m:
-            data = data[:m.start()] + data[m.end():]
-
-    with open(txtPath, "w") as fp:
-        fp.write(data)
-
-    command = "type1 \"%s\" \"%s\" 2>&1" % (txtPath, tempPath)
-    log = fdkutils.runShellCmd(command)
-    if log:
-        print(log)
-
-
-def makeTempFonts(fontDictList, glyphSetList, fdGlyphDict, inputPath):
-    fontList = []
-    for glyphList in glyphSetList:
-        arg = ",".join(glyphList)
-        tempPath = fdkutils.get_temp_file_path()
-        command = "tx -t1 -g \"%s\" \"%s\" \"%s\" 2>&1" % (
-            arg, inputPath, tempPath)
-        log = fdkutils.runShellCmd(command)
-        if log:
-            print("Have log output in subsetting command for %s to %s with "
-                  "%s glyphs." % (inputPath, tempPath, len(glyphList)))
-            print(log)
+            fontBBox = unionRect(fontBBox, bounds)
+    if fontBBox is None:
+        return [0, 0, 0, 0]
+    # The glyph bounds are computed in double precision here, and in single
+    # precision by tx; round away the difference before rounding out.
+    fontBBox = [round(val, kBBoxPrecision) for val in fontBBox]
+    return [int(math.floor(fontBBox[0])), int(math.floor(fontBBox[1])),
+            int(math.ceil(fontBBox[2])), int(math.ceil(fontBBox[3]))]
 
-        try:
-            fdIndex = fdGlyphDict[glyphList[0]][0]
-        except KeyError:
-            # 'fontinfo' file was not provided;
-            # assign list of glyphs to default FDDict
-            fdIndex = 0
 
-        fdDict = fontDictList[fdIndex]
-        fixFontDict(tempPath, fdDict)
-        fontList.append(tempPath)
+def getCFFBlueFuzz(privateDict):
+    """
+    Returns the BlueFuzz value, the way getBlueFuzz() does.
+    """
+    if "BlueFuzz" in privateDict.rawDict:
+        return int(privateDict.BlueFuzz)
+    return 1.0
 
-    return fontList
 
+def parseNumberList(value):
+    """
+    Converts a fontinfo array value such as '[-12 0 486 498]' to a list
+    of numbers.
+    """
+    numberList = []
+    for token in value.strip("[]{} ").split():
+        number = float(token)
+        if number.is_integer():
+            number = int(number)
+        numberList.append(number)
+    return numberList
 
-def makeCIDFontInfo(fontPath, cidfontinfoPath):
-    cfiDict = {}
-    for key in kCIDFontInfokeyList:
-        cfiDict[key] = None
-    cfiDict["Weight"] = "(Regular)"
-    cfiDict["AdobeCopyright"] = "0"
 
-    # get regular FontDict.
-    command = "tx -0 \"%s\" 2>&1" % fontPath
-    report = fdkutils.runShellCmd(command)
-    if ("fatal" in report) or ("error" in report):
-        print(report)
-        raise FontInfoParseError("Failed to dump font dict using tx from "
-                                 "font '%s'" % fontPath)
-
-    for entry in TX_FIELDS:
-        match = re.search(entry[0] + "\s+(.+?)[\r\n]", report)
-        if match:
-            entry[2] = match.group(1)
-
-    cfiDict["Registry"] = "Adobe"
-    cfiDict["Ordering"] = "Identity"
-    cfiDict["Supplement"] = "0"
-
-    for entry in TX_FIELDS:
-        if entry[2]:
-            cfiDict[entry[1]] = entry[2]
-        elif entry[1] in kRequiredCIDFontInfoFields:
-            print("Error: did not find required info '%s' in tx dump of "
-                  "font '%s'." % (entry[1], fontPath))
-    try:
-        with open(cidfontinfoPath, "w") as fp:
-            for key in kCIDFontInfokeyList:
-                value = cfiDict[key]
-                if value is None:
-                    continue
-                if value[0] == "\"":
-                    value = "(" + value[1:-1] + ")"
-                string = tounicode("%s\t%s\n" % (key, value))
-                fp.write(string)
-    except (IOError, OSError):
-        raise FontInfoParseError(
-            "Error. Could not open and write file '%s'" % cidfontinfoPath)
+def getCIDFontInfoValue(value):
+    """
+    Returns a top dict string value as 'mergefonts' used to read it from
+    the 'cidfontinfo' file: at most kMaxCIDFontInfoValueLen characters,
+    with leading '(' and trailing ')' characters removed.
+    """
+    value = ("(%s)" % value)[:kMaxCIDFontInfoValueLen]
+    if len(value) == 1:
+        return value
+    value = value.lstrip(" \t(\r\n").rstrip(" \t)\r\n")
+    if not value:
+        value = " "
+    return value
 
 
-def makeGAFile(gaPath, fontPath, glyphList, fontDictList, fdGlyphDict,
-               removeNotdef):
+def getCIDFontVersion(version):
     """
-    Creates a glyph alias file for each FDDict.
-    These files will be used by 'mergefonts' tool.
-    For documentation on the format of this file, run 'mergefonts -h'.
+    Returns the leading number of the version string, as 'atof' parses it.
     """
-    glyph_list = getGlyphList(fontPath, removeNotdef)
-
-    try:
-        fdIndex = fdGlyphDict[glyph_list[0]][0]  # [fdIndex value, gi]
-    except KeyError:
-        fdIndex = 0
+    m = re.match(r"\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)",
+                 getCIDFontInfoValue(version))
+    if m:
+        return float(m.group(1))
+    return 0.0
 
-    fdDict = fontDictList[fdIndex]
-    lineList = [""]
 
-    lang_group = fdDict.LanguageGroup
-    if lang_group is None:
-        langGroup = " 0"
-    else:
-        langGroup = " %s" % lang_group
+def makeCIDTopDict(fPath, topDict, glyphList):
+    """
+    Returns a CID-keyed top dict, made from the top dict of the
+    name-keyed font.
+    """
+    cidTopDict = TopDict(GlobalSubrs=topDict.GlobalSubrs)
+    for key in topDict.order:
+        if key in kNameKeyedTopDictKeys:
+            continue
+        if key in topDict.rawDict:
+            setattr(cidTopDict, key, getattr(topDict, key))
+
+    for key in ["FullName", "FamilyName"]:
+        if key in topDict.rawDict:
+            setattr(cidTopDict, key,
+                    getCIDFontInfoValue(getattr(topDict, key)))
+    cidTopDict.Weight = getCIDFontInfoValue(
+        getattr(topDict, "Weight", "Regular"))
+    # Notice is replaced by the Copyright, if there is one.
+    notice = "0"
+    for key in ["Notice", "Copyright"]:
+        if key in topDict.rawDict:
+            notice = getattr(topDict, key)
+    cidTopDict.Notice = getCIDFontInfoValue(notice)
+
+    version = getattr(topDict, "version", "")
+    cidFontVersion = getCIDFontVersion(version)
+    if cidFontVersion == 0.0:
+        raise FontInfoParseError("Error: The version value '%s' of font "
+                                 "'%s' could not be parsed as a fractional "
+                                 "number." % (version, fPath))
+    cidTopDict.ROS = ("Adobe", "Identity", 0)
+    cidTopDict.CIDFontVersion = cidFontVersion
+    cidTopDict.CIDCount = len(glyphList)
+    return cidTopDict
+
+
+def fixStdStem(fdPrivate, stdKey, stemSnapKey):
+    """
+    Applies the same StdHW/StdVW fixes that 'tx' does when it writes a
+    font: the Std value must be one of the StemSnap values, and a StemSnap
+    array holding only the Std value is dropped. This keeps the FD dicts
+    the same whichever format the CID-keyed font is saved in.
+    """
+    stemSnap = getattr(fdPrivate, stemSnapKey, None)
+    if not stemSnap:
+        return
+    if getattr(fdPrivate, stdKey, None) not in stemSnap:
+        setattr(fdPrivate, stdKey, stemSnap[0])
+    if len(stemSnap) == 1:
+        delattr(fdPrivate, stemSnapKey)
 
-    dictName = "%s_%s" % (fdDict.FontName, fdDict.DictName)
 
-    for glyph_name in glyph_list:
-        gid = glyphList.index(glyph_name)
-        lineList.append("%s\t%s" % (gid, glyph_name))
+def makeFontDict(privateDict, fdDict):
+    """
+    Returns an FDArray font dict for the FDDict, with a copy of the
+    original font's private dict, fixed to use the FDDict values.
+    """
+    fontDict = FontDict()
+    # 'mergefonts' reads the font dict name up to the first white space.
+    fontDict.FontName = ("%s_%s" % (fdDict.FontName,
+                                    fdDict.DictName)).split()[0]
+    # fix em square
+    if fdDict.OrigEmSqUnits:
+        a = 1.0 / float(fdDict.OrigEmSqUnits)
+        fontDict.FontMatrix = [a, 0, 0, a, 0, 0]
 
-    lineList.append("")
-    gaText = "mergefonts %s%s%s" % (dictName, langGroup, '\n'.join(lineList))
+    fdPrivate = PrivateDict()
+    for key in privateDict.order:
+        if key in kFDDictPrivateKeys:
+            continue
+        if key in privateDict.rawDict:
+            setattr(fdPrivate, key, getattr(privateDict, key))
 
-    with open(gaPath, "wb") as gf:
-        gf.write(tobytes(gaText))
+    # StemSnapH, StemSnapV, LanguageGroup and OtherBlues are removed
+    # if the FDDict does not define them. BlueValues are always present.
+    if fdDict.DominantH:
+        fdPrivate.StemSnapH = parseNumberList(fdDict.DominantH)
+    if fdDict.DominantV:
+        fdPrivate.StemSnapV = parseNumberList(fdDict.DominantV)
+    fixStdStem(fdPrivate, "StdHW", "StemSnapH")
+    fixStdStem(fdPrivate, "StdVW", "StemSnapV")
+    if fdDict.LanguageGroup:
+        fdPrivate.LanguageGroup = int(fdDict.LanguageGroup)
+    if fdDict.BlueValues:
+        fdPrivate.BlueValues = parseNumberList(fdDict.BlueValues)
+    elif "BlueValues" not in privateDict.rawDict:
+        # BlueValues are required in a Type 1 font dict, so fonts without
+        # them always got an empty zone when converted through Type 1.
+        fdPrivate.BlueValues = [0, 0]
+    if fdDict.OtherBlues:
+        fdPrivate.OtherBlues = parseNumberList(fdDict.OtherBlues)
+    fontDict.Private = fdPrivate
+    return fontDict
 
 
-def merge_fonts(inputFontPath, outputPath, fontList, glyphList, fontDictList,
+def makeCIDFont(fPath, cffFontSet, glyphSetList, fontDictList,
                 fdGlyphDict):
-    cidfontinfoPath = fdkutils.get_temp_file_path()
-    makeCIDFontInfo(inputFontPath, cidfontinfoPath)
-    lastFont = ""
-    dstPath = ''
-
-    for i, fontPath in enumerate(fontList):
-        gaPath = fdkutils.get_temp_file_path()
-        dstPath = fdkutils.get_temp_file_path()
-        removeNotdef = i != 0
-        makeGAFile(gaPath, fontPath, glyphList, fontDictList, fdGlyphDict,
-                   removeNotdef)
-        if lastFont:
-            command = 'mergefonts -std -cid "%s" "%s" "%s" "%s" "%s" 2>&1' % (
-                cidfontinfoPath, dstPath, lastFont, gaPath, fontPath)
+    """
+    Converts the name-keyed font in cffFontSet to a CID-keyed font with
+    one FDArray font dict per glyph set. The CID of each glyph is its
+    original GID.
+    """
+    topDict = cffFontSet.topDictIndex[0]
+    glyphList = topDict.charset
+    gidDict = dict((glyphName, gid) for gid, glyphName in
+                   enumerate(glyphList))
+
+    fdArray = FDArrayIndex()
+    fdSelect = FDSelect()
+    fdSelect.gidArray = [0] * len(glyphList)
+    for glyphSet in glyphSetList:
+        if not glyphSet:
+            continue
+        try:
+            fdIndex = fdGlyphDict[glyphSet[0]][0]
+        except KeyError:
+            # 'fontinfo' file was not provided;
+            # assign list of glyphs to default FDDict
+            fdIndex = 0
+        for glyphName in glyphSet:
+            fdSelect[gidDict[glyphName]] = len(fdArray)
+        fdArray.append(makeFontDict(topDict.Private, fontDictList[fdIndex]))
+
+    cidTopDict = makeCIDTopDict(fPath, topDict, glyphList)
+    charStrings = CharStrings(None, None, cffFontSet.GlobalSubrs, None,
+                              fdSelect, fdArray)
+    charset = []
+    for gid, glyphName in enumerate(glyphList):
+        if gid == 0:
+            cidName = glyphName
         else:
-            command = 'mergefonts -std -cid "%s" "%s" "%s" "%s" 2>&1' % (
-                cidfontinfoPath, dstPath, gaPath, fontPath)
-        log = fdkutils.runShellCmd(command)
-        if "rror" in log:
-            raise FontInfoParseError(
-                "Error running command '%s'\nLog: %s" % (command, log))
-
-        lastFont = dstPath
-
-    if os.path.exists(outputPath):
-        os.remove(outputPath)
-        os.rename(dstPath, outputPath)
+            cidName = "cid%05d" % gid
+        charset.append(cidName)
+        charStrings[cidName] = topDict.CharStrings[glyphName]
+    cidTopDict.charset = charset
+    cidTopDict.CharStrings = charStrings
+    cidTopDict.FDArray = fdArray
+    cidTopDict.FDSelect = fdSelect
+    cffFontSet.topDictIndex[0] = cidTopDict
 
 
 def convertFontToCID(inputPath, outputPath, fontinfoPath=None):
@@ -1045,10 +1080,12 @@ def convertFontToCID(inputPath, outputPath, fontinfoPath=None):
     else:
         fontInfoData = ''
 
-    glyphList = getGlyphList(inputPath, False, True)
-    fontBBox = getFontBBox(inputPath)
-    fontName = getFontName(inputPath)
-    blueFuzz = getBlueFuzz(inputPath)
+    cffFontSet, ttFont = readCFFFontSet(inputPath)
+    topDict = cffFontSet.topDictIndex[0]
+    glyphList = getCFFGlyphList(inputPath, topDict)
+    fontBBox = getCFFFontBBox(topDict)
+    fontName = cffFontSet.fontNames[0]
+    blueFuzz = getCFFBlueFuzz(topDict.Private)
     maxY = fontBBox[3]
     minY = fontBBox[1]
 
@@ -1060,17 +1097,17 @@ def convertFontToCID(inputPath, outputPath, fontinfoPath=None):
 
     glyphSetList = makeSortedGlyphLists(glyphList, fdGlyphDict)
 
-    fontList = makeTempFonts(fontDictList, glyphSetList, fdGlyphDict,
-                             inputPath)
-
-    merge_fonts(inputPath, outputPath, fontList, glyphList, fontDictList,
+    makeCIDFont(inputPath, cffFontSet, glyphSetList, fontDictList,
                 fdGlyphDict)
 
+    with open(outputPath, "wb") as fp:
+        cffFontSet.compile(fp, ttFont)
+
 
 def mergeFontToCFF(srcPath, outputPath, doSubr):
     """
     Used by makeotf.
-    Assumes srcPath is a type 1 font,and outputPath is an OTF font.
+    Assumes srcPath is a CFF or type 1 font, and outputPath is an OTF font.
     """
     # First, convert src font to cff, and subroutinize it if so requested.
     tempPath = fdkutils.get_temp_file_path()
@@ -1108,8 +1145,14 @@ def main():
 
         save_path = '{}{}'.format(os.path.splitext(inputPath)[0], '-CID.ps')
 
-        if os.path.isfile(outputPath):
-            os.rename(outputPath, save_path)
+        # The '-CID.ps' file is a CID Type 1 font.
+        command = "tx -t1 \"%s\" \"%s\" 2>&1" % (outputPath, save_path)
+        report = fdkutils.runShellCmd(command)
+        os.remove(outputPath)
+        if ("fatal" in report) or ("error" in report):
+            print(report)
+            raise FontParseError("Error: Failed running 'tx -t1' on file "
+                                 "%s" % outputPath)
     else:
         print('ERROR: Missing path to font to convert.')
 
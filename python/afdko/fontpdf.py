@@ -24,6 +24,9 @@ right, with the positive Y axis pointing down.
 
 from __future__ import print_function, absolute_import
 
+import copy
+import multiprocessing
+from collections import OrderedDict
 import os
 import re
 import time
@@ -63,6 +66,12 @@ the command-line tools, the values be enclosed in quotes, such as:
 "(1.0, 0, 0)"
 
 --openPDFWhenDone  1  # 0 or 1. Whether to open the PDF file after it is written.
+--streamPDF  0  # 0 or 1. Whether to write each page to the PDF file as soon as
+                 it is drawn, so that memory use does not grow with the
+                 number of pages. The objects are ordered differently in the
+                 file.
+--binaryPDF  0  # 0 or 1. Whether to write the compressed page data as binary
+                 rather than as ASCII85 text.
 
 
 # Page attributes
@@ -280,6 +289,7 @@ kShowMetaTag = "drawMeta_"
 kDrawTag = "drawGlyph_"
 kDrawPointTag = "drawPoint_"
 kGlyphSquare = 1000
+kGlyphCacheSize = 1024 # max number of glyphs whose outline data is kept by a FontPDFFont.
 kLineWidth = 0.55
 class FontPDFParams:
 	def __init__(self):
@@ -303,6 +313,7 @@ class FontPDFParams:
 		self.rt_optionLayoutDict = None # Dictionary representing a layout file for a CID font. If present, use the specified CID order, and
 										# show the hint dir and row font dir names for each glyph.
 		self.rt_hintTableList  = [] # List of hint replacement block inidicies. Plot only these hints. Set only by  arguments to program.
+		self.rt_numJobs = 1 # Number of worker processes used to draw the pages of a proof. Set only by  arguments to program.
 		self.rt_maxHintLabelWidth = None
 		self.rt_glyphHPadding = None # Extra space around glyph; the padding that is used in drawing. When showing hints, this is larger than the original parameter value.
 		self.rt_glyphVPadding = None # Extra space around glyph
@@ -316,6 +327,8 @@ class FontPDFParams:
 		self.userPtSize = None	# alternate way to set glyphs per page. If not None, then glyphsPerPage s calculated this way.
 		self.userBaseLine = None	# Override the default base-line which is deriived from the font.
 		self.openPDFWhenDone = 1 # Try and open the resulting PDF file with whatever app is used to open pdf's.
+		self.streamPDF = 0 # Write each page to the PDF file as soon as it is drawn, rather than holding all pages until the file is saved.
+		self.binaryPDF = 0 # Write the compressed page data as binary rather than as ASCII85 text.
 
 		self.descenderSpace = None # The amout of space allowed for descenders. By default is  Font BBox.ymin, but can be set by parameter.
 		self.pageTitleFont = 'Times-Bold'  # Font used for page titles.
@@ -442,6 +455,7 @@ class FontPDFFont:
 		self.ascent = None
 		self.descent = None
 		self.blueZones = None
+		self.glyphCache = None
 		self.getEmSquare()
 		self.getBaseLine()
 		self.getBBox()
@@ -460,8 +474,25 @@ class FontPDFFont:
 		return self.OTVersion
 
 	def getGlyph(self, glyphName):
+		# The glyph object picks up its outline data from the glyph cache,
+		# when present, rather than decompiling the glyph again.
 		return self.clientGetGlyph(glyphName)
 
+	def getCachedGlyphData(self, glyphName):
+		if not self.glyphCache:
+			return None
+		glyphData = self.glyphCache.pop(glyphName, None)
+		if glyphData is not None:
+			self.glyphCache[glyphName] = glyphData # move to most recently used.
+		return glyphData
+
+	def cacheGlyphData(self, glyphName, glyphData):
+		if self.glyphCache is None:
+			self.glyphCache = OrderedDict()
+		self.glyphCache[glyphName] = glyphData
+		if len(self.glyphCache) > kGlyphCacheSize:
+			self.glyphCache.popitem(last=False)
+
 	def getEmSquare(self):
 		if not self.emSquare:
 			self.emSquare = self.clientGetEmSquare()
@@ -547,6 +578,20 @@ class FontPDFPoint:
 			text += " pt1: %s" % (self.bcp2,)
 		return text
 
+def linkPathPoints(pathList):
+	# Set the next and last links of the points in each path.
+	for path in pathList:
+		lenPath = len(path)
+		path[-1].next = path[0]
+		path[0].last = path[-1]
+		if lenPath > 1:
+			path[0].next = path[1]
+			path[-1].last = path[-2]
+			for i in range(1, lenPath - 1):
+				pt = path[i]
+				pt.next = path[i+1]
+				pt.last = path[i-1]
+
 def makeVector(pt1, pt2):
 	# return the normalized vector [dx, dy]
 	dx = pt2[0] - pt1[0]
@@ -586,13 +631,37 @@ class FontPDFGlyph:
 		self.yOrigin = 0
 		self.isTT = 0 # used to determine path direction
 		self.isCID = 0 # used to determine if the font is CID-keyed
-		self.clientInitData()
+		glyphData = parentFont.getCachedGlyphData(glyphName)
+		if glyphData is None:
+			self.clientInitData()
+			parentFont.cacheGlyphData(glyphName, self.getGlyphData())
+		else:
+			self.setGlyphData(glyphData)
 		self.extraY = None # height needed to accomodate the meta data block.
 
 	def clientInitData(self):
 		# must override to fill in all the data items that are defined in the init function.
 		raise NotImplementedError
 
+	# Glyph data items, other than the path list, that are set by clientInitData().
+	glyphDataKeys = ["numMT", "numLT", "numCT", "numPaths", "hintTable", "vhints", "hhints", "BBox",
+				"xAdvance", "yAdvance", "yOrigin", "tsb", "fdIndex", "isTT", "isCID"]
+
+	def getGlyphData(self):
+		# Return the data set by clientInitData() in compact form, for the parent font's glyph cache.
+		# The points are stored as tuples, as FontPDFPoint objects are much bigger.
+		pathData = tuple(tuple((pt.type, pt.pt0, pt.bcp1, pt.bcp2, pt.index) for pt in path) for path in self.pathList)
+		return (pathData, tuple(getattr(self, key, None) for key in self.glyphDataKeys))
+
+	def setGlyphData(self, glyphData):
+		# The cached data items are shared by all glyph objects built from the cache, and must not be modified.
+		pathData, values = glyphData
+		for key, value in zip(self.glyphDataKeys, values):
+			if value is not None:
+				setattr(self, key, value)
+		self.pathList = [[FontPDFPoint(*ptData) for ptData in path] for path in pathData]
+		linkPathPoints(self.pathList)
+
 
 	def draw(self, params, repeat):
 		rt_canvas = params.rt_canvas
@@ -1630,7 +1699,9 @@ def makePDF(pdfFont, params, doProgressBar=True):
 		pdfPath = params.rt_pdfFileName
 	else:
 		pdfPath = "{}.pdf".format(os.path.splitext(fontPath)[0])
-	params.rt_canvas = rt_canvas = pdfgen.Canvas(pdfPath, pagesize=params.pageSize, bottomup = 1)
+	params.rt_canvas = rt_canvas = pdfgen.Canvas(pdfPath, pagesize=params.pageSize, bottomup = 1, streaming = params.streamPDF)
+	if params.binaryPDF:
+		rt_canvas.setPageCompression(2)
 
 	if params.waterfallRange:
 		makeWaterfallPDF(params, pdfFont, doProgressBar)
@@ -1994,7 +2065,9 @@ def makeFontSetPDF(pdfFontList, params, doProgressBar=True):
 		firstPDFFont = pdfFontList[0][1]
 		fontPath = params.rt_filePath
 		pdfPath = "{}.fontset.pdf".format(os.path.splitext(fontPath)[0])
-	params.rt_canvas = rt_canvas = pdfgen.Canvas(pdfPath, pagesize=params.pageSize, bottomup = 1)
+	params.rt_canvas = rt_canvas = pdfgen.Canvas(pdfPath, pagesize=params.pageSize, bottomup = 1, streaming = params.streamPDF)
+	if params.binaryPDF:
+		rt_canvas.setPageCompression(2)
 
 	# figure out how much space to leave at start of line for PS names and fond index fields.
 	psNameSize = params.fontsetGroupPtSize
@@ -2203,9 +2276,6 @@ def makeProofPDF(pdfFont, params, doProgressBar=True):
 		numOnPage = numAcross * numDown
 	else:
 		numOnPage = params.glyphsPerPage
-	cur_x = params.pageLeftMargin + leftPadding
-	cur_y = yTop - (topPadding + yAdvance)
-
 	giRange = list(range(numGlyphs))
 	if params.doAlphabeticOrder:
 		params.rt_glyphList.sort()
@@ -2220,19 +2290,59 @@ def makeProofPDF(pdfFont, params, doProgressBar=True):
 			except KeyError:
 				dictList.append(["zUndefined", "zUndefined", name])
 		dictList.sort()
-		params.rt_glyphList = map(lambda entry: entry[-1], dictList)
+		params.rt_glyphList = [entry[-1] for entry in dictList]
 
-	doTitle(rt_canvas, pdfFont, params, numGlyphs)
+	if not params.rt_repeatParamList:
+		params.rt_repeatParamList = [params]*params.rt_repeats
+	pageList = getProofPageList(params, numGlyphs, numAcross, numDown, numOnPage, xAdvance, yAdvance, leftPadding, topPadding, yTop)
+	tileInfo = (extraY, scale, xAdvance, numGlyphs)
 
 	if doProgressBar:
 		progressBarInstance = ProgressBar(numGlyphs, "Proofing font...", )
 		progressBarInstance.StartProgress()
 
+	numJobs = min(params.rt_numJobs, len(pageList))
+	clientFontSource = getClientFontSource(pdfFont)
+	if numJobs > 1 and clientFontSource:
+		# Draw the pages in worker processes, and add them in order.
+		pool = multiprocessing.Pool(numJobs, initProofWorker, (clientFontSource, pdfFont.__class__, getWorkerParams(params), tileInfo))
+		try:
+			pageNumber = rt_canvas.getPageNumber()
+			for pageCodeList, gis in pool.imap(drawProofPageShard, getProofPageShards(pageList, pageNumber, numJobs)):
+				for pageCode in pageCodeList:
+					rt_canvas.showPageCode(pageCode)
+				if doProgressBar:
+					for gi in gis:
+						progressBarInstance.DoProgress(gi)
+		finally:
+			pool.terminate()
+			pool.join()
+	else:
+		for pi, tileList in enumerate(pageList):
+			if pi:
+				rt_canvas.showPage()
+			drawProofPage(rt_canvas, pdfFont, params, tileList, tileInfo)
+			if doProgressBar:
+				for gi, cur_x, cur_y in tileList:
+					progressBarInstance.DoProgress(gi)
+		rt_canvas.showPage()
+
+	if doProgressBar:
+		progressBarInstance.EndProgress()
+	rt_canvas.save()
+
+
+def getProofPageList(params, numGlyphs, numAcross, numDown, numOnPage, xAdvance, yAdvance, leftPadding, topPadding, yTop):
+	""" Returns a list of pages for makeProofPDF(). Each page is a list of
+	(glyph index, x, y) entries, one for each glyph tile on the page. There
+	is always at least one page.
+	"""
+	pageList = [[]]
+	cur_x = params.pageLeftMargin + leftPadding
+	cur_y = yTop - (topPadding + yAdvance)
 	rowIndex = 0
 	colIndex = 0
-	for gi in giRange:
-		if doProgressBar:
-			progressBarInstance.DoProgress(gi)
+	for gi in range(numGlyphs):
 		if  rowIndex >= numAcross:
 			rowIndex = 0
 			colIndex += 1
@@ -2241,16 +2351,24 @@ def makeProofPDF(pdfFont, params, doProgressBar=True):
 		if  (colIndex >= numDown) or (gi and ((gi % numOnPage) == 0) ):
 			rowIndex = 0
 			colIndex = 0
-			rt_canvas.showPage()
-			yTop = doTitle(rt_canvas, pdfFont, params, numGlyphs)
+			pageList.append([])
+			# doTitle() returns the same y as getTitleHeight().
+			yTop = getTitleHeight(params)
 			cur_x = params.pageLeftMargin + leftPadding
 			cur_y = yTop - (topPadding + yAdvance)
 		rowIndex += 1
+		pageList[-1].append((gi, cur_x, cur_y))
+		for ri in range(params.rt_repeats):
+			cur_x += xAdvance
+	return pageList
+
 
+def drawProofPage(rt_canvas, pdfFont, params, tileList, tileInfo):
+	extraY, scale, xAdvance, numGlyphs = tileInfo
+	doTitle(rt_canvas, pdfFont, params, numGlyphs)
+	for gi, cur_x, cur_y in tileList:
 		pdfGlyph = pdfFont.getGlyph(params.rt_glyphList[gi])
 		pdfGlyph.extraY = extraY
-		if not params.rt_repeatParamList:
-			params.rt_repeatParamList = [params]*params.rt_repeats
 
 		for ri in list(range(params.rt_repeats)):
 			curParams = params.rt_repeatParamList[ri]
@@ -2267,10 +2385,84 @@ def makeProofPDF(pdfFont, params, doProgressBar=True):
 			rt_canvas.restoreState()
 			cur_x += xAdvance
 
-	if doProgressBar:
-		progressBarInstance.EndProgress()
-	rt_canvas.showPage()
-	rt_canvas.save()
+
+def getClientFontSource(pdfFont):
+	""" Returns what a worker process needs to open the font again: the
+	path of the font file, and whether it holds only CFF data. Returns None
+	if the font was not read from a file.
+	"""
+	reader = pdfFont.clientFont.reader
+	if reader is not None:
+		path = getattr(reader.file, "name", None)
+		if path and os.path.isfile(path):
+			return path, False
+		return None
+	# proofpdf builds an OTF font around the data of a CFF file.
+	if 'CFF ' in pdfFont.clientFont and os.path.isfile(pdfFont.path):
+		return pdfFont.path, True
+	return None
+
+
+def openClientFont(clientFontSource):
+	from fontTools.ttLib import TTFont, getTableModule
+
+	path, isCFF = clientFontSource
+	if not isCFF:
+		return TTFont(path)
+	with open(path, "rb") as ff:
+		data = ff.read()
+	ttFont = TTFont()
+	cffTable = getTableModule('CFF ').table_C_F_F_('CFF ')
+	ttFont['CFF '] = cffTable
+	cffTable.decompile(data, ttFont)
+	return ttFont
+
+
+def getWorkerParams(params):
+	# Returns a copy of params that can be sent to a worker process.
+	workerParams = copy.copy(params)
+	workerParams.rt_canvas = None
+	repeatParamList = []
+	for curParams in params.rt_repeatParamList:
+		if curParams is params:
+			repeatParamList.append(workerParams)
+		else:
+			curParams = copy.copy(curParams)
+			curParams.rt_canvas = None
+			repeatParamList.append(curParams)
+	workerParams.rt_repeatParamList = repeatParamList
+	return workerParams
+
+
+def getProofPageShards(pageList, pageNumber, numJobs):
+	# Splits the pages into runs of consecutive pages, a few per worker.
+	shardSize = max(1, len(pageList) // (numJobs * 4))
+	for i in range(0, len(pageList), shardSize):
+		yield pageNumber + i, pageList[i:i + shardSize]
+
+
+def initProofWorker(clientFontSource, pdfFontClass, params, tileInfo):
+	global gProofWorker
+	pdfFont = pdfFontClass(openClientFont(clientFontSource), params)
+	pdfFont.path = clientFontSource[0] if clientFontSource[1] else params.rt_filePath
+	params.rt_canvas = pdfgen.Canvas(None, pagesize=params.pageSize, bottomup = 1)
+	gProofWorker = (pdfFont, params, tileInfo)
+
+
+def drawProofPageShard(pageShard):
+	# Runs in a proof worker process. Returns the marking operators of each
+	# page in the shard, and the indices of the glyphs drawn.
+	pdfFont, params, tileInfo = gProofWorker
+	pageNumber, pageList = pageShard
+	rt_canvas = params.rt_canvas
+	rt_canvas.setPageNumber(pageNumber)
+	pageCodeList = []
+	gis = []
+	for tileList in pageList:
+		drawProofPage(rt_canvas, pdfFont, params, tileList, tileInfo)
+		pageCodeList.append(rt_canvas.endPageCode())
+		gis.extend([tile[0] for tile in tileList])
+	return pageCodeList, gis
 
 
 def makeKernPairPDF(pdfFont, kernOverlapList, params, doProgressBar=True):
@@ -2294,7 +2486,9 @@ def makeKernPairPDF(pdfFont, kernOverlapList, params, doProgressBar=True):
 		fontPath = params.rt_filePath
 		pdfPath = os.path.splitext(fontPath)[0] + ".kc.pdf"
 
-	params.rt_canvas = rt_canvas = pdfgen.Canvas(pdfPath, pagesize=params.pageSize, bottomup = 1)
+	params.rt_canvas = rt_canvas = pdfgen.Canvas(pdfPath, pagesize=params.pageSize, bottomup = 1, streaming = params.streamPDF)
+	if params.binaryPDF:
+		rt_canvas.setPageCompression(2)
 
 	# figure out how much space to leave at start of line for PS names and fond index fields..
 	maxLen = 0
@@ -3,11 +3,18 @@
 from __future__ import print_function, absolute_import
 from decimal import Decimal
 import functools
+import hashlib
+import json
+import multiprocessing
 import os
 import re
+import subprocess
 import sys
+import time
+from multiprocessing.pool import ThreadPool
 
 from fontTools.ttLib import TTFont, TTLibError
+from fontTools.ttLib.tables.DefaultTable import DefaultTable
 from fontTools.misc.py23 import open, tounicode, tobytes
 
 from afdko import convertfonttocid, fdkutils, ufotools
@@ -257,6 +264,17 @@ table,
 -v                      Print the tool's version.
 -showFinal              In error messages, show glyph final name rather
                 than source name.
+-family <dir> [<dir> ...]   Build each of the fonts in the listed
+                directories, using the default input files found in
+                each directory. All other options are applied to every
+                font. The FontMenuNameDB and GlyphOrderAndAliasDB files
+                are looked up once for the family.
+-jobs <N>               With -family, build up to N fonts at a time.
+                Default is the number of CPUs.
+-cache <dir>            With -family, keep a record of each font's last
+                successful build in the directory <dir>. A font is
+                skipped if the contents of its input files and its
+                options have not changed since then.
 
 Note that options are applied in the order in which they are
 specified: "-r -nS" will not subroutinize a font, but "-nS -r" will
@@ -2175,59 +2193,37 @@ def writeTempGOADB(srcGOADBList):
 def copyTTFGlyphTables(inputFilePath, tempOutputPath, outputPath):
     # tempOutputPath exists and is an OTF/CFF font.
     # outputPath does not yet exist, or is the same as inputFilePath.
-
-    command = "spot \"%s\"" % tempOutputPath
-    tableDump = fdkutils.runShellCmd(command)
-
-    # Get the final glyph name list.
-    tempTablePath = fdkutils.get_temp_file_path()
-    command = "tx -mtx \"%s\" 2>&1" % tempOutputPath
-    report = fdkutils.runShellCmd(command)
-    glyphList = re.findall(r"[\n\r]glyph\[\d+\]\s+{([^,]+)", report)
-
-    if os.path.exists(outputPath):
-        os.remove(outputPath)
+    # Both fonts are read once. The makeotf-generated tables are moved
+    # across as raw data, and the output font is written once.
+    ttFont = TTFont(inputFilePath)
+    otFont = TTFont(tempOutputPath)
 
     print("Fixing output font 'post' table...")
-    fixPost(glyphList, inputFilePath, outputPath)
+    fixPost(otFont.getGlyphOrder(), ttFont)
     print("Fixing output font 'head' table...")
-    fixHead(tempOutputPath, outputPath)
+    fixHead(otFont, ttFont)
     print("Fixing output font 'hhea' table...")
-    fixHhea(tempOutputPath, outputPath)
+    fixHhea(otFont, ttFont)
 
     print("Copying makeotf-generated tables from temp OTF file to output "
           "font...")
     for tableTag in ["GDEF", "GSUB", "GPOS", "cmap", "name", "OS/2", "BASE"]:
-        if tableTag not in tableDump:
+        if tableTag not in otFont:
             continue
-        command = "sfntedit -x \"%s\"=\"%s\" \"%s\" 2>&1" % (
-            tableTag, tempTablePath, tempOutputPath)
-        log = fdkutils.runShellCmd(command)
-        if not ("Done." in log):
-            print(log)
-            print("Error removing table '%s' from OTF font reference." %
-                  tableTag)
-            return
-
-        command = "sfntedit -a \"%s\"=\"%s\" \"%s\" 2>&1" % (
-            tableTag, tempTablePath, outputPath)
-        log = fdkutils.runShellCmd(command)
-        if not ("Done." in log):
-            print(log)
-            print("Error adding makeotf-made table '%s' to TrueType font." %
-                  tableTag)
-            return
-
+        table = DefaultTable(tableTag)
+        table.data = otFont.getTableData(tableTag)
+        ttFont[tableTag] = table
         print("\tcopied \"%s\"." % tableTag)
 
-    command = "sfntedit -f \"%s\" 2>&1" % outputPath
-    fdkutils.runShellCmd(command)
+    ttFont.save(outputPath)
+    ttFont.close()
+    otFont.close()
 
     print("Succeeded in merging makeotf tables with TrueType source font to "
           "final TrueType output font at '%s'." % outputPath)
 
 
-def fixPost(glyphList, inputFilePath, outputPath):
+def fixPost(glyphList, ttFont):
     """
     Replace 'post' table
     """
@@ -2238,48 +2234,39 @@ def fixPost(glyphList, inputFilePath, outputPath):
         if gname not in kStdNames:
             extraNamesList.append(gname)
 
-    font = TTFont(inputFilePath)
-    post_table = font['post']
+    post_table = ttFont['post']
     post_table.formatType = 2
     post_table.glyphOrder = glyphOrderList
     post_table.extraNames = extraNamesList
-    font.save(outputPath)
 
 
-def update_table_items(table_tag, items_list, font1_path, font2_path):
+def update_table_items(table_tag, items_list, font1, font2):
     """
     font1 will get new values from font2
     """
-    font1 = TTFont(font1_path)
-    font2 = TTFont(font2_path)
-
     font1_table = font1[table_tag]
     font2_table = font2[table_tag]
 
     for item_name in items_list:
         setattr(font1_table, item_name, getattr(font2_table, item_name))
 
-    font1.save(font1_path)
-    font1.close()
-    font2.close()
-
 
-def fixHead(tempOTFFilePath, outputPath):
+def fixHead(otFont, ttFont):
     """
-    tempOTFFilePath is an OTF/CFF font.
-    outputPath is a TTF font.
+    otFont is an OTF/CFF font.
+    ttFont is a TTF font.
     Need to update the head values. Can't just copy the entire table
     from the OTF temp font, as as some of the head table values control
     interpretation of the glyf data.
     """
     head_items = ("fontRevision", "created", "modified", "macStyle",
                   "xMin", "xMax", "yMin", "yMax")
-    update_table_items('head', head_items, outputPath, tempOTFFilePath)
+    update_table_items('head', head_items, ttFont, otFont)
 
 
-def fixHhea(tempOTFFilePath, outputPath):
+def fixHhea(otFont, ttFont):
     hhea_items = ("ascent", "descent", "lineGap")
-    update_table_items('hhea', hhea_items, outputPath, tempOTFFilePath)
+    update_table_items('hhea', hhea_items, ttFont, otFont)
 
 
 def makeRelativePath(curDir, targetPath):
@@ -2671,6 +2658,358 @@ def update_cff_font_bbox(font, path):
         font.save(path)
 
 
+kBuiltFontPattern = re.compile(
+    r"Built (?:development|release) mode font '(.+?)'")
+kFeatureIncludePattern = re.compile(r"include\s*\(\s*([^)\s]+)\s*\)")
+
+
+class FamilyMember(object):
+    def __init__(self, fontDir):
+        self.fontDir = fontDir
+        self.args = []
+        self.inputsDigest = None
+        self.statePath = None
+        self.status = None  # "built", "skipped" or "failed"
+        self.elapsed = 0
+        self.output = ""
+
+
+def parseFamilyArgs(args):
+    """
+    Splits the arguments to a '-family' build into the list of font
+    directories, the number of jobs, and the options that are passed on
+    to each font's build.
+    """
+    fontDirs = []
+    numJobs = multiprocessing.cpu_count()
+    cacheDir = None
+    buildArgs = []
+    numArgs = len(args)
+    i = 0
+    while i < numArgs:
+        arg = args[i]
+        i += 1
+        if arg in ["-family", "--family"]:
+            while i < numArgs and not args[i].startswith("-"):
+                fontDirs.append(args[i])
+                i += 1
+        elif arg in ["-jobs", "--jobs"]:
+            try:
+                numJobs = int(args[i])
+                i += 1
+            except (IndexError, ValueError):
+                print("makeotf [Error] The '%s' option must be followed by "
+                      "a number of jobs." % arg)
+                raise MakeOTFOptionsError
+        elif arg in ["-cache", "--cache"]:
+            if i >= numArgs or args[i].startswith("-"):
+                print("makeotf [Error] The '%s' option must be followed by "
+                      "a directory path." % arg)
+                raise MakeOTFOptionsError
+            cacheDir = os.path.abspath(args[i])
+            i += 1
+        else:
+            buildArgs.append(arg)
+
+    if not fontDirs:
+        print("makeotf [Error] The '-family' option must be followed by the "
+              "font directory paths.")
+        raise MakeOTFOptionsError
+    for fontDir in fontDirs:
+        if not os.path.isdir(fontDir):
+            print("makeotf [Error] Could not find the font directory '%s'." %
+                  fontDir)
+            raise MakeOTFOptionsError
+    return [os.path.abspath(fontDir) for fontDir in fontDirs], \
+        max(1, numJobs), cacheDir, buildArgs
+
+
+def lookUpFamilyFile(fontDir, fileName, existsCache):
+    """
+    Same search as lookUpDirTree(), but the results of the os.path.exists()
+    calls are shared by all the fonts in the family.
+    """
+    dirPath = fontDir
+    # The font dir, and up to 4 levels above it.
+    for _ in range(5):
+        path = os.path.normpath(os.path.join(dirPath, fileName))
+        if path not in existsCache:
+            existsCache[path] = os.path.exists(path)
+        if existsCache[path]:
+            return path
+        dirPath = os.path.join(dirPath, "..")
+    return None
+
+
+def getFeatureFiles(featurePath, includeCache):
+    """
+    Returns the feature file and all the files it includes. Each file is
+    read only once for the whole family.
+    """
+    featureFiles = []
+    toDo = [featurePath]
+    while toDo:
+        path = toDo.pop()
+        if path in featureFiles:
+            continue
+        featureFiles.append(path)
+        if path not in includeCache:
+            includes = []
+            if os.path.isfile(path):
+                with open(path, "r", encoding="utf-8",
+                          errors="replace") as fp:
+                    data = fp.read()
+                includeDir = os.path.dirname(path)
+                for includePath in kFeatureIncludePattern.findall(data):
+                    includes.append(os.path.normpath(
+                        os.path.join(includeDir, includePath)))
+            includeCache[path] = includes
+        toDo.extend(includeCache[path])
+    return featureFiles
+
+
+def getArgValues(args, option):
+    return [args[i + 1] for i in range(len(args) - 1) if args[i] == option]
+
+
+def getProjectFilePaths(projectPath):
+    """
+    Returns the input files named in a project file. As in
+    readOptionFile(), the paths are relative to the project file.
+    """
+    paths = []
+    featurePaths = []
+    fprDir = os.path.dirname(projectPath)
+    with open(projectPath, "r", encoding="utf-8", errors="replace") as fp:
+        data = fp.read()
+    for key, value in re.findall(r"[ \t]*(\S+)\s+([^\r\n]+)", data):
+        if key in kFileOptList and key != kOutputFont:
+            path = os.path.normpath(os.path.join(fprDir, value.strip()))
+            paths.append(path)
+            if key == kFeature:
+                featurePaths.append(path)
+    return paths, featurePaths
+
+
+def getFileHashes(paths, hashCache):
+    """
+    Returns a hash of the contents of each path; the files of a directory,
+    such as a UFO font, are hashed one by one. Each file is read only once
+    for the whole family.
+    """
+    hashes = []
+    for path in paths:
+        if os.path.isdir(path):
+            filePaths = []
+            for dirPath, dirNames, fileNames in os.walk(path):
+                dirNames.sort()
+                filePaths.extend(os.path.join(dirPath, fileName)
+                                 for fileName in sorted(fileNames))
+        else:
+            filePaths = [path]
+        for filePath in filePaths:
+            if filePath not in hashCache:
+                if os.path.isfile(filePath):
+                    fileHash = hashlib.sha256()
+                    with open(filePath, "rb") as fp:
+                        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+                            fileHash.update(chunk)
+                    hashCache[filePath] = fileHash.hexdigest()
+                else:
+                    hashCache[filePath] = "missing"
+            hashes.append("%s %s" % (filePath, hashCache[filePath]))
+    return hashes
+
+
+def setUpFamilyMember(fontDir, buildArgs, existsCache, includeCache,
+                      hashCache):
+    """
+    Collects the input files of one font of the family, and the options
+    for its build.
+    """
+    member = FamilyMember(fontDir)
+    member.args = list(buildArgs)
+    inputPaths = []
+    featurePaths = []
+    srcFontPath = None
+    for fileName in kDefaultFontPathList:
+        path = os.path.join(fontDir, fileName)
+        if os.path.exists(path):
+            srcFontPath = path
+            inputPaths.append(path)
+            break
+
+    featurePath = os.path.join(fontDir, kDefaultFeaturesPath)
+    if not os.path.exists(featurePath) and srcFontPath and \
+            srcFontPath.endswith(".ufo"):
+        featurePath = os.path.join(srcFontPath, kDefaultUFOFeaturesPath)
+    if os.path.exists(featurePath):
+        featurePaths.append(featurePath)
+
+    for fileName in ["fontinfo", "cidfontinfo"]:
+        path = os.path.join(fontDir, fileName)
+        if os.path.exists(path):
+            inputPaths.append(path)
+
+    # Every other file named in the options or in the project file is an
+    # input too, except for the output font and the project file to save.
+    # The builds run in the font directory, so relative paths are relative
+    # to it.
+    outputOptions = [kMOTFOptions[kOutputFont][1], "-sp"]
+    for i, arg in enumerate(buildArgs):
+        if arg.startswith("-") or (i and buildArgs[i - 1] in outputOptions):
+            continue
+        path = os.path.normpath(os.path.join(fontDir, arg))
+        if os.path.exists(path):
+            inputPaths.append(path)
+    for arg in getArgValues(buildArgs, kMOTFOptions[kFeature][1]):
+        featurePaths.append(os.path.normpath(os.path.join(fontDir, arg)))
+    projectPaths = [os.path.normpath(os.path.join(fontDir, arg))
+                    for arg in getArgValues(buildArgs, "-fp")
+                    if not arg.startswith("-")]
+    projectPaths.append(os.path.join(fontDir, kDefaultOptionsFile))
+    for projectPath in projectPaths:
+        if os.path.isfile(projectPath):
+            inputPaths.append(projectPath)
+            paths, projectFeaturePaths = getProjectFilePaths(projectPath)
+            inputPaths.extend(paths)
+            featurePaths.extend(projectFeaturePaths)
+    for path in featurePaths:
+        inputPaths.extend(getFeatureFiles(path, includeCache))
+
+    # The family files are looked up once for all the fonts, and passed
+    # on to makeotf, unless they have been given on the command line.
+    fmndbPath = lookUpFamilyFile(fontDir, kDefaultFMNDBPath, existsCache)
+    if fmndbPath:
+        inputPaths.append(fmndbPath)
+        if kMOTFOptions[kFMB][1] not in buildArgs:
+            member.args.extend([kMOTFOptions[kFMB][1], fmndbPath])
+    goadbPath = lookUpFamilyFile(fontDir, GOADB_NAME, existsCache)
+    if goadbPath:
+        inputPaths.append(goadbPath)
+        useGOADB = ("-r" in buildArgs) or ("-ga" in buildArgs)
+        if useGOADB and (kMOTFOptions[kGOADB][1] not in buildArgs):
+            member.args.extend([kMOTFOptions[kGOADB][1], goadbPath])
+
+    digest = hashlib.sha256()
+    for item in [__version__] + member.args + getFileHashes(
+            sorted(set(inputPaths)), hashCache):
+        digest.update(tobytes(item, encoding="utf-8"))
+        digest.update(b"\0")
+    member.inputsDigest = digest.hexdigest()
+    return member
+
+
+def getFamilyStatePath(cacheDir, fontDir):
+    pathHash = hashlib.sha256(tobytes(fontDir, encoding="utf-8")).hexdigest()
+    return os.path.join(cacheDir, pathHash + ".json")
+
+
+def readFamilyBuildState(statePath):
+    try:
+        with open(statePath, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def writeFamilyBuildState(statePath, state):
+    with open(statePath, "w", encoding="utf-8") as fp:
+        fp.write(tounicode(json.dumps(state, sort_keys=True)))
+
+
+def buildFamilyMember(member):
+    startTime = time.time()
+    command = [sys.executable, "-m", "afdko.makeotf"] + member.args
+    try:
+        proc = subprocess.Popen(command, cwd=member.fontDir,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT)
+        output, _ = proc.communicate()
+        returnCode = proc.returncode
+    except OSError as err:
+        output = tobytes("Error executing command '%s'\n%s" % (command, err))
+        returnCode = 1
+    member.output = tounicode(output, encoding="utf-8")
+    member.elapsed = time.time() - startTime
+
+    match = kBuiltFontPattern.search(member.output)
+    if returnCode or not match:
+        member.status = "failed"
+        return member
+    member.status = "built"
+    outputPath = os.path.normpath(
+        os.path.join(member.fontDir, match.group(1)))
+    if member.statePath:
+        writeFamilyBuildState(member.statePath,
+                              {"fontDir": member.fontDir,
+                               "inputs": member.inputsDigest,
+                               "output": outputPath})
+    return member
+
+
+def runFamilyBuild(args):
+    """
+    Builds the fonts in several font directories on a pool of worker
+    threads, each of which runs makeotf in a separate process. Only the
+    FontMenuNameDB and GlyphOrderAndAliasDB lookups are shared: each build
+    still sets up its own parameters and reads its own feature files, which
+    the family build reads only to hash them. If a cache directory is
+    given, a font is skipped if the digest of its inputs and options
+    matches the one saved there by its last successful build, and its
+    output font still exists.
+    """
+    fontDirs, numJobs, cacheDir, buildArgs = parseFamilyArgs(args)
+    if cacheDir and not os.path.isdir(cacheDir):
+        os.makedirs(cacheDir)
+    existsCache = {}
+    includeCache = {}
+    hashCache = {}
+    members = []
+    toBuild = []
+    for fontDir in fontDirs:
+        member = setUpFamilyMember(fontDir, buildArgs, existsCache,
+                                   includeCache, hashCache)
+        members.append(member)
+        if cacheDir:
+            member.statePath = getFamilyStatePath(cacheDir, fontDir)
+            state = readFamilyBuildState(member.statePath)
+            if state.get("inputs") == member.inputsDigest and \
+                    os.path.exists(state.get("output", "")):
+                member.status = "skipped"
+                continue
+        toBuild.append(member)
+
+    startTime = time.time()
+    pool = ThreadPool(min(numJobs, max(1, len(toBuild))))
+    try:
+        # imap returns the builds in order, so the logs are not interleaved.
+        for member in pool.imap(buildFamilyMember, toBuild):
+            print("makeotf [Note] Output of build in '%s':" % member.fontDir)
+            print(member.output)
+    finally:
+        pool.close()
+        pool.join()
+
+    print("makeotf [Note] Family build summary:")
+    numFailed = 0
+    for member in members:
+        if member.status == "skipped":
+            print("   skipped          %s (inputs unchanged)" %
+                  member.fontDir)
+        else:
+            print("   %-7s %7.2f sec  %s" % (member.status, member.elapsed,
+                                             member.fontDir))
+        if member.status == "failed":
+            numFailed += 1
+    print("   total   %7.2f sec" % (time.time() - startTime))
+    if numFailed:
+        print("makeotf [Error] %s of %s fonts failed to build." %
+              (numFailed, len(members)))
+        return 1
+    return 0
+
+
 def CheckEnvironment():
 
     missingTools = []
@@ -2695,6 +3034,12 @@ def main(args=None):
     except FDKEnvironmentError:
         return 1
 
+    if ("-family" in args) or ("--family" in args):
+        try:
+            return runFamilyBuild(args)
+        except MakeOTFOptionsError:
+            return 1
+
     makeOTFParams = MakeOTFParams()
 
     try:
@@ -5,13 +5,22 @@ __copyright__ = """Copyright 2014 Adobe Systems Incorporated (http://www.adobe.c
 """
 
 __help__ = """
-otc2otf otc2otf.py  [-r] <font.ttc>
+otc2otf otc2otf.py  [-r] [-i <font index>] [-n <PostScript name>] <font.ttc>
 
 Extract all OpenType fonts from the parent OpenType Collection font.
 -r  Optional. Report TTC fonts and tables, Will not write the output files.
+-i <font index>  Optional. Extract only the font with this index in the
+    collection. The first font has index 0. May be used more than once.
+-n <PostScript name>  Optional. Extract only the font with this PostScript
+    name. May be used more than once.
+
+When -i and -n are both used, the fonts that match either one are extracted.
+The table checksums, the table padding, and the 'head' table
+checkSumAdjustment field of each output font are computed as it is written.
 
 example:
  python otc2otf.py  -r  LogoCutStd.ttc
+ python otc2otf.py  -n LogoCutStd-Bold LogoCutStd.ttc
 
 The script may be invoked with either the FDK command:
   otc2otf
@@ -25,6 +34,7 @@ or directly with the command:
 import sys
 import os
 import struct
+import mmap
 
 class OTCError(TypeError):
 	pass
@@ -49,7 +59,7 @@ class TableEntry:
 		self.tag = tag
 		self.checksum = checkSum
 		self.length = length
-		self.data = None
+		self.srcOffset = None # offset of the table data in the OTC file
 		self.offset = None
 		self.isPreferred = False
 
@@ -107,10 +117,16 @@ nameRecordFormatDoc = """
 """
 nameRecordSize = struct.calcsize(nameRecordFormat)
 
+headCheckSumAdjustmentOffset = 8
+kChecksumMagic = 0xB1B0AFBA
+kChecksumChunkSize = 0x10000 # bytes summed per struct.unpack_from call.
+
 		
 def parseArgs(args):
 	doReportOnly = False
 	fontPath = None
+	fontIndexList = []
+	psNameList = []
 	argn = len(args)
 	i = 0
 	while i < argn:
@@ -121,6 +137,18 @@ def parseArgs(args):
 			fontPath = arg
 		elif arg == "-r":
 			doReportOnly = True
+		elif arg == "-i":
+			try:
+				fontIndexList.append(int(args[i]))
+			except (ValueError, IndexError):
+				raise OTCError("Option '-i' must be followed by a font index.")
+			i += 1
+		elif arg == "-n":
+			try:
+				psNameList.append(args[i])
+			except IndexError:
+				raise OTCError("Option '-n' must be followed by a PostScript name.")
+			i += 1
 		elif (arg == "-u") or (arg == "-h"):
 			print(__help__)
 			raise OTCError()
@@ -138,9 +166,9 @@ def parseArgs(args):
 		data = fp.read(4)
 	
 	if data != b'ttcf':
-		raise OTCErrr("File is not an OpenType Collection file: '%s'." % (fontPath))
+		raise OTCError("File is not an OpenType Collection file: '%s'." % (fontPath))
 
-	return fontPath, doReportOnly
+	return fontPath, doReportOnly, fontIndexList, psNameList
 
 MSUnicodeKey = (3, 1, 6)
 AppleLatinKey = (1, 0, 6)
@@ -173,6 +201,7 @@ def getPSName(data):
 					psName = psName.decode('utf-16be')
 				else:
 					assert len(psName) == length
+					psName = psName.decode('latin-1')
 				break
 			else:
 				continue
@@ -182,22 +211,21 @@ def getPSName(data):
 	return psName
 
 def readFontFile(fontOffset, data, tableDict, doReportOnly):
-	sfntType, numTables, searchRange, entrySelector, rangeShift = struct.unpack(sfntDirectoryFormat, data[fontOffset:fontOffset + sfntDirectorySize])
+	sfntType, numTables, searchRange, entrySelector, rangeShift = struct.unpack_from(sfntDirectoryFormat, data, fontOffset)
 	fontEntry = FontEntry(sfntType, searchRange, entrySelector, rangeShift)
-	entryData = data[fontOffset + sfntDirectorySize:]
+	entryPos = fontOffset + sfntDirectorySize
 	i = 0
 	seenGlyf = False
 	while i < numTables:
-		tag, checksum, offset, length = struct.unpack(sfntDirectoryEntryFormat, entryData[:sfntDirectoryEntrySize])
+		tag, checksum, offset, length = struct.unpack_from(sfntDirectoryEntryFormat, data, entryPos)
 		tableEntry = TableEntry(tag, checksum, length)
-		tableEntry.offset = offset
-		tableEntry.data = data[offset:offset+length]
+		tableEntry.offset = tableEntry.srcOffset = offset
 		fontEntry.tableList.append(tableEntry)
 		if tag == b"name":
-			fontEntry.psName = getPSName(tableEntry.data)
+			fontEntry.psName = getPSName(data[offset:offset+length])
 		elif tag == b"glyf":
 			seenGlyf = True
-		entryData =  entryData[sfntDirectoryEntrySize:]
+		entryPos += sfntDirectoryEntrySize
 		i += 1
 	if seenGlyf:
 			fontEntry.fileName = fontEntry.psName + ".ttf"
@@ -218,63 +246,117 @@ def readFontFile(fontOffset, data, tableDict, doReportOnly):
 	return fontEntry
 
 
-def writeOTFFont(fontEntry):
+def getTableData(data, tableEntry):
+	# Returns the table's data in the mapped OTC file, without copying it.
+	start = tableEntry.srcOffset
+	try:
+		return memoryview(data)[start:start + tableEntry.length]
+	except TypeError:
+		# Python 2 mmap objects can't be used with memoryview.
+		return data[start:start + tableEntry.length]
+
+def calcChecksum(data):
+	# Sum of the big-endian 32 bit words in data, with the last word padded
+	# with zeros.
+	checksum = 0
+	length = len(data)
+	numWholeBytes = length & ~3
+	start = 0
+	while start < numWholeBytes:
+		numLongs = min(numWholeBytes - start, kChecksumChunkSize) // 4
+		checksum += sum(struct.unpack_from(">%dL" % (numLongs), data, start))
+		start += numLongs * 4
+	if numWholeBytes < length:
+		lastLong = bytes(data[numWholeBytes:length]) + b"\0" * (4 - (length - numWholeBytes))
+		checksum += struct.unpack(">L", lastLong)[0]
+	return checksum & 0xFFFFFFFF
+
+def writeOTFFont(fontEntry, data):
 
 	dataList = []
 	numTables = len(fontEntry.tableList)
 	# Build the SFNT header
-	data = struct.pack(sfntDirectoryFormat, fontEntry.sfntType, numTables, fontEntry.searchRange, fontEntry.entrySelector, fontEntry.rangeShift)
-	dataList.append(data)
+	header = struct.pack(sfntDirectoryFormat, fontEntry.sfntType, numTables, fontEntry.searchRange, fontEntry.entrySelector, fontEntry.rangeShift)
+	dataList.append(header)
 	
 	fontOffset = sfntDirectorySize + numTables*sfntDirectoryEntrySize
-	# Set the offsets in the tables.
+	# Set the offsets and checksums of the tables. The 'head' table
+	# checksum is computed with checkSumAdjustment set to 0.
+	headData = None
 	for tableEntry in fontEntry.tableList:
 		tableEntry.offset = fontOffset
-		fontOffset += tableEntry.length
+		fontOffset += (tableEntry.length + 3) & ~3
+		tableData = getTableData(data, tableEntry)
+		if tableEntry.tag == b"head":
+			headData = bytearray(tableData)
+			headData[headCheckSumAdjustmentOffset:headCheckSumAdjustmentOffset + 4] = b"\0\0\0\0"
+			tableData = headData
+		tableEntry.checksum = calcChecksum(tableData)
 	
 	# build table entries in sfnt directory
 	for tableEntry in fontEntry.tableList:
 		tableData = struct.pack(sfntDirectoryEntryFormat, tableEntry.tag, tableEntry.checksum, tableEntry.offset, tableEntry.length)
 		dataList.append(tableData)
 	
-	# add table data to font.
-	for tableEntry in fontEntry.tableList:
-		tableData = tableEntry.data
-		dataList.append(tableData)
-	
-	fontData = b"".join(dataList)
+	if headData is not None:
+		fontChecksum = calcChecksum(b"".join(dataList))
+		for tableEntry in fontEntry.tableList:
+			fontChecksum += tableEntry.checksum
+		checkSumAdjustment = (kChecksumMagic - fontChecksum) & 0xFFFFFFFF
+		struct.pack_into(">L", headData, headCheckSumAdjustmentOffset, checkSumAdjustment)
 	
 	with open(fontEntry.fileName, "wb") as fp:
-		fp.write(fontData)
+		fp.writelines(dataList)
+		# add table data to font, copying it from the mapped OTC file.
+		for tableEntry in fontEntry.tableList:
+			if tableEntry.tag == b"head":
+				fp.write(headData)
+			else:
+				fp.write(getTableData(data, tableEntry))
+			fp.write(b"\0" * (-tableEntry.length & 3))
 	return
 
 def run(args):
-	fontPath, doReportOnly = parseArgs(args)
+	fontPath, doReportOnly, fontIndexList, psNameList = parseArgs(args)
 	print("Input font:", fontPath)
 	
 
 	with open(fontPath, "rb") as fp:
-		data = fp.read()
+		data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
 
-	TTCTag, version, numFonts = struct.unpack(ttcHeaderFormat, data[:ttcHeaderSize])
-	offsetdata = data[ttcHeaderSize:]
-	
-	fontList = []
-	i = 0
-	tableDict = {} # Used to record whcih tables have been reported before.
-	while i < numFonts:
-		offset = struct.unpack(offsetFormat, offsetdata[:offsetSize])[0]
-		if doReportOnly:
-			print("font %s offset: %s/0x%08X." % (i, offset,offset), end=' ')
-		fontEntry = readFontFile(offset, data, tableDict, doReportOnly)
-		fontList.append(fontEntry)
-		offsetdata = offsetdata[offsetSize:]
-		i += 1
+	try:
+		TTCTag, version, numFonts = struct.unpack_from(ttcHeaderFormat, data, 0)
+		for fontIndex in fontIndexList:
+			if not 0 <= fontIndex < numFonts:
+				raise OTCError("Font index %s is out of range: the collection has %s fonts." % (fontIndex, numFonts))
 		
-	if not doReportOnly:		
-		for fontEntry in fontList:
-			writeOTFFont(fontEntry)
-			print("Output font:", fontEntry.fileName)
+		fontList = []
+		i = 0
+		tableDict = {} # Used to record whcih tables have been reported before.
+		while i < numFonts:
+			offset = struct.unpack_from(offsetFormat, data, ttcHeaderSize + i*offsetSize)[0]
+			if doReportOnly:
+				print("font %s offset: %s/0x%08X." % (i, offset,offset), end=' ')
+			fontEntry = readFontFile(offset, data, tableDict, doReportOnly)
+			fontList.append(fontEntry)
+			i += 1
+		
+		if fontIndexList or psNameList:
+			selectedFontList = [fontEntry for i, fontEntry in enumerate(fontList)
+								if i in fontIndexList or fontEntry.psName in psNameList]
+			foundPSNames = [fontEntry.psName for fontEntry in fontList]
+			for psName in psNameList:
+				if psName not in foundPSNames:
+					print("Warning: no font with the PostScript name '%s'." % (psName))
+		else:
+			selectedFontList = fontList
+			
+		if not doReportOnly:		
+			for fontEntry in selectedFontList:
+				writeOTFFont(fontEntry, data)
+				print("Output font:", fontEntry.fileName)
+	finally:
+		data.close()
 	print("Done")
 
 def main():
@@ -34,13 +34,21 @@ A font object contains;
  font file name
  list of [tableTag, table data, shared] pairs
  
+The font files are memory-mapped, and a table entry refers to its data by offset
+and length in the mapped file, rather than holding a copy of it.
+
 as the font tables are being read in, they are compared against the list of already seen data items.
 If any match, the font table reference is replaced by the reference to the tabel already seen.
+Tables are matched by tag, length and a SHA-256 hash of the table data.
+
+The output file is written a table at a time, straight from the mapped input files.
 """
 
 import sys
 import os
 import struct
+import hashlib
+import mmap
 
 class OTCError(TypeError):
 	pass
@@ -61,7 +69,7 @@ class FontEntry:
 		for tableEntry in self.tableList:
 			if tableTag == tableEntry.tag:
 				return tableEntry
-		raise KeyError("Failed to find tag: " + tableTag)
+		raise KeyError("Failed to find tag: %s" % (tableTag))
 
 	def __str__(self):
 		dl = [ "fontEntry sfntType: %s, numTables: %s." % (self.sfntType, len(self.tableList) )]
@@ -78,10 +86,25 @@ class TableEntry:
 		self.tag = tag
 		self.checksum = checkSum
 		self.length = length
-		self.data = None
+		self.fontData = None # the mapped font file
+		self.dataOffset = None # offset of the table data in fontData
+		self.digest = None
 		self.offset = None
 		self.isPreferred = False
 		
+	def getData(self):
+		start = self.dataOffset
+		try:
+			return memoryview(self.fontData)[start:start + self.length]
+		except TypeError:
+			# Python 2 mmap objects can't be used with memoryview.
+			return self.fontData[start:start + self.length]
+		
+	def getDigest(self):
+		if self.digest is None:
+			self.digest = hashlib.sha256(self.getData()).digest()
+		return self.digest
+		
 	def __str__(self):
 		return "Table tag: %s, checksum: %s, length %s." % (self.tag, self.checksum, self.length )
 	def __repr__(self):
@@ -147,11 +170,10 @@ def parseArgs(args):
 		elif arg == "-t":
 			parts = args[i].split("=")
 			try:
-				tag = parts[0]
-				tag.strip("\"")
-				tag.strip("'")
+				# The table tags read from the font files are byte strings.
+				tag = parts[0].strip("\"").strip("'").encode('ascii')
 				fontIndex = int(parts[1])
-			except (ValueError, IndexError) as e:
+			except (ValueError, IndexError, UnicodeError) as e:
 				raise OTCError("Badly formed table override." + __help__)
 			tagOverrideMap[tag] = fontIndex
 			i += 1
@@ -181,40 +203,46 @@ def parseArgs(args):
 	return tagOverrideMap, fontList, ttcFilePath
 
 def readFontFile(fontPath):
+	# Returns the mapped font file, and its list of font entries.
 	fontEntryList = []
 	with open(fontPath, "rb") as fp:
-		data = fp.read()
+		data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
 	
-	# See if this is a OTC file first.
-	TTCTag, version, numFonts = struct.unpack(ttcHeaderFormat, data[:ttcHeaderSize])
-	if TTCTag != b'ttcf':
-		# it is a regular font.
-		fontEntry = parseFontFile(0, data)
-		fontEntryList.append(fontEntry)
-	else:
-		offsetdata = data[ttcHeaderSize:]
-		i = 0
-		while i < numFonts:
-			offset = struct.unpack(offsetFormat, offsetdata[:offsetSize])[0]
-			fontEntry = parseFontFile(offset, data)
+	try:
+		# See if this is a OTC file first.
+		TTCTag, version, numFonts = struct.unpack_from(ttcHeaderFormat, data, 0)
+		if TTCTag != b'ttcf':
+			# it is a regular font.
+			fontEntry = parseFontFile(0, data)
 			fontEntryList.append(fontEntry)
-			offsetdata = offsetdata[offsetSize:]
-			i += 1
-	return fontEntryList
+		else:
+			offsetPos = ttcHeaderSize
+			i = 0
+			while i < numFonts:
+				offset = struct.unpack_from(offsetFormat, data, offsetPos)[0]
+				fontEntry = parseFontFile(offset, data)
+				fontEntryList.append(fontEntry)
+				offsetPos += offsetSize
+				i += 1
+	except:
+		data.close()
+		raise
+	return data, fontEntryList
 	
 	
 def parseFontFile(offset, data):
-	sfntType, numTables, searchRange, entrySelector, rangeShift = struct.unpack(sfntDirectoryFormat, data[offset:offset+sfntDirectorySize])
+	sfntType, numTables, searchRange, entrySelector, rangeShift = struct.unpack_from(sfntDirectoryFormat, data, offset)
 	fontEntry = FontEntry(sfntType, searchRange, entrySelector, rangeShift)
-	curData = data[offset+sfntDirectorySize:]
+	entryPos = offset + sfntDirectorySize
 
 	i = 0
 	while i < numTables:
-		tag, checkSum, offset, length = struct.unpack(sfntDirectoryEntryFormat, curData[:sfntDirectoryEntrySize])
+		tag, checkSum, offset, length = struct.unpack_from(sfntDirectoryEntryFormat, data, entryPos)
 		tableEntry = TableEntry(tag, checkSum, length)
-		tableEntry.data = data[offset:offset+length]
+		tableEntry.fontData = data
+		tableEntry.dataOffset = offset
 		fontEntry.append(tableEntry)
-		curData =  curData[sfntDirectoryEntrySize:]
+		entryPos += sfntDirectoryEntrySize
 		i += 1
 	return fontEntry
 
@@ -243,17 +271,15 @@ def writeTTC(fontList, tableList, ttcFilePath):
 			data = struct.pack(sfntDirectoryEntryFormat, tableEntry.tag, tableEntry.checksum, tableEntry.offset, tableEntry.length)
 			dataList.append(data)
 		
-	# save the tables.
-	for tableEntryList in tableList:
-		for tableEntry in tableEntryList:
-			paddedLength = (tableEntry.length + 3) & ~3
-			paddedData = tableEntry.data + b"\0" * (paddedLength - tableEntry.length)
-			dataList.append(paddedData)
-	
-	fontData = b"".join(dataList)
-	
 	with open(ttcFilePath, "wb") as fp:
-		fp.write(fontData)
+		fp.writelines(dataList)
+		
+		# save the tables, copying each one from its mapped font file.
+		for tableEntryList in tableList:
+			for tableEntry in tableEntryList:
+				paddedLength = (tableEntry.length + 3) & ~3
+				fp.write(tableEntry.getData())
+				fp.write(b"\0" * (paddedLength - tableEntry.length))
 	return
 
 def run(args):
@@ -263,45 +289,52 @@ def run(args):
 	fontList = []
 	tableMap = {}
 	tableList = []
+	fontDataList = []
+	# (tag, checksum, length, digest) -> the first table entry with that data.
+	tableDigestMap = {}
 	
-	# Read each font file into a list of tables in a fontEntry
-	for fontPath in fileList:
-		fontEntryList = readFontFile(fontPath)
-		fontList += fontEntryList
-	# Add the fontEntry tableEntries to tableList.
-	for fontEntry in fontList:
-		tableIndex = 0
-		numTables = len(fontEntry.tableList)
-		while tableIndex < numTables:
-			tableEntry = fontEntry.tableList[tableIndex]
+	try:
+		# Read each font file into a list of tables in a fontEntry
+		for fontPath in fileList:
+			fontData, fontEntryList = readFontFile(fontPath)
+			fontDataList.append(fontData)
+			fontList += fontEntryList
+		# Add the fontEntry tableEntries to tableList.
+		for fontEntry in fontList:
+			tableIndex = 0
+			numTables = len(fontEntry.tableList)
+			while tableIndex < numTables:
+				tableEntry = fontEntry.tableList[tableIndex]
 			
-			try:
-				fontIndex = tagOverrideMap[tableEntry.tag]
-				tableEntry = fontList[fontIndex].getTable(tableEntry.tag)
-				fontEntry.tableList[tableIndex] = tableEntry
-			except KeyError:
-				pass
+				try:
+					fontIndex = tagOverrideMap[tableEntry.tag]
+					tableEntry = fontList[fontIndex].getTable(tableEntry.tag)
+					fontEntry.tableList[tableIndex] = tableEntry
+				except KeyError:
+					pass
 				
-			try:
-				tableEntryList = tableMap[tableEntry.tag]
-				matched = 0
-				for tEntry in tableEntryList:
-					if (tEntry.checksum == tableEntry.checksum) and (tEntry.length == tableEntry.length) and (tEntry.data == tableEntry.data):
-						matched = 1
-						fontEntry.tableList[tableIndex] = tEntry
-						break
-				if not matched:
-					tableEntryList.append(tableEntry)
-			except KeyError:
-				tableEntryList = [tableEntry]
-				tableMap[tableEntry.tag] = tableEntryList
-				tableList.insert(tableIndex, tableEntryList)
+				digestKey = (tableEntry.tag, tableEntry.checksum, tableEntry.length, tableEntry.getDigest())
+				try:
+					tableEntryList = tableMap[tableEntry.tag]
+					try:
+						fontEntry.tableList[tableIndex] = tableDigestMap[digestKey]
+					except KeyError:
+						tableDigestMap[digestKey] = tableEntry
+						tableEntryList.append(tableEntry)
+				except KeyError:
+					tableDigestMap[digestKey] = tableEntry
+					tableEntryList = [tableEntry]
+					tableMap[tableEntry.tag] = tableEntryList
+					tableList.insert(tableIndex, tableEntryList)
 				
-			tableIndex += 1
+				tableIndex += 1
 			
 
-	writeTTC(fontList, tableList, ttcFilePath)
-	print("Output font:", ttcFilePath)
+		writeTTC(fontList, tableList, ttcFilePath)
+		print("Output font:", ttcFilePath)
+	finally:
+		for fontData in fontDataList:
+			fontData.close()
 
 	# report which tabetablesls are shared.
 	sharedTables = []
@@ -7,16 +7,18 @@ run alone.
 """
 from __future__ import print_function, absolute_import
 
-from fontTools.pens.boundsPen import BoundsPen, BasePen
+from fontTools.pens.boundsPen import BoundsPen
 from fontTools.misc.psCharStrings import T2OutlineExtractor
 from fontTools.misc.py23 import byteord
 
-from afdko.fontpdf import FontPDFGlyph, FontPDFFont, FontPDFPoint
+from afdko.fontpdf import (
+    FontPDFGlyph, FontPDFFont, FontPDFPoint, linkPathPoints)
 
 
-class FontPDFPen(BasePen):
+class FontPDFPen(BoundsPen):
+    # Collects the list of points, and the glyph bounds, in one pass.
     def __init__(self, glyphSet=None):
-        BasePen.__init__(self, glyphSet)
+        BoundsPen.__init__(self, glyphSet)
         self.pathList = []
         # These all get set when the outline is drawn
         self.numMT = self.numLT = self.numCT = self.numPaths = self.total = 0
@@ -24,6 +26,7 @@ class FontPDFPen(BasePen):
         self.noPath = 1
 
     def _moveTo(self, pt):
+        BoundsPen._moveTo(self, pt)
         if self.noPath:
             self.pathList.append([])
         self.noPath = 0
@@ -35,6 +38,7 @@ class FontPDFPen(BasePen):
         curPath.append(pdfPoint)
 
     def _lineTo(self, pt):
+        BoundsPen._lineTo(self, pt)
         if self.noPath:
             self.pathList.append([])
         self.noPath = 0
@@ -45,6 +49,7 @@ class FontPDFPen(BasePen):
         self.curPt = pt
 
     def _curveToOne(self, pt1, pt2, pt3):
+        BoundsPen._curveToOne(self, pt1, pt2, pt3)
         if self.noPath:
             self.pathList.append([])
         self.numCT += 1
@@ -79,6 +84,7 @@ class txPDFFont(FontPDFFont):
         self.ascent = None
         self.descent = None
         self.blueZones = None
+        self.glyphCache = None
         self.getEmSquare()
         self.getBaseLine()
         self.getBBox()
@@ -325,7 +331,7 @@ class txPDFGlyph(FontPDFGlyph):
         self.isCID = self.parentFont.isCID
         charstring = fTopDict.CharStrings[self.name]
 
-        # Get the list of points
+        # Get the list of points, and the bbox.
         pen = FontPDFPen(None)
         drawCharString(charstring, pen)
         self.hintTable = charstring.hintTable
@@ -337,24 +343,11 @@ class txPDFGlyph(FontPDFGlyph):
         self.numCT = pen.numCT
         self.numPaths = pen.numPaths
         self.pathList = pen.pathList
-        for path in self.pathList:
-            lenPath = len(path)
-            path[-1].next = path[0]
-            path[0].last = path[-1]
-            if lenPath > 1:
-                path[0].next = path[1]
-                path[-1].last = path[-2]
-                for i in list(range(lenPath)[1:-1]):
-                    pt = path[i]
-                    pt.next = path[i + 1]
-                    pt.last = path[i - 1]
+        linkPathPoints(self.pathList)
 
         assert len(self.pathList) == self.numPaths, (
             "Path lengths don't match %s %s" % (len(self.pathList),
                                                 self.numPaths))
-        # get the bbox and width.
-        pen = BoundsPen(None)
-        charstring.draw(pen)
         self.xAdvance = charstring.width
         self.BBox = pen.bounds
         if not self.BBox:
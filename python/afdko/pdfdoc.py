@@ -51,6 +51,10 @@ AFMDIR = '.'
 
 A4 = (595.27,841.89)   #default page size
 
+# Objects whose contents are known only when the document is complete.
+# In streaming mode they are written at close, after all the pages.
+kDeferredObjectKeys = ['PagesTreeRoot', 'Info']
+
 
 class PDFError(KeyError):
     pass
@@ -63,11 +67,22 @@ class PDFDocument:
     For cross-linking, it provides getPosition(key) which tells you where
     another object is, or raises a KeyError if not found.  The rule is that
     objects should only refer ones previously written to file.
+
+    If fileobj is given, the document is written in streaming mode: each
+    object is written to fileobj as soon as it is added, and then dropped,
+    so that the memory used does not grow with the number of pages. The
+    page tree, the info dict, the xref and the trailer are written by
+    close(). fileobj must support tell().
     """
-    def __init__(self):
+    def __init__(self, fileobj=None):
         self.objects = []
         self.objectPositions = {}
 
+        self.fileobj = fileobj
+        self.xref = []
+        if fileobj is not None:
+            self.writeHeader(fileobj)
+
         self.pages = []
         self.pagepositions = []
 
@@ -115,6 +130,14 @@ class PDFDocument:
         self.objectPositions[key] = len(self.objects)  # its position
         self.objects.append(obj)
         obj.doc = self
+        if self.fileobj is not None:
+            if key in kDeferredObjectKeys:
+                self.xref.append(None)  # filled in by close()
+            else:
+                self.xref.append(self.writeObject(self.fileobj,
+                                                  len(self.objects), obj))
+                # Release it; it can't change once written.
+                self.objects[-1] = None
         return len(self.objects) - 1  # give its position
 
     def getPosition(self, key):
@@ -172,22 +195,45 @@ class PDFDocument:
         """Open a file, and ask each object in turn to write itself to
         the file.  Keep track of the file position at each point for
         use in the index at the end"""
+        if self.fileobj is not None:
+            raise PDFError("A streaming document is saved by close()")
         f = fileobj
         i = 1
         self.xref = []
-        f.write(tobytes("%PDF-1.2" + LINEEND, encoding='utf-8'))  # for CID support
-        f.write(tobytes(b"%\xed\xec\xb6\xbe\r\n", encoding='utf-8'))
+        self.writeHeader(f)
         for obj in self.objects:
-            pos = f.tell()
-            self.xref.append(pos)
-            f.write(tobytes(str(i) + ' 0 obj' + LINEEND, encoding='utf-8'))
-            obj.save(f)
-            f.write(tobytes('endobj' + LINEEND, encoding='utf-8'))
+            self.xref.append(self.writeObject(f, i, obj))
             i = i + 1
         self.writeXref(f)
         self.writeTrailer(f)
         f.write(tobytes('%%EOF', encoding='utf-8'))  # no lineend needed on this one!
 
+    def writeHeader(self, f):
+        f.write(tobytes("%PDF-1.2" + LINEEND, encoding='utf-8'))  # for CID support
+        f.write(tobytes(b"%\xed\xec\xb6\xbe\r\n", encoding='utf-8'))
+
+    def writeObject(self, f, i, obj):
+        "Writes obj as object number i. Returns its file position."
+        pos = f.tell()
+        f.write(tobytes(str(i) + ' 0 obj' + LINEEND, encoding='utf-8'))
+        obj.save(f)
+        f.write(tobytes('endobj' + LINEEND, encoding='utf-8'))
+        return pos
+
+    def close(self):
+        """Finishes a streaming document: writes the objects that were held
+        back, then the xref and the trailer. Does not close the file."""
+        f = self.fileobj
+        if f is None:
+            raise PDFError("Only a streaming document can be closed")
+        for i, obj in enumerate(self.objects):
+            if obj is not None:
+                self.xref[i] = self.writeObject(f, i + 1, obj)
+        self.writeXref(f)
+        self.writeTrailer(f)
+        f.write(tobytes('%%EOF', encoding='utf-8'))  # no lineend needed on this one!
+        self.fileobj = None
+
     def printPDF(self):
         "prints it to standard output.  Logs positions for doing trailer"
         print("%PDF-1.0")
@@ -515,7 +561,7 @@ class PDFPage(PDFObject):
 
     def setCompression(self, onoff=0):
         "Turns page compression on or off"
-        assert onoff in [0, 1], "Page compression options are 1=on, 2=off"
+        assert onoff in [0, 1, 2], "Page compression options are 0=off, 1=on, 2=on as binary data"
         self.stream.compression = onoff
 
     def save(self, file):
@@ -542,7 +588,9 @@ TestStream = "BT /F6 24 Tf 80 672 Td 24 TL (   ) Tj T* ET"
 
 
 class PDFStream(PDFObject):
-    "Used for the contents of a page"
+    """Used for the contents of a page. compression is 0 for plain text, 1
+    for Flate compressed data in ASCII85 text, or 2 for binary Flate
+    compressed data."""
     def __init__(self):
         self.data = None
         self.compression = 0
@@ -555,9 +603,17 @@ class PDFStream(PDFObject):
         if self.data == None:
              self.data = TestStream
 
+        if self.compression == 2:
+            comp = zlib.compress(tobytes(self.data, encoding='utf-8'))
+            # The line end before endstream is not part of the data.
+            file.write(tobytes('<< /Length %d /Filter /FlateDecode >>' % len(comp) + LINEEND, encoding='utf-8'))
+            file.write(tobytes('stream' + LINEEND, encoding='utf-8'))
+            file.write(comp + tobytes(LINEEND, encoding='utf-8'))
+            file.write(tobytes('endstream' + LINEEND, encoding='utf-8'))
+            return
         if self.compression == 1:
             comp = zlib.compress(tobytes(self.data, encoding='utf-8'))   #this bit is very fast...
-            base85 = pdfutils._AsciiBase85Encode(comp) #...sadly this isn't
+            base85 = pdfutils._AsciiBase85Encode(comp)
             wrapped = pdfutils._wrap(base85)
             data_to_write = wrapped
         else:
@@ -612,7 +668,7 @@ class PDFEmbddedFont(PDFStream):
 
         if self.compression == 1:
             comp = zlib.compress(self.data)   #this bit is very fast...
-            base85 = pdfutils._AsciiBase85Encode(comp) #...sadly this isn't
+            base85 = pdfutils._AsciiBase85Encode(comp)
             data_to_write = pdfutils._wrap(base85)
         else:
             data_to_write = self.data
@@ -108,11 +108,18 @@ class Canvas:
     state'.  Just started development at 5/9/99, not in use yet.
 
     """
-    def __init__(self,filename,pagesize=(595.27,841.89), bottomup = 1):
+    def __init__(self,filename,pagesize=(595.27,841.89), bottomup = 1, streaming = 0):
         """Most of the attributes are private - we will use set/get methods
-        as the preferred interface.  Default page size is A4."""
+        as the preferred interface.  Default page size is A4.
+        If streaming is true, filename is opened now and each page is written
+        to it by showPage(); save() then finishes the file."""
         self._filename = filename
-        self._doc = pdfdoc.PDFDocument()
+        if streaming:
+            self._fileobj = open(filename, 'wb')
+            self._doc = pdfdoc.PDFDocument(self._fileobj)
+        else:
+            self._fileobj = None
+            self._doc = pdfdoc.PDFDocument()
         self._pagesize = pagesize
         self._currentPageHasImages = 1
         self._pageTransitionString = ''
@@ -208,6 +215,25 @@ class Canvas:
     def getPageNumber(self):
         return self._pageNumber
 
+    def setPageNumber(self, pageNumber):
+        "Used when the pages of a document are drawn by different canvases"
+        self._pageNumber = pageNumber
+
+    def endPageCode(self):
+        """Ends the current page like showPage(), but returns its marking
+        operators instead of adding it to the document. Another canvas can
+        then add the page with showPageCode()."""
+        code = self._code
+        self._pageNumber = self._pageNumber + 1
+        self._code = []
+        self._currentPageHasImages = 0
+        return code
+
+    def showPageCode(self, code):
+        "Adds a page with the marking operators returned by endPageCode()"
+        self._code = code
+        self.showPage()
+
     def save(self, filename=None, fileobj=None):
 
         """Saves the pdf document to fileobj or to file with name filename.
@@ -215,7 +241,15 @@ class Canvas:
 
         if len(self._code):
             self.showPage()  # what's the effect of multiple 'showPage's
-        if fileobj:
+        if self._fileobj is not None:
+            if fileobj or filename:
+                raise pdfdoc.PDFError("A streaming canvas can only be saved to the file it was created with")
+            try:
+                self._doc.close()
+            finally:
+                self._fileobj.close()
+                self._fileobj = None
+        elif fileobj:
             self._doc.SaveToFileObject(fileobj)
         elif filename:
             self._doc.SaveToFile(filename)
@@ -645,7 +679,7 @@ class Canvas:
             raw = myimage.tostring()
             assert len(raw) == (imgwidth * imgheight), "Wrong amount of data for image"
             compressed = zlib.compress(raw)   #this bit is very fast...
-            encoded = pdfutils._AsciiBase85Encode(compressed) #...sadly this isn't
+            encoded = pdfutils._AsciiBase85Encode(compressed)
 
             #write in blocks of (??) 60 characters per line to a list
             outstream = StringIO(encoded)
@@ -728,9 +762,11 @@ class Canvas:
                 image.seek((x[0] << 8) + x[1] - 2, 1)
 
     def setPageCompression(self, onoff=1):
-        """Possible values 1 or 0 (1 for 'on' is the default).
+        """Possible values 2, 1 or 0 (1 for 'on' is the default).
         If on, the page data will be compressed, leading to much
         smaller files, but takes a little longer to create the files.
+        With 2, the compressed data is written as binary rather than
+        ASCII85 text, which is faster still and makes smaller files.
         This applies to all subsequent pages, or until setPageCompression()
         is next called."""
         self._pageCompression = onoff
@@ -5,12 +5,17 @@ from __future__ import print_function, absolute_import
 
 import glob
 import os
+import struct
 try:
     from StringIO import StringIO
 except ImportError:
     from io import StringIO
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-from fontTools.misc.py23 import byteord
+from fontTools.misc.py23 import byteord, tobytes, tostr
 
 LINEEND = '\015\012'
 
@@ -36,7 +41,7 @@ def cacheImageFile(filename):
     raw = img.tostring()
     assert len(raw) == imgwidth * imgheight, "Wrong amount of data for image"
     compressed = zlib.compress(raw)   #this bit is very fast...
-    encoded = _AsciiBase85Encode(compressed) #...sadly this isn't
+    encoded = _AsciiBase85Encode(compressed)
 
     #write in blocks of 60 characters per line
     outstream = StringIO(encoded)
@@ -124,40 +129,55 @@ def _AsciiHexEncode(input):
     output.seek(0)
     return output.read()
 
+# The ASCII85 characters for each value of a pair of base-85 digits.
+_base85Pairs = [chr(c1 + 33) + chr(c2 + 33)
+                for c1 in range(85) for c2 in range(85)]
+
+
+def _AsciiBase85EncodeWords(body):
+    """Encodes a string of whole 4-byte words. Works on all the words at
+    once with numpy when it is available."""
+    if numpy is not None:
+        words = numpy.frombuffer(body, dtype='>u4').astype(numpy.uint32)
+        digits = numpy.empty((len(words), 5), dtype=numpy.uint8)
+        temp = words.copy()
+        for i in range(4, -1, -1):
+            digits[:, i] = temp % 85 + 33
+            temp //= 85
+        zeros = words == 0
+        if zeros.any():
+            # special case; the NULs are dropped below
+            digits[zeros] = (ord('z'), 0, 0, 0, 0)
+            return tostr(digits.tobytes().replace(b'\000', b''),
+                         encoding='latin-1')
+        return tostr(digits.tobytes(), encoding='latin-1')
+
+    pairs = _base85Pairs
+    output = []
+    for num in struct.unpack('>%dL' % (len(body) // 4), body):
+        if num == 0:
+            #special case
+            output.append('z')
+        else:
+            #solve for five base-85 numbers, two digits at a time
+            temp, c45 = divmod(num, 7225)
+            c12, c3 = divmod(temp, 85)
+            output.append(pairs[c12] + chr(c3 + 33) + pairs[c45])
+    return ''.join(output)
+
+
 def _AsciiBase85Encode(input):
     """This is a compact encoding used for binary data within
     a PDF file.  Four bytes of binary data become five bytes of
     ASCII.  This is the default method used for encoding images."""
-    outstream = StringIO()
+    input = tobytes(input, encoding='latin-1')
     # special rules apply if not a multiple of four bytes.
     whole_word_count, remainder_size = divmod(len(input), 4)
     cut = 4 * whole_word_count
     body, lastbit = input[0:cut], input[cut:]
 
-    for i in range(whole_word_count):
-        offset = i*4
-        b1 = byteord(body[offset])
-        b2 = byteord(body[offset+1])
-        b3 = byteord(body[offset+2])
-        b4 = byteord(body[offset+3])
-
-        num = 16777216 * b1 + 65536 * b2 + 256 * b3 + b4
-
-        if num == 0:
-            #special case
-            outstream.write('z')
-        else:
-            #solve for five base-85 numbers
-            temp, c5 = divmod(num, 85)
-            temp, c4 = divmod(temp, 85)
-            temp, c3 = divmod(temp, 85)
-            c1, c2 = divmod(temp, 85)
-            assert ((85**4) * c1) + ((85**3) * c2) + ((85**2) * c3) + (85*c4) + c5 == num, 'dodgy code!'
-            outstream.write(chr(c1+33))
-            outstream.write(chr(c2+33))
-            outstream.write(chr(c3+33))
-            outstream.write(chr(c4+33))
-            outstream.write(chr(c5+33))
+    outstream = StringIO()
+    outstream.write(_AsciiBase85EncodeWords(body))
 
     # now we do the final bit at the end.  I repeated this separately as
     # the loop above is the time-critical part of a script, whereas this
@@ -37,7 +37,7 @@ proofpdf v1.21 Aug 28 2018
 proofpdf [-h] [-u]
 proofpdf -help_params
 proofpdf [-g <glyph list>] [-gf <filename>] [-gpp <number>] [-pt <number>] [-dno] [-baseline <number>] [-black] [-lf <filename>] [-select_hints <0,1,2..> ]  \
-[-o <PDF file path> ] -hintplot ] [-charplot] [-digiplot] [-fontplot]  [-waterfallplot] [-wfr <point size list>] font-path1  fontpath2 ...
+[-o <PDF file path> ] -hintplot ] [-charplot] [-digiplot] [-fontplot]  [-waterfallplot] [-wfr <point size list>] [-jobs <number>] font-path1  fontpath2 ...
 
 Glyph Proofing program for OpenType fonts
 """
@@ -176,6 +176,11 @@ is not present, it is set to -120 for CID keyed fonts, else
 
 -black Will set all colors to black; useful when planning to print the PDF.
 
+-jobs <number> Draw the pages in this many worker processes. The pages
+are put together in order in the one PDF file. Default is 1, which draws
+all the pages in the main process. Does not apply to fontsetplot or
+waterfallplot.
+
 -lf <filename> Path name to CID layout file. If supplied, and proofing a
 CID-keyed font, glyphs will be shown in layout file order, and the
 hint dir and row font dir name will be shown in the descriptive meta-data.
@@ -552,6 +557,14 @@ def getOptions(params):
 				params.glyphsPerPage = int( sys.argv[i])
 			except ValueError:
 				raise OptionParseError("Option Error: -glyphsPerPage must be followed by an integer number")
+		elif arg == "-jobs":
+			i = i +1
+			try:
+				params.rt_numJobs = int( sys.argv[i])
+			except ValueError:
+				raise OptionParseError("Option Error: -jobs must be followed by an integer number")
+			if params.rt_numJobs < 1:
+				raise OptionParseError("Option Error: -jobs must be followed by a number greater than 0")
 		elif arg == "-pt":
 			i = i +1
 			try:
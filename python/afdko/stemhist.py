@@ -27,7 +27,7 @@ __usage__ = """
 stemhist program v1.28 Aug 28 2018
 stemhist -h
 stemhist -u
-stemhist [-g <glyph list>] [-gf <filename>] [-xg <glyph list>] [-xgf <filename>] [-all] [-a] [-new] -q font-path1 font-path2...
+stemhist [-g <glyph list>] [-gf <filename>] [-xg <glyph list>] [-xgf <filename>] [-all] [-a] [-new] [-jobs <N>] -q font-path1 font-path2...
 
 Stem and Alignment zone report for OT/CFF fonts.
 Copyright (c) 2006 Adobe Systems Incorporated
@@ -90,6 +90,10 @@ A range of glyphs may be specified by providing two names separated only
 	allows you to use the command: stemhist -new */*/*ps, and apply the
 	tool only to fonts where the report has not yet been run.
 
+-jobs <N>  Examine the glyphs in N worker processes. The glyph list is
+	split into shards, and the partial reports are merged in glyph list
+	order, so the reports are the same as for a single process.
+
 -o report path
 	When this is specified, the path argument is used as the base
 	path for the reports. Otherwise, the font file path is used as the
@@ -117,11 +121,12 @@ from fontTools.misc.py23 import open, tounicode
 from afdko.autohint import (
 	parseGlyphListArg, getGlyphID, getGlyphNames, filterGlyphList, openFile,
 	ACOptionParseError, ACFontError, logMsg, ACreport, expandNames,
-	AUTOHINTEXE)
+	HintEngine)
 from afdko.beztools import *
 import afdko.fdkutils as fdkutils
 import afdko.ufotools as ufotools
 import traceback
+import multiprocessing
 from collections import defaultdict
 
 
@@ -143,6 +148,7 @@ class ACOptions:
 		self.hCounterGlyphs = []
 		self.verbose = 1
 		self.debug = 0
+		self.jobs = 1
 
 
 def getOptions():
@@ -173,6 +179,14 @@ def getOptions():
 			options.reportPath = sys.argv[i]
 		elif arg == "-new":
 			options.new = 1
+		elif arg in ["-jobs", "--jobs"]:
+			i = i +1
+			try:
+				options.jobs = int(sys.argv[i])
+			except (IndexError, ValueError):
+				raise ACOptionParseError("Option Error: option '-jobs' must be followed by the number of worker processes.")
+			if options.jobs < 1:
+				raise ACOptionParseError("Option Error: the number of worker processes must be at least 1.")
 		elif arg in ["-xg", "-g"]:
 			if arg == "-xg":
 				options.excludeGlyphList = 1
@@ -232,6 +246,16 @@ class GlyphReports:
 		self.glyphs[glyphName] = [self.hStemList, self.vStemList, self.charZoneList, self.stemZoneStemList]
 		self.glyphName = glyphName
 
+	def merge(self, other):
+		"""
+		Adds the per-glyph reports collected by another GlyphReports object,
+		such as one filled in by a worker process for a shard of the glyph
+		list. Merging the shards in glyph list order gives the same report
+		lists as collecting all the glyphs in a single object.
+		"""
+		for glyphName, dicts in other.glyphs.items():
+			self.glyphs[glyphName] = dicts
+
 	def addGlyphReport(self, reportString):
 		lines = reportString.splitlines()
 		for line in lines:
@@ -452,16 +476,8 @@ def PrintReports(path, h_stem_list, v_stem_list, top_zone_list, bot_zone_list):
 			print("Error creating file %s!" % fName)
 
 
-def collectStemsFont(path, options):
-	#    use fontTools library to open font and extract CFF table.
-	#    If error, skip font and report error.
+def openFontFile(path):
 	fontFileName = os.path.basename(path)
-	logMsg("")
-	if options.doAlign:
-		logMsg( "Collecting alignment zones for font %s. Start time: %s." % (path, time.asctime()))
-	else:
-		logMsg( "Collecting stems for font %s. Start time: %s." % (path, time.asctime()))
-
 	try:
 		fontData = openFile(path)
 	except (IOError, OSError):
@@ -470,132 +486,180 @@ def collectStemsFont(path, options):
 	except:
 		logMsg( traceback.format_exception_only(sys.exc_info()[0], sys.exc_info()[1])[-1])
 		raise ACFontError("Error parsing font file <%s>." % fontFileName)
+	return fontData
 
-	#   filter specified list, if any, with font list.
-	fontGlyphList = fontData.getGlyphList()
-	glyphList = filterGlyphList(options, fontGlyphList, fontFileName)
-	if not glyphList:
-		raise ACFontError("Error: selected glyph list is empty for font <%s>." % fontFileName)
-
-	tempBez = fdkutils.get_temp_file_path()
-	tempReport = '{}{}'.format(tempBez, ".rpt")
-	tempFI = fdkutils.get_temp_file_path()
 
-	#    open font plist file, if any. If not, create empty font plist.
+def getFontDicts(fontData, path, glyphList):
 	psName = fontData.getPSName()
 
 	#    build alignment zone string
 	allow_no_blues =  1
 	noFlex = 0
 	vCounterGlyphs = hCounterGlyphs = []
-	fdGlyphDict, fontDictList = fontData.getfdInfo(psName, path, allow_no_blues, noFlex, vCounterGlyphs, hCounterGlyphs, glyphList)
+	return fontData.getfdInfo(psName, path, allow_no_blues, noFlex, vCounterGlyphs, hCounterGlyphs, glyphList)
 
-	if fdGlyphDict == None:
-		fdDict = fontDictList[0]
-		with open(tempFI, "w") as fp:
-			fp.write(tounicode(fdDict.getFontInfo()))
-	else:
-		if not options.verbose:
-			logMsg("Note: Using alternate FDDict global values from fontinfo file for some glyphs. Remove option '-q' to see which dict is used for which glyphs.")
 
+def collectGlyphReports(fontData, path, options, glyphList, fdGlyphDict, fontDictList):
+	# Returns a GlyphReports object with the stem or zone reports for the
+	# glyphs in glyphList.
+	psName = fontData.getPSName()
 	removeHints = 1
 	isCID = fontData.isCID()
-	lastFDIndex = None
 	glyphReports = GlyphReports()
+	engine = HintEngine(doAlign=options.doAlign, doStems=not options.doAlign,
+		allStems=options.allStems, debug=options.debug)
 
-	if not options.verbose:
-		dotCount = 0
-		curTime = time.time()
+	def reportJobs():
+		lastFDIndex = None
+		fontInfo = fontDictList[0].getFontInfo()
+		if not options.verbose:
+			dotCount = 0
+			curTime = time.time()
 
-	for name in glyphList:
-		if name == ".notdef":
-			continue
+		for name in glyphList:
+			if name == ".notdef":
+				continue
 
-		if options.verbose:
-			logMsg("Checking %s." %name)
-		else:
-			newTime = time.time()
-			if (newTime - curTime) > 1:
-				print(".", end=' ')
-				sys.stdout.flush()
-				curTime = newTime
-				dotCount +=1
-			if dotCount > 40:
-				dotCount = 0
-				print("")
-
-		# 	Convert to bez format
-		bezString, width, hasHints = fontData.convertToBez(name, removeHints, options.verbose)
-		if bezString == None:
-			continue
-		if "mt" not in bezString:
-			# skip empty glyphs.
-			continue
+			if options.verbose:
+				logMsg("Checking %s." %name)
+			else:
+				newTime = time.time()
+				if (newTime - curTime) > 1:
+					print(".", end=' ')
+					sys.stdout.flush()
+					curTime = newTime
+					dotCount +=1
+				if dotCount > 40:
+					dotCount = 0
+					print("")
+
+			# 	Convert to bez format
+			bezString, width, hasHints = fontData.convertToBez(name, removeHints, options.verbose)
+			if bezString == None:
+				continue
+			if "mt" not in bezString:
+				# skip empty glyphs.
+				continue
 
-		# get new fontinfo string if FD array index has changed, as
-		# as each FontDict has different alignment zones.
-		gid = fontData.getGlyphID(name)
-		if isCID: #
-			fdIndex = fontData.getfdIndex(gid)
-			if not fdIndex == lastFDIndex:
-				lastFDIndex = fdIndex
-				fdDict = fontData.getFontInfo(psName, path, options.allow_no_blues, options.noFlex, options.vCounterGlyphs, options.hCounterGlyphs, fdIndex)
-				with open(tempFI, "w") as fp:
-					fp.write(tounicode(fdDict.getFontInfo()))
-		else:
-			if (fdGlyphDict != None):
-				try:
-					fdIndex = fdGlyphDict[name][0]
-				except KeyError:
-					# use default dict.
-					fdIndex = 0
-				if lastFDIndex != fdIndex:
+			# get new fontinfo string if FD array index has changed, as
+			# as each FontDict has different alignment zones.
+			gid = fontData.getGlyphID(name)
+			if isCID: #
+				fdIndex = fontData.getfdIndex(gid)
+				if not fdIndex == lastFDIndex:
 					lastFDIndex = fdIndex
-					fdDict = fontDictList[fdIndex]
-					with open(tempFI, "w") as fp:
-						fp.write(tounicode(fdDict.getFontInfo()))
+					fdDict = fontData.getFontInfo(psName, path, options.allow_no_blues, options.noFlex, options.vCounterGlyphs, options.hCounterGlyphs, fdIndex)
+					fontInfo = fdDict.getFontInfo()
+			else:
+				if (fdGlyphDict != None):
+					try:
+						fdIndex = fdGlyphDict[name][0]
+					except KeyError:
+						# use default dict.
+						fdIndex = 0
+					if lastFDIndex != fdIndex:
+						lastFDIndex = fdIndex
+						fdDict = fontDictList[fdIndex]
+						fontInfo = fdDict.getFontInfo()
+
+			yield name, fontInfo, bezString
+
+	# 	Call auto-hint library on bez strings.
+	try:
+		for name, report, log in engine.hintGlyphs(reportJobs()):
+			glyphReports.startGlyphName(name)
+			if report is not None:
+				report.strip()
+				if report:
+					glyphReports.addGlyphReport(report)
+					if options.debug:
+						rawData.append(report)
+			else:
+				print("Error - failure in processing outline data")
+			if log:
+				print(log)
+				if "number terminator while" in log:
+					# Raised rather than exiting, as this may run in a pool
+					# worker; the parent process re-raises it.
+					raise ACFontError("Error: failed to read the outline data of glyph %s in font <%s>." % (name, os.path.basename(path)))
+	finally:
+		engine.close()
+	return glyphReports
+
+
+def collectShardReports(path, options, glyphList, shard):
+	# Runs in a worker process. glyphList is the font's full selected glyph
+	# list, so that the FDDicts from the fontinfo file are assigned exactly
+	# as in a serial run; only the glyphs in shard are examined. Returns the
+	# shard's GlyphReports and the raw reports it added to rawData, which
+	# the parent process collects for the -debug output.
+	fontData = openFontFile(path)
+	try:
+		fdGlyphDict, fontDictList = getFontDicts(fontData, path, glyphList)
+		start = len(rawData)
+		glyphReports = collectGlyphReports(fontData, path, options, shard, fdGlyphDict, fontDictList)
+		return glyphReports, rawData[start:]
+	finally:
+		fontData.close()
+
+
+def _collectShardReports(args):
+	return collectShardReports(*args)
+
+
+def collectGlyphReportsInPool(path, options, glyphList):
+	# Splits the glyph list into contiguous shards, collects the reports for
+	# each shard in a pool of worker processes, and merges them in glyph
+	# list order.
+	numShards = min(len(glyphList), options.jobs * 4)
+	shardSize = (len(glyphList) + numShards - 1) // numShards
+	shards = [glyphList[i:i + shardSize] for i in range(0, len(glyphList), shardSize)]
+	pool = multiprocessing.Pool(options.jobs)
+	try:
+		shardReportsList = pool.map(_collectShardReports,
+			[(path, options, glyphList, shard) for shard in shards])
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
 
-		glyphReports.startGlyphName(name)
+	glyphReports = GlyphReports()
+	for shardReports, shardRawData in shardReportsList:
+		glyphReports.merge(shardReports)
+		rawData.extend(shardRawData)
+	return glyphReports
+
+
+def collectStemsFont(path, options):
+	#    use fontTools library to open font and extract CFF table.
+	#    If error, skip font and report error.
+	fontFileName = os.path.basename(path)
+	logMsg("")
+	if options.doAlign:
+		logMsg( "Collecting alignment zones for font %s. Start time: %s." % (path, time.asctime()))
+	else:
+		logMsg( "Collecting stems for font %s. Start time: %s." % (path, time.asctime()))
 
+	fontData = openFontFile(path)
 
-		# 	Call auto-hint library on bez string.
-		with open(tempBez, "w") as bp:
-			bp.write(tounicode(bezString))
+	#   filter specified list, if any, with font list.
+	fontGlyphList = fontData.getGlyphList()
+	glyphList = filterGlyphList(options, fontGlyphList, fontFileName)
+	if not glyphList:
+		raise ACFontError("Error: selected glyph list is empty for font <%s>." % fontFileName)
 
-		if options.doAlign:
-			doAlign = "-ra"
-		else:
-			doAlign = "-rs"
+	fdGlyphDict, fontDictList = getFontDicts(fontData, path, glyphList)
 
-		if options.allStems:
-			allStems = "-a"
-		else:
-			allStems = ""
+	if fdGlyphDict != None:
+		if not options.verbose:
+			logMsg("Note: Using alternate FDDict global values from fontinfo file for some glyphs. Remove option '-q' to see which dict is used for which glyphs.")
 
-		command = AUTOHINTEXE + " -q %s %s  -f \"%s\" \"%s\" 2>&1" % (doAlign, allStems, tempFI, tempBez)
-		if options.debug:
-			print(command)
-		log = fdkutils.runShellCmd(command)
-		if log:
-			print(log)
-			if "number terminator while" in log:
-				print(tempBez)
-				sys.exit()
-
-		if os.path.exists(tempReport):
-			with open(tempReport, "r", encoding='utf-8') as bp:
-				report = bp.read()
-			if options.debug:
-				print("Wrote AC fontinfo data file to", tempFI)
-				print("Wrote AC output rpt file to", tempReport)
-			report.strip()
-			if report:
-				glyphReports.addGlyphReport(report)
-				if options.debug:
-					rawData.append(report)
-		else:
-			print("Error - failure in processing outline data")
-			report = None
+	if options.jobs > 1:
+		glyphReports = collectGlyphReportsInPool(path, options, glyphList)
+	else:
+		glyphReports = collectGlyphReports(fontData, path, options, glyphList, fdGlyphDict, fontDictList)
 
 	h_stem_list, v_stem_list, top_zone_list, bot_zone_list = glyphReports.getReportLists()
 	if options.reportPath:
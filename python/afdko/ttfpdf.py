@@ -7,18 +7,20 @@ run alone.
 __copyright__ = """Copyright 2014 Adobe Systems Incorporated (http://www.adobe.com/). All Rights Reserved.
 """
 
-from fontTools.pens.boundsPen import BoundsPen, BasePen
-from afdko.fontpdf import FontPDFGlyph, FontPDFFont, FontPDFPoint
+from fontTools.pens.boundsPen import BoundsPen
+from afdko.fontpdf import FontPDFGlyph, FontPDFFont, FontPDFPoint, linkPathPoints
 
-class FontPDFPen(BasePen):
+class FontPDFPen(BoundsPen):
+	# Collects the list of points, and the glyph bounds, in one pass.
 	def __init__(self, glyphSet = None):
-		BasePen.__init__(self, glyphSet)
+		BoundsPen.__init__(self, glyphSet)
 		self.pathList = []
 		self.numMT = self.numLT =  self.numCT = self.numPaths = self.total = 0 # These all get set when thge outline is drawn.
 		self.curPt = [0,0]
 		self.noPath = 1
 
 	def _moveTo(self, pt):
+		BoundsPen._moveTo(self, pt)
 		if self.noPath:
 			self.pathList.append([])
 		self.noPath  = 0
@@ -30,6 +32,7 @@ class FontPDFPen(BasePen):
 		curPath.append(pdfPoint)
 
 	def _lineTo(self, pt):
+		BoundsPen._lineTo(self, pt)
 		if self.noPath:
 			self.pathList.append([])
 		self.noPath  = 0
@@ -40,6 +43,19 @@ class FontPDFPen(BasePen):
 		self.curPt = pt
 
 	def _curveToOne(self, pt1, pt2, pt3):
+		BoundsPen._curveToOne(self, pt1, pt2, pt3)
+		self._addCurvePoint(pt1, pt2, pt3)
+
+	def _qCurveToOne(self, pt1, pt2):
+		# The bounds are taken from the quadratic curve; the point list gets the
+		# equivalent cubic curve, as with the BasePen default.
+		pt0 = self._getCurrentPoint()
+		BoundsPen._qCurveToOne(self, pt1, pt2)
+		mid1 = (pt0[0] + 0.66666666666666667 * (pt1[0] - pt0[0]), pt0[1] + 0.66666666666666667 * (pt1[1] - pt0[1]))
+		mid2 = (pt2[0] + 0.66666666666666667 * (pt1[0] - pt2[0]), pt2[1] + 0.66666666666666667 * (pt1[1] - pt2[1]))
+		self._addCurvePoint(mid1, mid2, pt2)
+
+	def _addCurvePoint(self, pt1, pt2, pt3):
 		if self.noPath:
 			self.pathList.append([])
 		self.numCT += 1
@@ -77,6 +93,7 @@ class  txPDFFont(FontPDFFont):
 		self.ascent = None
 		self.descent = None
 		self.blueZones = None
+		self.glyphCache = None
 		self.getEmSquare()
 		self.getBaseLine()
 		self.getBBox()
@@ -155,7 +172,7 @@ class  txPDFGlyph(FontPDFGlyph):
 		txFont = self.parentFont.clientFont
 		glyphSet = txFont.getGlyphSet(preferCFF=1)
 		clientGlyph = glyphSet[self.name]
-		# Get the list of points
+		# Get the list of points, and the bbox.
 		pen = FontPDFPen(None)
 		clientGlyph.draw(pen)
 
@@ -176,22 +193,9 @@ class  txPDFGlyph(FontPDFGlyph):
 		self.numCT = pen.numCT
 		self.numPaths = pen.numPaths
 		self.pathList = pen.pathList
-		for path in self.pathList :
-			lenPath = len(path)
-			path[-1].next = path[0]
-			path[0].last = path[-1]
-			if lenPath > 1:
-				path[0].next = path[1]
-				path[-1].last = path[-2]
-				for i in range(lenPath)[1:-1]:
-					pt = path[i]
-					pt.next =  path[i+1]
-					pt.last =  path[i-1]
+		linkPathPoints(self.pathList)
 
 		assert len(self.pathList) == self.numPaths, " Path lengths don't match %s %s" % (len(self.pathList) , self.numPaths)
-		# get the bbox and width.
-		pen = BoundsPen(None)
-		clientGlyph.draw(pen)
 		self.xAdvance = clientGlyph.width
 		self.BBox = pen.bounds
 		if not self.BBox :
@@ -75,23 +75,34 @@ Adds additional options:
     -nv : suppress version info in output: head.fontRevision and name ID 3.
     -se : show if lookup is wrapped in an Extension lookup type;
             by default, this information is suppressed.
+    -jobs <n> : dump the font files in n worker processes. Default is the
+            number of CPUs. Use '-jobs 1' to dump them in the main process.
+    -cache <dir> : keep the dumps of the CFF, GSUB and GPOS tables in the
+            directory <dir>, keyed by a hash of the table data. A table
+            that is unchanged since a previous run is read from the cache
+            instead of being dumped again.
 
 """
 
 import sys
-from fontTools import ttx
+from fontTools import ttx, version as fontToolsVersion
 from fontTools.ttLib import TTFont, tagToXML, TTLibError
 from fontTools.ttLib.tables.DefaultTable import DefaultTable
 from fontTools.misc.loggingTools import Timer
-from fontTools.misc.py23 import open, basestring
+from fontTools.misc.py23 import open, basestring, tobytes, tounicode
 import copy
+import math
+import struct
 import subprocess
 import re
 import collections
 import textwrap
 import platform
 import getopt
+import hashlib
 import logging
+import multiprocessing
+import os
 
 from afdko.fdkutils import get_temp_file_path
 
@@ -2013,9 +2024,11 @@ class TTXNTTFont(TTFont):
                  checkChecksums=False, verbose=None, recalcBBoxes=True,
                  allowVID=False, ignoreDecompileErrors=False,
                  recalcTimestamp=True, fontNumber=-1, lazy=None, quiet=None,
-                 supressHints=False, showExtensionFlag=False):
+                 supressHints=False, showExtensionFlag=False,
+                 dumpCache=None):
 
         self.filePath = file
+        self.dumpCache = dumpCache
         self.supressHints = supressHints
         self.showExtensionFlag = showExtensionFlag
         TTFont. __init__(self, file, res_name_or_index=res_name_or_index,
@@ -2047,14 +2060,1002 @@ class TTXNTTFont(TTFont):
             attrs['raw'] = True
         writer.begintag(xmlTag, **attrs)
         writer.newline()
+        cacheKey = None
+        if self.dumpCache is not None:
+            cacheKey = self.dumpCache.getKey(self, tag, writer)
+        if cacheKey is None:
+            self._tableContentToXML(writer, tag, table)
+        elif not self.dumpCache.read(cacheKey, writer):
+            self.dumpCache.write(cacheKey, writer, self._tableContentToXML,
+                                 writer, tag, table)
+        writer.endtag(xmlTag)
+        writer.newline()
+        writer.newline()
+
+    def _tableContentToXML(self, writer, tag, table):
         if tag in ("glyf", "CFF "):
-            dumpFont(writer, self.filePath, self.supressHints)
+            dumpFont(writer, self.filePath, self.supressHints, self)
         elif tag in ("GSUB", "GPOS"):
             dumpOTLAsFeatureFile(writer, self, tag)
         else:
             table.toXML(writer, self)
-        writer.endtag(xmlTag)
+
+
+class TeeFile(object):
+    """Passes writes on to a file, and keeps a copy of the data."""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.fp.write(data)
+
+
+class TableDumpCache(object):
+    """Keeps the dumps of the CFF, GSUB and GPOS tables in a directory. Each
+    dump is keyed by a hash of the raw bytes of the table and of the data
+    that its dump depends on: the glyph order, the dump options, and the
+    XML writer settings."""
+
+    kVersion = "1"
+    kTableTags = ("CFF ", "GSUB", "GPOS")
+
+    def __init__(self, dirPath):
+        self.dirPath = dirPath
+        if not os.path.isdir(dirPath):
+            os.makedirs(dirPath)
+
+    def getKey(self, ttFont, tag, writer):
+        reader = ttFont.reader
+        if tag not in self.kTableTags or reader is None:
+            return None
+        if "CFF " in reader:
+            depTags = ["CFF "]
+        else:
+            depTags = ["maxp", "post", "cmap"]
+        if tag == "CFF ":
+            # The top dict dump depends on these tables.
+            depTags.append("OS/2")
+            options = [ttFont.supressHints] + [
+                depTag in reader for depTag in ("cmap", "name", "SING")]
+        else:
+            options = [ttFont.showExtensionFlag]
+        keyHash = hashlib.sha256()
+        keyHash.update(tobytes(repr(
+            (self.kVersion, fontToolsVersion, tag, options,
+             writer.indentlevel, tounicode(writer.indentwhite),
+             tounicode(writer.newlinestr)))))
+        for depTag in [tag] + depTags:
+            if depTag in reader:
+                data = reader[depTag]
+                keyHash.update(tobytes("%s %d\n" % (depTag, len(data))))
+                keyHash.update(data)
+        return keyHash.hexdigest()
+
+    def getPath(self, key):
+        return os.path.join(self.dirPath, key + ".xml")
+
+    def read(self, key, writer):
+        # Writes the cached dump to writer. Returns False if there is none.
+        try:
+            with open(self.getPath(key), "rb") as fp:
+                data = fp.read()
+        except (IOError, OSError):
+            return False
+        log.info("Using the cached dump.")
+        if writer.totype is tounicode:
+            data = tounicode(data, encoding="utf-8")
+        writer.file.write(data)
+        return True
+
+    def write(self, key, writer, dumpFunc, *args):
+        # Calls dumpFunc(*args) with the output to writer copied, and saves
+        # the copy under key.
+        fp = writer.file
+        writer.file = teeFile = TeeFile(fp)
+        try:
+            dumpFunc(*args)
+        finally:
+            writer.file = fp
+        data = b"".join([tobytes(chunk, encoding="utf-8")
+                         for chunk in teeFile.chunks])
+        # Write to a private file first, so that other processes never
+        # see a partial dump.
+        path = self.getPath(key)
+        tempPath = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            with open(tempPath, "wb") as fp:
+                fp.write(data)
+            os.rename(tempPath, path)
+        except (IOError, OSError) as e:
+            # Another process may have saved the same dump meanwhile.
+            if not os.path.exists(path):
+                log.warning("Could not save the dump in the cache: %s", e)
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+
+class TxDumpError(Exception):
+    """Raised when the in-process charstring dump can't reproduce the
+    output of tx, so that dumpFont() falls back to running tx."""
+
+
+# Limits and op codes from the tx charstring library (txops.h).
+kT2MaxOpStack = 48
+kT2MaxStems = 96
+kTxMaxSubrDepth = 10
+kTxStdFlexDepth = 50
+kT2ReservedEscOps = (1, 2, 6, 7, 8, 13, 16, 17, 19, 25, 31, 32, 33)
+# t2cstr.c only treats a 16.16 fixed operand as negative above this value,
+# not above 0x7FFFFFFF, so tx prints an operand from -32768 to about -28648
+# as a large positive number. It is kept so that the dump matches tx.
+kTxFixedSignLimit = 2417483647
+
+# Stem flags, as used by the tx glyph dump callbacks.
+kVertStem = 1
+kCntrStem = 2
+kStem3Stem = 4
+kNewHints = 8
+kNewGroup = 16
+
+_float32 = struct.Struct("f")
+
+
+def _f32(value):
+    # tx does its path arithmetic in single precision.
+    return _float32.unpack(_float32.pack(value))[0]
+
+
+def _fadd(a, b):
+    value = a + b
+    if value.__class__ is float:
+        return _f32(value)
+    return value
+
+
+def _roundf(value):
+    # C roundf(): halfway cases round away from zero.
+    if value < 0 or (value == 0 and math.copysign(1.0, value) < 0):
+        return -float(math.floor(0.5 - value))
+    return float(math.floor(value + 0.5))
+
+
+def _round2(value):
+    # Current point rounding applied by tx after each path operator.
+    if value.__class__ is float:
+        return _f32(_roundf(_f32(value * 100)) / 100.0)
+    return value
+
+
+def _txReal(value):
+    # Formats a coordinate the way writeReal() in tx's dump code does.
+    if value.__class__ is not float:
+        return " %d" % value
+    rounded = _roundf(value)
+    if abs(value - rounded) < 0.0003:
+        return " %d" % rounded
+    value2 = _f32(_roundf(_f32(value * 100)) / 100.0)
+    if value2 == 0 and value < 0:
+        value2 = 0.0
+    text = " %.2f" % value2
+    if text.endswith("00"):
+        text = text[:-3]
+    return text
+
+
+def _unbiasSubr(arg, numSubrs):
+    if numSubrs < 1240:
+        arg += 107
+    elif numSubrs < 33900:
+        arg += 1131
+    else:
+        arg += 32768
+    if arg < 0 or arg >= numSubrs:
+        raise TxDumpError("invalid subroutine number")
+    return arg
+
+
+def _getBytecode(charString):
+    if charString.bytecode is None:
+        charString.compile()
+    return bytearray(charString.bytecode)
+
+
+class TxSubrs(object):
+    """Caches the bytecode of a subroutine INDEX by unbiased number."""
+
+    def __init__(self, subrs):
+        self.subrs = subrs
+        self.numSubrs = len(subrs)
+        self.codes = {}
+
+    def getCode(self, arg):
+        num = _unbiasSubr(arg, self.numSubrs)
+        code = self.codes.get(num)
+        if code is None:
+            code = self.codes[num] = _getBytecode(self.subrs[num])
+        return code
+
+
+class TxCharStringDumper(object):
+    """Interprets Type 2 charstrings the way tx's t2cstr library does, and
+    returns the lines that 'tx -dump -6' prints for each glyph.
+
+    Only the operators that can occur in a name-keyed or CID-keyed CFF font
+    are handled; anything else raises TxDumpError.
+    """
+
+    def __init__(self, globalSubrs, supressHints=False):
+        self.globalSubrs = TxSubrs(globalSubrs)
+        self.doHints = not supressHints
+        self.privateInfo = {}
+        self.ops = {
+            1: self.doHStem,
+            3: self.doVStem,
+            4: self.doVMoveTo,
+            5: self.doRLineTo,
+            6: self.doHLineTo,
+            7: self.doVLineTo,
+            8: self.doRRCurveTo,
+            18: self.doHStem,
+            21: self.doRMoveTo,
+            22: self.doHMoveTo,
+            23: self.doVStem,
+            24: self.doRCurveLine,
+            25: self.doRLineCurve,
+            26: self.doVVCurveTo,
+            27: self.doHHCurveTo,
+            30: self.doVHCurveTo,
+            31: self.doHVCurveTo,
+        }
+
+    def getPrivateInfo(self, private):
+        info = self.privateInfo.get(id(private))
+        if info is None:
+            subrs = TxSubrs(private.Subrs if "Subrs" in private.rawDict
+                            else [])
+            languageGroup = private.rawDict.get("LanguageGroup", 0) == 1
+            info = (subrs, _f32(private.rawDict.get("nominalWidthX", 0)),
+                    _f32(private.rawDict.get("defaultWidthX", 0)),
+                    languageGroup, private)
+            self.privateInfo[id(private)] = info
+        return info
+
+    def dumpGlyph(self, charString):
+        (self.subrs, self.nominalWidthX, self.defaultWidthX,
+         self.languageGroup, _) = self.getPrivateInfo(charString.private)
+        self.out = ["  "]
+        self.stack = []
+        self.stems = []
+        self.x = self.y = 0
+        self.pendWidth = self.pendMask = True
+        self.seenEndchar = False
+        self.subrDepth = 0
+        self.mask = bytearray()
+        self.maskState = self.maskLength = self.maskUnused = 0
+        try:
+            self.decode(_getBytecode(charString))
+        except (IndexError, OverflowError, ValueError) as err:
+            raise TxDumpError("charstring error: %s" % err)
+        self.out.append("  endchar")
+        return self.out[1:]
+
+    def decode(self, code):
+        stack = self.stack
+        i = 0
+        while True:
+            b0 = code[i]
+            i += 1
+            if b0 >= 32:
+                if len(stack) >= kT2MaxOpStack:
+                    raise TxDumpError("operand stack overflow")
+                if b0 < 247:
+                    stack.append(b0 - 139)
+                    continue
+                if b0 < 251:
+                    stack.append((b0 - 247) * 256 + code[i] + 108)
+                elif b0 < 255:
+                    stack.append(-(b0 - 251) * 256 - code[i] - 108)
+                else:
+                    value = (code[i] << 24 | code[i + 1] << 16 |
+                             code[i + 2] << 8 | code[i + 3])
+                    if value > kTxFixedSignLimit:
+                        value -= 4294967296
+                    stack.append(_f32(value / 65536.0))
+                    i += 3
+                i += 1
+                continue
+            elif b0 == 28:
+                if len(stack) >= kT2MaxOpStack:
+                    raise TxDumpError("operand stack overflow")
+                value = code[i] << 8 | code[i + 1]
+                if value > 32767:
+                    value -= 65536
+                stack.append(value)
+                i += 2
+                continue
+            elif b0 == 10 or b0 == 29:  # callsubr, callgsubr
+                if not stack:
+                    raise TxDumpError("operand stack underflow")
+                subrs = self.subrs if b0 == 10 else self.globalSubrs
+                subrCode = subrs.getCode(int(stack.pop()))
+                self.subrDepth += 1
+                if self.subrDepth > kTxMaxSubrDepth:
+                    raise TxDumpError("subroutine depth exceeded")
+                self.decode(subrCode)
+                self.subrDepth -= 1
+                if self.seenEndchar:
+                    return
+                continue
+            elif b0 == 11:  # return
+                return
+            elif b0 == 14:  # endchar
+                self.doEndChar()
+                return
+            elif b0 == 19 or b0 == 20:  # hintmask, cntrmask
+                i = self.doMask(code, i, b0 == 20)
+            elif b0 == 12:
+                b1 = code[i]
+                i += 1
+                if b1 == 38:  # cntron
+                    self.languageGroup = 1
+                    self.genop("cntron")
+                    continue
+                self.doEscape(b1)
+            else:
+                op = self.ops.get(b0)
+                if op is None:
+                    raise TxDumpError("unsupported charstring op %d" % b0)
+                op()
+            del stack[:]
+
+    def checkArgs(self, count):
+        if len(self.stack) < count:
+            raise TxDumpError("operand stack underflow")
+
+    # ----- Output
+
+    def genop(self, name):
+        self.out.append(" %s %s" % ("".join([" %g" % arg for arg in
+                                             self.stack]), name))
+
+    def callbackWidth(self, oddArgs):
+        if self.pendWidth:
+            stack = self.stack
+            if oddArgs == (len(stack) & 1):
+                width = _fadd(stack[0], self.nominalWidthX)
+            else:
+                width = self.defaultWidthX
+            self.out.append("  %g width" % _roundf(width))
+            self.pendWidth = False
+
+    def callbackStem(self, stem, cntr, flags):
+        edge0, edge1 = stem[0], stem[1]
+        vert = flags & kVertStem
+        if cntr:
+            flags |= kCntrStem
+        out = self.out
+        if flags & kNewHints:
+            out.append("  newhints")
+        if flags & kNewGroup:
+            out.append("  newgroup")
+        if flags & kCntrStem:
+            out.append(" " + _txReal(edge0) + _txReal(edge1) +
+                       (" vcntr" if vert else " hcntr"))
+        elif flags & kStem3Stem:
+            out.append(" " + _txReal(edge0) + _txReal(edge1) +
+                       (" vstem3" if vert else " hstem3"))
+        else:
+            width = math.floor(_fadd(edge1, -edge0) + 0.5)
+            if width == -21:
+                out.append(" " + _txReal(edge1) +
+                           (" leftedge" if vert else " bottomedge"))
+            elif width == -20:
+                out.append(" " + _txReal(edge0) +
+                           (" rightedge" if vert else " topedge"))
+            else:
+                out.append(" " + _txReal(edge0) + _txReal(edge1) +
+                           (" vstem" if vert else " hstem"))
+
+    def callbackStems(self, cntr):
+        if cntr:
+            if not any(self.mask):
+                # Null cntrmask; turn off global coloring
+                self.genop("cntroff")
+                return
+            flags = kNewGroup
+        else:
+            flags = 0 if self.pendMask else kNewHints
+        stems = self.stems
+        for j, byte in enumerate(self.mask):
+            index = j * 8
+            while byte:
+                if byte & 0x80:
+                    stem = stems[index]
+                    flags |= stem[2]
+                    self.callbackStem(stem, cntr, flags)
+                    flags = 0
+                byte = (byte << 1) & 0xff
+                index += 1
+        if not cntr:
+            self.pendMask = False
+
+    def callbackPendingStems(self):
+        # No mask before first move; callback initial hints
+        flags = 0
+        for stem in self.stems:
+            flags |= stem[2]
+            self.callbackStem(stem, 0, flags)
+            flags = 0
+        self.pendMask = False
+
+    def callbackMove(self, dx, dy):
+        x = _fadd(self.x, dx)
+        y = _fadd(self.y, dy)
+        if self.maskState == 1:
+            self.savePendCntr(0)
+        if self.doHints and self.pendMask:
+            self.callbackPendingStems()
+        self.x = x = _round2(x)
+        self.y = y = _round2(y)
+        self.out.append(" " + _txReal(x) + _txReal(y) + " move")
+
+    def callbackLine(self, dx, dy):
+        self.x = x = _round2(_fadd(self.x, dx))
+        self.y = y = _round2(_fadd(self.y, dy))
+        self.out.append(" " + _txReal(x) + _txReal(y) + " line")
+
+    def callbackCurve(self, dx1, dy1, dx2, dy2, dx3, dy3):
+        x1 = _fadd(self.x, dx1)
+        y1 = _fadd(self.y, dy1)
+        x2 = _fadd(x1, dx2)
+        y2 = _fadd(y1, dy2)
+        self.x = x3 = _round2(_fadd(x2, dx3))
+        self.y = y3 = _round2(_fadd(y2, dy3))
+        self.out.append(" " + _txReal(x1) + _txReal(y1) + _txReal(x2) +
+                        _txReal(y2) + _txReal(x3) + _txReal(y3) + " curve")
+
+    def callbackFlex(self, args, depth):
+        if not self.doHints:
+            # Callback as 2 curves
+            self.callbackCurve(*args[:6])
+            self.callbackCurve(*args[6:])
+            return
+        points = []
+        x, y = self.x, self.y
+        for j in range(0, 12, 2):
+            x = _fadd(x, args[j])
+            y = _fadd(y, args[j + 1])
+            points.append(x)
+            points.append(y)
+        self.x = points[10] = _round2(points[10])
+        self.y = points[11] = _round2(points[11])
+        self.out.append(" " + "".join([_txReal(v) for v in points[:6]]))
+        self.out.append(" " + "".join([_txReal(v) for v in points[6:]]) +
+                        _txReal(depth) + " flex")
+
+    # ----- Hints
+
+    def addStems(self, vert):
+        stack = self.stack
+        stems = self.stems
+        if len(stems) + len(stack) // 2 > kT2MaxStems:
+            raise TxDumpError("stem overflow")
+        flags = kVertStem if vert else 0
+        lastEdge = 0
+        for j in range(len(stack) & 1, len(stack) - 1, 2):
+            edge0 = _fadd(lastEdge, stack[j])
+            lastEdge = _fadd(edge0, stack[j + 1])
+            stems.append([edge0, lastEdge, flags])
+        self.maskLength = (len(stems) + 7) // 8
+        self.maskUnused = (1 << (self.maskLength * 8 - len(stems))) - 1
+
+    def validStem3(self):
+        hcntrs = vcntrs = 0
+        for j, byte in enumerate(self.mask):
+            index = j * 8
+            while byte:
+                if byte & 0x80:
+                    if self.stems[index][2] & kVertStem:
+                        vcntrs += 1
+                    else:
+                        hcntrs += 1
+                byte = (byte << 1) & 0xff
+                index += 1
+        return (hcntrs, vcntrs) in ((0, 3), (3, 0), (3, 3))
+
+    def savePendCntr(self, cntr):
+        if cntr or self.languageGroup == 1 or not self.validStem3():
+            self.callbackStems(1)
+        else:
+            # Do stem3; mark stem3 stems
+            for j, byte in enumerate(self.mask):
+                index = j * 8
+                while byte:
+                    if byte & 0x80:
+                        self.stems[index][2] |= kStem3Stem
+                    byte = (byte << 1) & 0xff
+                    index += 1
+        self.maskState = 2
+
+    def doMask(self, code, i, cntr):
+        self.callbackWidth(1)
+        if self.maskState == 1:
+            self.savePendCntr(cntr)
+        if len(self.stack) > 1:
+            # Stem args on stack; must be omitted vstem(hm) op
+            self.addStems(1)
+        length = self.maskLength
+        if length <= 0 or length > kT2MaxStems // 8:
+            raise TxDumpError("invalid hint mask")
+        mask = code[i:i + length]
+        if len(mask) != length:
+            raise TxDumpError("truncated hint mask")
+        mask[-1] &= ~self.maskUnused & 0xff
+        self.mask = mask
+        if self.doHints:
+            if cntr and self.maskState == 0:
+                # Save first cntrmask
+                self.maskState = 1
+            else:
+                self.callbackStems(cntr)
+        return i + length
+
+    # ----- Operators
+
+    def doHStem(self):
+        self.callbackWidth(1)
+        self.addStems(0)
+
+    def doVStem(self):
+        self.callbackWidth(1)
+        self.addStems(1)
+
+    def doRMoveTo(self):
+        self.callbackWidth(1)
+        self.checkArgs(2)
+        dy = self.stack.pop()
+        dx = self.stack.pop()
+        self.callbackMove(dx, dy)
+
+    def doHMoveTo(self):
+        self.callbackWidth(0)
+        self.checkArgs(1)
+        self.callbackMove(self.stack.pop(), 0)
+
+    def doVMoveTo(self):
+        self.callbackWidth(0)
+        self.checkArgs(1)
+        self.callbackMove(0, self.stack.pop())
+
+    def doRLineTo(self):
+        stack = self.stack
+        self.checkArgs(2)
+        for i in range(0, len(stack) - 1, 2):
+            self.callbackLine(stack[i], stack[i + 1])
+
+    def doHLineTo(self):
+        self.doAltLineTo(1)
+
+    def doVLineTo(self):
+        self.doAltLineTo(0)
+
+    def doAltLineTo(self, horz):
+        self.checkArgs(1)
+        for arg in self.stack:
+            if horz & 1:
+                self.callbackLine(arg, 0)
+            else:
+                self.callbackLine(0, arg)
+            horz += 1
+
+    def doRRCurveTo(self):
+        stack = self.stack
+        self.checkArgs(6)
+        for i in range(0, len(stack) - 5, 6):
+            self.callbackCurve(*stack[i:i + 6])
+
+    def doRCurveLine(self):
+        stack = self.stack
+        self.checkArgs(8)
+        i = 0
+        while i < len(stack) - 5:
+            self.callbackCurve(*stack[i:i + 6])
+            i += 6
+        if i < len(stack) - 1:
+            self.callbackLine(stack[i], stack[i + 1])
+
+    def doRLineCurve(self):
+        stack = self.stack
+        self.checkArgs(8)
+        i = 0
+        while i < len(stack) - 6:
+            self.callbackLine(stack[i], stack[i + 1])
+            i += 2
+        self.callbackCurve(*stack[i:i + 6])
+
+    def doVVCurveTo(self):
+        stack = self.stack
+        if len(stack) & 1:
+            self.checkArgs(5)
+            self.callbackCurve(stack[0], stack[1], stack[2], stack[3],
+                               0, stack[4])
+            i = 5
+        else:
+            self.checkArgs(4)
+            i = 0
+        while i < len(stack) - 3:
+            self.callbackCurve(0, stack[i], stack[i + 1], stack[i + 2],
+                               0, stack[i + 3])
+            i += 4
+
+    def doHHCurveTo(self):
+        stack = self.stack
+        if len(stack) & 1:
+            self.checkArgs(5)
+            self.callbackCurve(stack[1], stack[0], stack[2], stack[3],
+                               stack[4], 0)
+            i = 5
+        else:
+            self.checkArgs(4)
+            i = 0
+        while i < len(stack) - 3:
+            self.callbackCurve(stack[i], 0, stack[i + 1], stack[i + 2],
+                               stack[i + 3], 0)
+            i += 4
+
+    def doVHCurveTo(self):
+        self.doAltCurveTo(0)
+
+    def doHVCurveTo(self):
+        self.doAltCurveTo(1)
+
+    def doAltCurveTo(self, horz):
+        stack = self.stack
+        self.checkArgs(4)
+        adjust = 5 if len(stack) & 1 else 0
+        i = 0
+        while i < len(stack) - adjust - 3:
+            if horz & 1:
+                self.callbackCurve(stack[i], 0, stack[i + 1], stack[i + 2],
+                                   0, stack[i + 3])
+            else:
+                self.callbackCurve(0, stack[i], stack[i + 1], stack[i + 2],
+                                   stack[i + 3], 0)
+            horz += 1
+            i += 4
+        if adjust:
+            # Add last curve
+            if horz & 1:
+                self.callbackCurve(stack[i], 0, stack[i + 1], stack[i + 2],
+                                   stack[i + 4], stack[i + 3])
+            else:
+                self.callbackCurve(0, stack[i], stack[i + 1], stack[i + 2],
+                                   stack[i + 3], stack[i + 4])
+
+    def doEndChar(self):
+        self.callbackWidth(1)
+        stack = self.stack
+        if len(stack) > 1:
+            self.checkArgs(4)
+            achar = stack.pop()
+            bchar = stack.pop()
+            ady = stack.pop()
+            adx = stack.pop()
+            if not (0 <= achar < 256 and 0 <= bchar < 256):
+                raise TxDumpError("invalid seac component")
+            self.out.append("  %g %g %d %d seac" % (adx, ady, bchar, achar))
+        self.seenEndchar = True
+
+    def doEscape(self, escop):
+        stack = self.stack
+        if escop == 0:  # dotsection
+            if self.doHints:
+                self.genop("dotsection")
+        elif escop == 34:  # hflex
+            self.checkArgs(7)
+            self.callbackFlex((stack[0], 0, stack[1], stack[2], stack[3], 0,
+                               stack[4], 0, stack[5], -stack[2], stack[6], 0),
+                              kTxStdFlexDepth)
+        elif escop == 35:  # flex
+            self.checkArgs(13)
+            self.callbackFlex(stack[:12], stack[12])
+        elif escop == 36:  # hflex1
+            self.checkArgs(9)
+            dy1, dy2, dy5 = stack[1], stack[3], stack[7]
+            self.callbackFlex((stack[0], dy1, stack[2], dy2, stack[4], 0,
+                               stack[5], 0, stack[6], dy5, stack[8],
+                               -_fadd(_fadd(dy1, dy2), dy5)),
+                              kTxStdFlexDepth)
+        elif escop == 37:  # flex1
+            self.checkArgs(11)
+            dx = dy = 0
+            for i in range(0, 10, 2):
+                dx = _fadd(dx, stack[i])
+                dy = _fadd(dy, stack[i + 1])
+            if abs(dx) > abs(dy):
+                dx = stack[10]
+                dy = -dy
+            else:
+                dx = -dx
+                dy = stack[10]
+            self.callbackFlex(tuple(stack[:10]) + (dx, dy), kTxStdFlexDepth)
+        elif escop not in kT2ReservedEscOps:
+            raise TxDumpError("unsupported charstring op 12 %d" % escop)
+
+
+def _txString(name, value):
+    # Formats a string the way dumpString() in tx's dump code does. The
+    # result holds one character per byte; see TxFontDumper.getTopDictText.
+    value = tounicode(value, encoding="latin-1").split("\0", 1)[0]
+    value = re.sub(r"\r\n?", "\n", value)
+    value = re.sub(r"[\x00-\x09\x0b-\x1f\x7f]",
+                   lambda match: "\\x%02X" % ord(match.group()), value)
+    return "%-20s\"%s\"" % (name, value)
+
+
+def _txRealArray(name, values):
+    # Delta-encoded arrays are accumulated in single precision.
+    result = []
+    last = 0
+    total = 0
+    for value in values:
+        total = _f32(total + _f32(value - last))
+        result.append(total)
+        last = value
+    return "%-20s{%s}" % (name, ",".join(["%g" % value for value in result]))
+
+
+def _txIntArray(name, values):
+    return "%-20s{%s}" % (name, ",".join(["%d" % int(value)
+                                          for value in values]))
+
+
+class TxFontDumper(object):
+    """Produces the FontTopDict and FontOutlines sections of a CFF font
+    directly from the fontTools objects, matching 'tx -dump' byte for byte.
+    Raises TxDumpError for the font features whose tx output it does not
+    reproduce."""
+
+    kDefaultMatrix = [_f32(0.001), 0, 0, _f32(0.001), 0, 0]
+
+    def __init__(self, ttFont, supressHints=False):
+        self.ttFont = ttFont
+        self.supressHints = supressHints
+        reader = ttFont.reader
+        tableTags = reader.keys() if reader is not None else []
+        if "cmap" not in tableTags:
+            raise TxDumpError("font has no cmap table")
+        if "name" not in tableTags and "SING" in tableTags:
+            raise TxDumpError("SING glyphlet")
+        self.fsType = None
+        if "OS/2" in tableTags:
+            data = reader["OS/2"]
+            if len(data) < 10:
+                raise TxDumpError("short OS/2 table")
+            self.fsType = struct.unpack(">H", data[8:10])[0]
+        self.cff = ttFont["CFF "].cff
+        self.fontName = self.cff.fontNames[0]
+        self.topDict = self.cff[self.fontName]
+        rawDict = self.topDict.rawDict
+        self.isCID = "ROS" in rawDict
+        if self.isCID != ("FDSelect" in rawDict):
+            raise TxDumpError("incomplete CID-keyed font")
+        if self.isCID:
+            self.fontDicts = list(self.topDict.FDArray)
+            matrix = rawDict.get("FontMatrix")
+            if matrix is not None and list(matrix) != [1, 0, 0, 1, 0, 0]:
+                raise TxDumpError("non-identity CID FontMatrix")
+        else:
+            if "Private" not in rawDict:
+                raise TxDumpError("font has no Private dict")
+            self.fontDicts = [self.topDict]
+        for fontDict in self.fontDicts:
+            matrix = fontDict.rawDict.get("FontMatrix")
+            if (matrix is not None and
+                    [_f32(value) for value in matrix] != self.kDefaultMatrix):
+                raise TxDumpError("non-default FontMatrix")
+        for key in ("PostScript", "SyntheticBase"):
+            if key in rawDict:
+                raise TxDumpError("unsupported top dict key %s" % key)
+        self.glyphOrder = self.topDict.charset
+        if len(set(self.glyphOrder)) != len(self.glyphOrder):
+            raise TxDumpError("duplicate glyph names")
+
+    def getTopDictText(self):
+        """Returns the text of 'tx -dump -0', less the Filename line."""
+        rawDict = self.topDict.rawDict
+        lines = ["## Top Dict"]
+        for key in ("version", "Notice", "Copyright", "FullName",
+                    "FamilyName", "Weight"):
+            if key in rawDict:
+                lines.append(_txString(key, rawDict[key]))
+        self.checkBoolean(rawDict.get("isFixedPitch", 0))
+        if rawDict.get("isFixedPitch", 0):
+            lines.append("isFixedPitch        true")
+        for key, default in (("ItalicAngle", 0), ("UnderlinePosition", -100),
+                             ("UnderlineThickness", 50)):
+            value = _f32(rawDict.get(key, default))
+            if value != default:
+                lines.append("%-20s%g" % (key, value))
+        if "UniqueID" in rawDict:
+            lines.append("UniqueID            %d" % int(rawDict["UniqueID"]))
+        bbox = [_f32(value) for value in rawDict.get("FontBBox", [0] * 4)]
+        if any(bbox):
+            lines.append("FontBBox            {%g,%g,%g,%g}" % tuple(bbox))
+        strokeWidth = _f32(rawDict.get("StrokeWidth", 0))
+        if strokeWidth != 0:
+            lines.append("StrokeWidth         %g" % strokeWidth)
+        if "XUID" in rawDict:
+            lines.append(_txIntArray("XUID", rawDict["XUID"]))
+        if "BaseFontName" in rawDict:
+            lines.append(_txString("BaseFontName", rawDict["BaseFontName"]))
+        if "BaseFontBlend" in rawDict:
+            lines.append(_txIntArray("BaseFontBlend",
+                                     rawDict["BaseFontBlend"]))
+        if self.fsType is not None:
+            lines.append("FSType              %d" % self.fsType)
+        if self.isCID:
+            registry, ordering, supplement = rawDict["ROS"]
+            lines.append(_txString("cid.CIDFontName", self.fontName))
+            lines.append(_txString("cid.Registry", registry))
+            lines.append(_txString("cid.Ordering", ordering))
+            lines.append("cid.Supplement      %d" % int(supplement))
+            version = _f32(rawDict.get("CIDFontVersion", 0))
+            if version != 0:
+                lines.append("cid.CIDFontVersion  %.03f" % version)
+            revision = int(rawDict.get("CIDFontRevision", 0))
+            if revision != 0:
+                lines.append("cid.CIDFontRevision %d" % revision)
+            count = int(rawDict.get("CIDCount", 8720))
+            if count != 8720:
+                lines.append("cid.CIDCount        %d" % count)
+            if "UIDBase" in rawDict:
+                lines.append("cid.UIDBase         %d" %
+                             int(rawDict["UIDBase"]))
+            lines.append("sup.flags           0x00000001 (ABF_CID_FONT)")
+            lines.append("sup.srcFontType     CFF (cid-keyed)")
+        else:
+            lines.append("sup.srcFontType     CFF (name-keyed)")
+        lines.append("sup.nGlyphs         %d" % len(self.glyphOrder))
+
+        for i, fontDict in enumerate(self.fontDicts):
+            lines.append("## FontDict[%d]" % i)
+            if self.isCID:
+                if "FontName" in fontDict.rawDict:
+                    lines.append(_txString("FontName",
+                                           fontDict.rawDict["FontName"]))
+            else:
+                lines.append(_txString("FontName", self.fontName))
+            paintType = int(fontDict.rawDict.get("PaintType", 0))
+            if paintType != 0:
+                lines.append("PaintType           %d" % paintType)
+            lines.append("## Private")
+            lines.extend(self.getPrivateLines(fontDict.Private))
+        text = "\n".join(lines) + "\n"
+        # tx writes the bytes of the dict strings as they are, and the
+        # dump file is read back as UTF-8.
+        return text.encode("latin-1").decode("utf-8").strip()
+
+    @staticmethod
+    def checkBoolean(value):
+        # tx silently resets out of range booleans.
+        if value not in (0, 1):
+            raise TxDumpError("invalid boolean value")
+
+    def getPrivateLines(self, private):
+        rawDict = private.rawDict
+        lines = []
+        zones = [key for key in ("BlueValues", "OtherBlues", "FamilyBlues",
+                                 "FamilyOtherBlues") if rawDict.get(key)]
+        if "BlueValues" in rawDict and "BlueValues" not in zones:
+            raise TxDumpError("empty BlueValues")
+        for key in zones:
+            values = rawDict[key]
+            if len(values) & 1 or any(values[i] > values[i + 1]
+                                      for i in range(0, len(values), 2)):
+                raise TxDumpError("invalid %s" % key)
+            lines.append(_txRealArray(key, values))
+        for key, default in (("BlueScale", 0.039625), ("BlueShift", 7),
+                             ("BlueFuzz", 1)):
+            value = _f32(rawDict.get(key, default))
+            if value != _f32(default):
+                lines.append("%-20s%g" % (key, value))
+        for key, snapKey in (("StdHW", "StemSnapH"), ("StdVW", "StemSnapV")):
+            self.checkStemSnap(rawDict.get(key), rawDict.get(snapKey))
+            if key in rawDict:
+                lines.append("%-20s%g" % (key, _f32(rawDict[key])))
+        for key in ("StemSnapH", "StemSnapV"):
+            if key in rawDict:
+                lines.append(_txRealArray(key, rawDict[key]))
+        forceBold = int(rawDict.get("ForceBold", 0))
+        languageGroup = int(rawDict.get("LanguageGroup", 0))
+        self.checkBoolean(forceBold)
+        self.checkBoolean(languageGroup)
+        if forceBold:
+            lines.append("ForceBold           true")
+        if languageGroup:
+            lines.append("LanguageGroup       %d" % languageGroup)
+        expansionFactor = _f32(rawDict.get("ExpansionFactor", 0.06))
+        if expansionFactor != _f32(0.06):
+            lines.append("ExpansionFactor     %g" % expansionFactor)
+        seed = _f32(rawDict.get("initialRandomSeed", 0))
+        if seed != 0:
+            lines.append("initialRandomSeed   %g" % seed)
+        return lines
+
+    @staticmethod
+    def checkStemSnap(std, stemSnap):
+        # tx replaces inconsistent StdHW/StdVW values and drops unordered
+        # StemSnap arrays.
+        if stemSnap is not None:
+            if not stemSnap:
+                raise TxDumpError("empty StemSnap array")
+            if any(stemSnap[i - 1] >= stemSnap[i]
+                   for i in range(1, len(stemSnap))):
+                raise TxDumpError("unordered StemSnap array")
+        if std is None:
+            if stemSnap is not None:
+                raise TxDumpError("StemSnap array without std width")
+        elif std < 0 or std > 500:
+            raise TxDumpError("invalid std width")
+        elif stemSnap is not None and _f32(std) not in [
+                _f32(value) for value in stemSnap]:
+            raise TxDumpError("std width not in StemSnap array")
+
+    def getGlyphEntries(self, cidNames):
+        # Returns (name, glyphName) pairs in the order the dump lists them.
+        entries = []
+        for gid, glyphName in enumerate(self.glyphOrder):
+            if self.isCID:
+                name = str(int(glyphName[3:]) if gid else 0)
+            else:
+                try:
+                    name = tobytes(glyphName,
+                                   encoding="latin-1").decode("utf-8")
+                except UnicodeError:
+                    raise TxDumpError("unsupported glyph name")
+                if any(char <= " " or char in ",}" for char in name):
+                    raise TxDumpError("unsupported glyph name")
+            if cidNames:
+                name = "cid" + name.zfill(5)
+            entries.append((name, glyphName))
+        entries.sort()
+        return entries
+
+    def writeOutlines(self, writer, fontPath, cidNames):
+        """Writes the FontOutlines section one glyph at a time. If a glyph
+        can't be dumped in-process, the rest of the glyphs are taken from
+        the tx dump."""
+        entries = self.getGlyphEntries(cidNames)
+        charStrings = self.topDict.CharStrings
+        dumper = TxCharStringDumper(self.cff.GlobalSubrs, self.supressHints)
+        writer.begintag("FontOutlines")
         writer.newline()
+        lastName = None
+        for name, glyphName in entries:
+            try:
+                lines = dumper.dumpGlyph(charStrings[glyphName])
+            except TxDumpError as err:
+                log.info("Using tx for the remaining glyph outlines: %s", err)
+                charList = getTxCharList(fontPath, self.supressHints,
+                                         cidNames)
+                for entry in charList:
+                    if (lastName is None or
+                            entry.split("\n", 1)[0] > lastName):
+                        for line in entry.splitlines():
+                            writer._writeraw(line)
+                            writer.newline()
+                break
+            writer._writeraw(name)
+            writer.newline()
+            for line in lines:
+                writer._writeraw(line)
+                writer.newline()
+            lastName = name
+        writer.endtag("FontOutlines")
         writer.newline()
 
 
@@ -2069,20 +3070,8 @@ def shellcmd(cmdList):
     return data
 
 
-def dumpFont(writer, fontPath, supressHints=False):
-    dictTxt = shellcmd([TX_TOOL, "-dump", "-0", fontPath])
-    if curSystem == "Windows":
-        dictTxt = re.sub(r"[\r\n]+", "\n", dictTxt)
-    dictTxt = re.sub(r"##[^\r\n]*Filename[^\r\n]+", "", dictTxt, 1).strip()
-    dictLines = dictTxt.splitlines()
-    writer.begintag("FontTopDict")
-    writer.newline()
-    for line in dictLines:
-        writer._writeraw(line)
-        writer.newline()
-    writer.endtag("FontTopDict")
-    writer.newline()
-
+def getTxCharList(fontPath, supressHints, cidNames):
+    # Returns the glyph entries of 'tx -dump -6', sorted by name.
     if supressHints:
         charData = shellcmd([TX_TOOL, "-dump", "-6", "-n", fontPath])
     else:
@@ -2092,13 +3081,48 @@ def dumpFont(writer, fontPath, supressHints=False):
         charData = re.sub(r"[\r\n]+", "\n", charData)
     charList = re.findall(r"[^ ]glyph\[[^]]+\] {([^,]+),[^\r\n]+,([^}]+)",
                           charData)
-    if "cid.CIDFontName" in dictTxt:
+    if cidNames:
         # fix glyph names to sort
         charList = [("cid%s" % (entry[0]).zfill(5),
                      entry[1]) for entry in charList]
 
-    charList = sorted([entry[0] + entry[1] for entry in charList])
-    charTxt = "\n".join(charList)
+    return sorted([entry[0] + entry[1] for entry in charList])
+
+
+def dumpFont(writer, fontPath, supressHints=False, ttFont=None):
+    fontDumper = None
+    if ttFont is not None and "CFF " in ttFont:
+        try:
+            fontDumper = TxFontDumper(ttFont, supressHints)
+            dictTxt = fontDumper.getTopDictText()
+        except TxDumpError as err:
+            log.info("Using tx to dump the CFF table: %s", err)
+            fontDumper = None
+    if fontDumper is None:
+        dictTxt = shellcmd([TX_TOOL, "-dump", "-0", fontPath])
+        if curSystem == "Windows":
+            dictTxt = re.sub(r"[\r\n]+", "\n", dictTxt)
+        dictTxt = re.sub(r"##[^\r\n]*Filename[^\r\n]+", "", dictTxt,
+                         1).strip()
+    dictLines = dictTxt.splitlines()
+    writer.begintag("FontTopDict")
+    writer.newline()
+    for line in dictLines:
+        writer._writeraw(line)
+        writer.newline()
+    writer.endtag("FontTopDict")
+    writer.newline()
+
+    cidNames = "cid.CIDFontName" in dictTxt
+    if fontDumper is not None:
+        try:
+            fontDumper.writeOutlines(writer, fontPath, cidNames)
+            return
+        except TxDumpError as err:
+            # Raised before any glyph was written.
+            log.info("Using tx to dump the glyph outlines: %s", err)
+
+    charTxt = "\n".join(getTxCharList(fontPath, supressHints, cidNames))
     writer.begintag("FontOutlines")
     writer.newline()
     for line in charTxt.splitlines():
@@ -2110,7 +3134,7 @@ def dumpFont(writer, fontPath, supressHints=False):
 
 @Timer(log, 'Done dumping TTX in %(time).3f seconds')
 def ttnDump(input_file, output, options, showExtensionFlag, supressHints=False,
-            supressVersions=False, supressTTFDiffs=False):
+            supressVersions=False, supressTTFDiffs=False, dumpCache=None):
     log.info('Dumping "%s" to "%s"...', input_file, output)
     if options.unicodedata:
         from fontTools.unicode import setUnicodeData
@@ -2118,7 +3142,7 @@ def ttnDump(input_file, output, options, showExtensionFlag, supressHints=False,
     ttf = TTXNTTFont(input_file, 0, allowVID=options.allowVID,
                      ignoreDecompileErrors=options.ignoreDecompileErrors,
                      fontNumber=options.fontNumber, supressHints=supressHints,
-                     showExtensionFlag=showExtensionFlag)
+                     showExtensionFlag=showExtensionFlag, dumpCache=dumpCache)
 
     kDoNotDumpTagList = ["GlyphOrder", "DSIG"]
     if options.onlyTables:
@@ -2269,6 +3293,41 @@ def ttnDump(input_file, output, options, showExtensionFlag, supressHints=False,
     return ttf
 
 
+def initDumpWorker(logLevel, dumpArgs):
+    from fontTools import configLogger
+
+    global gWorkerDumpArgs
+    configLogger(level=logLevel)
+    gWorkerDumpArgs = dumpArgs
+
+
+def dumpJob(job):
+    # Runs in a dump worker process. Returns an error message, or None.
+    input_file, output = job
+    try:
+        ttnDump(input_file, output, *gWorkerDumpArgs)
+    except TTLibError as e:
+        return str(e)
+    return None
+
+
+def runDumpJobs(jobs, options, dumpArgs, numJobs):
+    # Dumps the fonts in a pool of worker processes. The errors are logged
+    # in the order of the jobs. Returns 1 if any dump failed.
+    result = 0
+    pool = multiprocessing.Pool(numJobs, initDumpWorker,
+                                (options.logLevel, dumpArgs))
+    try:
+        for error in pool.imap(dumpJob, jobs):
+            if error is not None:
+                log.error(error)
+                result = 1
+    finally:
+        pool.terminate()
+        pool.join()
+    return result
+
+
 def main(args=None):
     from fontTools import configLogger
 
@@ -2306,6 +3365,29 @@ def main(args=None):
     else:
         supressTTFDiffs = False
 
+    numJobs = multiprocessing.cpu_count()
+    if "-jobs" in args:
+        i = args.index("-jobs")
+        try:
+            numJobs = int(args[i + 1])
+        except (IndexError, ValueError):
+            numJobs = 0
+        if numJobs < 1:
+            print("ERROR: option -jobs must be followed by the number of "
+                  "worker processes.", file=sys.stderr)
+            return 2
+        del args[i:i + 2]
+
+    dumpCache = None
+    if "-cache" in args:
+        i = args.index("-cache")
+        if i + 1 >= len(args):
+            print("ERROR: option -cache must be followed by a directory "
+                  "path.", file=sys.stderr)
+            return 2
+        dumpCache = TableDumpCache(args[i + 1])
+        del args[i:i + 2]
+
     try:
         jobs, options = ttx.parseOptions(args)
     except getopt.GetoptError as e:
@@ -2314,13 +3396,19 @@ def main(args=None):
 
     configLogger(level=options.logLevel)
 
+    for action, input_file, output in jobs:
+        if action != ttx.ttDump:
+            log.error("ttxn can only dump font files.")
+            return 1
+    dumpArgs = (options, showExtensionFlag, supressHints, supressVersions,
+                supressTTFDiffs, dumpCache)
+    if numJobs > 1 and len(jobs) > 1:
+        return runDumpJobs([job[1:] for job in jobs], options, dumpArgs,
+                           min(numJobs, len(jobs)))
+
     try:
         for action, input_file, output in jobs:
-            if action != ttx.ttDump:
-                log.error("ttxn can only dump font files.")
-                return 1
-            ttnDump(input_file, output, options, showExtensionFlag,
-                    supressHints, supressVersions, supressTTFDiffs)
+            ttnDump(input_file, output, *dumpArgs)
     except SystemExit:
         raise
     except TTLibError as e:
@@ -2,10 +2,16 @@
 
 from __future__ import print_function, absolute_import
 
+import ast
 import hashlib
+import io
+import json
+import multiprocessing
 import os
 import plistlib
 import re
+from collections import deque
+from multiprocessing.pool import ThreadPool
 
 try:
     import xml.etree.cElementTree as ET
@@ -108,6 +114,22 @@ list to contain just the current program. If the old and new hash match, but
 the program name is not in the history list, then the ufotools will not skip
 the glyph, and will add the program name to the history list.
 
+The hash map is stored in the UFO data directory as a JSON lines file,
+"com.adobe.type.processedHashMap.jsonl". The first line holds the hash map
+version; each following line holds one glyph entry, as
+'["glyphName", "srcHash", ["program", ...]]'. Only the entries that changed
+are appended when the hash map is saved, and the last line for a glyph wins,
+so a run which touches a few glyphs does not rewrite the whole file. The file
+is compacted once the stale lines outnumber the live entries.
+
+Other tools, such as psautohint and older versions of the FDK, read and write
+the hash map as "com.adobe.type.processedHashMap", in the form of a Python dict
+literal. That file is rewritten whenever a hash map entry changes, so that it
+stays in sync. When it is newer than the JSON lines file, because another tool
+has updated it, or when there is no JSON lines file yet, it is read instead,
+with ast.literal_eval() so that the file's contents are never run as code, and
+the JSON lines file is rebuilt from it.
+
 
 The only tools using this are, at the moment, checkoutlines, checkoutlinesufo
 and autohint. checkoutlines and checkoutlinesufo use the hash map to skip
@@ -336,10 +358,13 @@ kLibName = "lib.plist"
 kPublicGlyphOrderKey = "public.glyphOrder"
 
 kAdobeDomainPrefix = "com.adobe.type"
-kAdobHashMapName = "%s.processedHashMap" % (kAdobeDomainPrefix)
+kAdobHashMapName = "%s.processedHashMap.jsonl" % (kAdobeDomainPrefix)
+kAdobLegacyHashMapName = "%s.processedHashMap" % (kAdobeDomainPrefix)
 kAdobHashMapVersionName = "hashMapVersion"
 kAdobHashMapVersion = (1, 0)  # If major version differs, do not use.
 kAutohintName = "autohint"
+# Stands in for the glyph width in cached component hash data.
+kHashWidthPlaceholder = "\x00width"
 kCheckOutlineName = "checkOutlines"
 kCheckOutlineNameUFO = "checkOutlines"
 
@@ -367,6 +392,10 @@ kPointName = "name"
 # Hint stuff
 kStackLimit = 46
 kStemLimit = 96
+# Bulk GLIF reading: number of reader threads, and of glyphs read ahead of
+# the glyph being converted.
+kMaxGLIFReadThreads = 8
+kGLIFReadAhead = 64
 
 
 class UFOParseError(Exception):
@@ -398,6 +427,23 @@ class UFOFontData(object):
         self.programName = programName
         self.curSrcDir = None
         self.hashMapChanged = 0
+        # Names of the glyphs whose hash map entries must be saved.
+        self.changedHashEntries = set()
+        # True if the legacy hash map file must be rewritten when saved.
+        self.legacyHashMapChanged = False
+        # Number of entry lines in the hash map file, or None if the file
+        # must be rewritten in full when saved.
+        self.hashMapFileLines = None
+        # Component outline data used in glyph hashes, by
+        # (glyphName, useDefaultGlyphDir). See getComponentHashData().
+        self.componentHashCache = {}
+        # Maps a base glyph name to the names of the composite glyphs
+        # which reference it.
+        self.componentDependents = {}
+        # GLIF root elements, and whether the GLIF file has hints, by file
+        # path, read ahead of use by convertGLIFsToBez().
+        self.prefetchedGLIFs = {}
+        self.prefetchedHintFlags = {}
         self.glyphDefaultDir = os.path.join(parentPath, "glyphs")
         self.glyphLayerDir = os.path.join(parentPath, kProcessedGlyphsLayer)
         self.glyphWriteDir = self.glyphLayerDir
@@ -439,7 +485,10 @@ class UFOFontData(object):
     def checkForHints(self, glyphName):
         hasHints = 0
         glyphPath = self.getGlyphProcessedPath(glyphName)
-        if glyphPath and os.path.exists(glyphPath):
+        if glyphPath in self.prefetchedHintFlags:
+            if os.path.exists(glyphPath):
+                hasHints = self.prefetchedHintFlags[glyphPath]
+        elif glyphPath and os.path.exists(glyphPath):
             with open(glyphPath, "r", encoding='utf-8') as fp:
                 data = fp.read()
             if "hintSetList" in data:
@@ -454,6 +503,17 @@ class UFOFontData(object):
         hasHints = self.checkForHints(glyphName)
         return bezString, width, hasHints
 
+    def convertGlyphsToBez(self, glyphList, removeHints, beVerbose, doAll=0):
+        """
+        Yields (glyphName, bezString, width, hasHints) for each glyph in
+        glyphList, as convertToBez() would return them. The GLIF files are
+        read and parsed ahead on a thread pool.
+        """
+        for glyphName, bezString, width, skip in convertGLIFsToBez(
+                self, glyphList, doAll):
+            hasHints = self.checkForHints(glyphName)
+            yield glyphName, bezString, width, hasHints
+
     def updateFromBez(self, bezData, glyphName, width, beVerbose):
         # XXX unused args: width, beVerbose
         # For UFO font, we don't use the width parameter:
@@ -469,12 +529,16 @@ class UFOFontData(object):
         if not os.path.exists(self.glyphWriteDir):
             os.makedirs(self.glyphWriteDir)
 
+        # Only the GLIF files whose data differs from what is already on
+        # disk are written. When a glyph's hints have not changed, the
+        # file is left alone.
         for glyphName, glifXML in self.newGlyphMap.items():
             glyphPath = self.getWriteGlyphPath(glyphName)
-            # print("Saving file", glyphPath)
-            with open(glyphPath, "wb") as fp:
-                et = ET.ElementTree(glifXML)
-                et.write(fp, encoding="UTF-8", xml_declaration=True)
+            fp = io.BytesIO()
+            et = ET.ElementTree(glifXML)
+            et.write(fp, encoding="UTF-8", xml_declaration=True)
+            if writeFileIfChanged(glyphPath, fp.getvalue()):
+                self.invalidateComponentHash(glyphName)
 
         # Update the layer contents.plist file
         layerContentsFilePath = os.path.join(
@@ -505,11 +569,20 @@ class UFOFontData(object):
         return self.glyphMap
 
     def readHashMap(self):
-        hashPath = os.path.join(self.parentPath, "data", kAdobHashMapName)
-        if os.path.exists(hashPath):
-            with open(hashPath, "r", encoding='utf-8') as fp:
-                data = fp.read()
-            newMap = eval(data)
+        hashDir = os.path.join(self.parentPath, "data")
+        hashPath = os.path.join(hashDir, kAdobHashMapName)
+        legacyPath = os.path.join(hashDir, kAdobLegacyHashMapName)
+        self.changedHashEntries = set()
+        self.legacyHashMapChanged = False
+        self.hashMapFileLines = None
+        if os.path.exists(hashPath) and not (
+                os.path.exists(legacyPath) and
+                os.path.getmtime(legacyPath) > os.path.getmtime(hashPath)):
+            newMap, self.hashMapFileLines = readHashMapFile(hashPath)
+        elif os.path.exists(legacyPath):
+            # Rebuild the JSON lines file from it when the font is closed.
+            newMap = readLegacyHashMapFile(legacyPath)
+            self.hashMapChanged = 1
         else:
             newMap = {kAdobHashMapVersionName: kAdobHashMapVersion}
 
@@ -521,11 +594,22 @@ class UFOFontData(object):
             elif version[0] < kAdobHashMapVersion[0]:
                 print("Updating hash map: was older version")
                 newMap = {kAdobHashMapVersionName: kAdobHashMapVersion}
+                self.hashMapFileLines = None
         except KeyError:
             print("Updating hash map: was older version")
             newMap = {kAdobHashMapVersionName: kAdobHashMapVersion}
+            self.hashMapFileLines = None
         self.hashMap = newMap
 
+    def setHashEntry(self, glyphName, srcHash, historyList):
+        hashEntry = [srcHash, historyList]
+        if self.hashMap.get(glyphName) == hashEntry:
+            return
+        self.hashMap[glyphName] = hashEntry
+        self.changedHashEntries.add(glyphName)
+        self.legacyHashMapChanged = True
+        self.hashMapChanged = 1
+
     def writeHashMap(self):
         hashMap = self.hashMap
         if len(hashMap) == 0:
@@ -536,15 +620,43 @@ class UFOFontData(object):
             os.makedirs(hashDir)
         hashPath = os.path.join(hashDir, kAdobHashMapName)
 
-        hasMapKeys = sorted(hashMap.keys())
-        data = ["{"]
-        for gName in hasMapKeys:
-            data.append("'%s': %s," % (gName, hashMap[gName]))
-        data.append("}")
-        data.append("")
-        data = '\n'.join(data)
-        with open(hashPath, "w") as fp:
-            fp.write(tounicode(data))
+        # The legacy file is written first, so that the JSON lines file is
+        # never older than it after a save.
+        legacyPath = os.path.join(hashDir, kAdobLegacyHashMapName)
+        if self.legacyHashMapChanged or not os.path.exists(legacyPath):
+            writeLegacyHashMapFile(legacyPath, hashMap)
+        self.legacyHashMapChanged = False
+
+        numEntries = len(hashMap) - (kAdobHashMapVersionName in hashMap)
+        changedNames = sorted(
+            gName for gName in self.changedHashEntries if gName in hashMap)
+        numLines = self.hashMapFileLines
+        if (numLines is not None) and os.path.exists(hashPath) and (
+                numLines + len(changedNames) <= 2 * numEntries):
+            # Append only the changed entries.
+            data = [formatHashEntry(gName, hashMap[gName])
+                    for gName in changedNames]
+            with open(hashPath, "a", encoding='utf-8') as fp:
+                fp.write(tounicode("".join(data)))
+            self.hashMapFileLines = numLines + len(changedNames)
+        else:
+            # Write a compacted copy of the whole hash map.
+            version = hashMap.get(kAdobHashMapVersionName,
+                                  kAdobHashMapVersion)
+            data = [tounicode(json.dumps(
+                {kAdobHashMapVersionName: list(version)})) + "\n"]
+            for gName in sorted(hashMap.keys()):
+                if gName == kAdobHashMapVersionName:
+                    continue
+                data.append(formatHashEntry(gName, hashMap[gName]))
+            tempPath = hashPath + ".tmp"
+            with open(tempPath, "w", encoding='utf-8') as fp:
+                fp.write(tounicode("".join(data)))
+            if os.path.exists(hashPath):
+                os.remove(hashPath)
+            os.rename(tempPath, hashPath)
+            self.hashMapFileLines = numEntries
+        self.changedHashEntries = set()
 
     def getCurGlyphPath(self, glyphName):
         if self.curSrcDir is None:
@@ -609,16 +721,16 @@ class UFOFontData(object):
         except KeyError:
             hashEntry = None
 
-        self.hashMapChanged = 1
         # If the program always reads data from the default layer,
         # and we have just created a new glyph in the processed layer,
         # then reset the history.
         if (not self.useProcessedLayer) and changed:
-            self.hashMap[glyphName] = [srcHash, [self.programName]]
+            self.setHashEntry(glyphName, srcHash, [self.programName])
             return
         # If the program is not in the history list, add it.
         elif self.programName not in historyList:
-            historyList.append(self.programName)
+            self.setHashEntry(
+                glyphName, srcHash, historyList + [self.programName])
 
     def checkSkipGlyph(self, glyphName, newSrcHash, doAll):
         skip = False
@@ -653,14 +765,16 @@ class UFOFontData(object):
             if not skip:
                 # case for Checkoutlines
                 if not self.useProcessedLayer:
-                    self.hashMapChanged = 1
-                    self.hashMap[glyphName] = [newSrcHash, [self.programName]]
+                    self.setHashEntry(
+                        glyphName, newSrcHash, [self.programName])
                     glyphPath = self.getGlyphProcessedPath(glyphName)
                     if glyphPath and os.path.exists(glyphPath):
                         os.remove(glyphPath)
+                        self.invalidateComponentHash(glyphName)
                 else:
                     if (programHistoryIndex < 0):
-                        historyList.append(self.programName)
+                        self.setHashEntry(glyphName, srcHash,
+                                          historyList + [self.programName])
         else:
             # case for autohint
             if self.useProcessedLayer:
@@ -681,19 +795,21 @@ class UFOFontData(object):
 
             # If the source hash has changed, we need to
             # delete the processed layer glyph.
-            self.hashMapChanged = 1
-            self.hashMap[glyphName] = [newSrcHash, [self.programName]]
+            self.setHashEntry(glyphName, newSrcHash, [self.programName])
             glyphPath = self.getGlyphProcessedPath(glyphName)
             if glyphPath and os.path.exists(glyphPath):
                 os.remove(glyphPath)
+                self.invalidateComponentHash(glyphName)
                 self.deletedGlyph = True
 
         return skip
 
     def getGlyphXML(self, glyphDir, glyphFileName):
         glyphPath = os.path.join(glyphDir, glyphFileName)  # default
-        etRoot = ET.ElementTree()
-        glifXML = etRoot.parse(glyphPath)
+        glifXML = self.prefetchedGLIFs.pop(glyphPath, None)
+        if glifXML is None:
+            etRoot = ET.ElementTree()
+            glifXML = etRoot.parse(glyphPath)
         outlineXML = glifXML.find("outline")
         try:
             widthXML = glifXML.find("advance")
@@ -747,6 +863,32 @@ class UFOFontData(object):
 
         return width, outlineXML, skip
 
+    def getPrefetchPaths(self, glyphName):
+        """
+        Returns the paths of the GLIF files that getOrSkipGlyphXML() may
+        read for a glyph.
+        """
+        glyphFileName = self.glyphMap.get(glyphName)
+        if not glyphFileName:
+            return []
+        glyphPaths = [os.path.join(self.glyphDefaultDir, glyphFileName)]
+        if self.useProcessedLayer and self.processedLayerGlyphMap:
+            glyphFileName = self.processedLayerGlyphMap.get(
+                glyphName, glyphFileName)
+            glyphPaths.append(os.path.join(self.glyphLayerDir, glyphFileName))
+        elif self.processedLayerGlyphMap:
+            # Only checkForHints() reads the processed layer glyph.
+            glyphFileName = self.processedLayerGlyphMap.get(glyphName)
+            if glyphFileName:
+                glyphPaths.append(
+                    os.path.join(self.glyphLayerDir, glyphFileName))
+        return glyphPaths
+
+    def clearPrefetchedGLIFs(self, glyphName):
+        for glyphPath in self.getPrefetchPaths(glyphName):
+            self.prefetchedGLIFs.pop(glyphPath, None)
+            self.prefetchedHintFlags.pop(glyphPath, None)
+
     def getGlyphList(self):
         if len(self.glyphMap) == 0:
             self.loadGlyphMap()
@@ -816,22 +958,17 @@ class UFOFontData(object):
                     seenProcessedGlyph = 1
                 if (layerPath == kDefaultGlyphsLayer):
                     seenPublicDefault = 1
-            update = 0
             if not seenPublicDefault:
-                update = 1
                 contentsList = [[kDefaultGlyphsLayerName,
                                 kDefaultGlyphsLayer]] + contentsList
             if not seenProcessedGlyph:
-                update = 1
                 contentsList.append([kProcessedGlyphsLayerName,
                                     kProcessedGlyphsLayer])
-            if update:
-                plistlib.writePlist(contentsList, contentsFilePath)
         else:
             contentsList = [[kDefaultGlyphsLayerName, kDefaultGlyphsLayer]]
             contentsList.append([kProcessedGlyphsLayerName,
                                 kProcessedGlyphsLayer])
-        plistlib.writePlist(contentsList, contentsFilePath)
+        writePlistIfChanged(contentsList, contentsFilePath)
 
     def updateLayerGlyphContents(self, contentsFilePath, newGlyphData):
         if os.path.exists(contentsFilePath):
@@ -848,7 +985,7 @@ class UFOFontData(object):
                     contentsDict[glyphName] = self.glyphMap[glyphName]
             else:
                 contentsDict[glyphName] = self.glyphMap[glyphName]
-        plistlib.writePlist(contentsDict, contentsFilePath)
+        writePlistIfChanged(contentsDict, contentsFilePath)
 
     def getFontInfo(self, fontPSName, inputPath, allow_no_blues, noFlex,
                     vCounterGlyphs, hCounterGlyphs, fdIndex=0):
@@ -1092,8 +1229,6 @@ class UFOFontData(object):
                             "'%s' component file is missing: '%s'." %
                             (compGlyphName, componentPath))
 
-                    etRoot = ET.ElementTree()
-
                     # Collect transformm fields, if any.
                     for transformTag in ["xScale", "xyScale", "yxScale",
                                          "yScale", "xOffset", "yOffset"]:
@@ -1105,12 +1240,12 @@ class UFOFontData(object):
                             dataList.append(value)
                         except KeyError:
                             pass
-                    componentXML = etRoot.parse(componentPath)
-                    componentOutlineXML = componentXML.find("outline")
-                    componentHash, componentDataList = \
-                        self.buildGlyphHashValue(
-                            width, componentOutlineXML, glyphName,
-                            useDefaultGlyphDir, level + 1)
+                    if level == 0:
+                        self.componentDependents.setdefault(
+                            compGlyphName, set()).add(glyphName)
+                    componentDataList = self.getComponentHashData(
+                        width, compGlyphName, componentPath, glyphName,
+                        useDefaultGlyphDir, level + 1)
                     dataList.extend(componentDataList)
         data = "".join(dataList)
         if len(data) < 128:
@@ -1119,6 +1254,84 @@ class UFOFontData(object):
             hash = hashlib.sha512(data.encode("ascii")).hexdigest()
         return hash, dataList
 
+    def getComponentHashData(self, width, compGlyphName, componentPath,
+                             glyphName, useDefaultGlyphDir, level):
+        """
+        Returns the hash data list for a component glyph's outline. The
+        data is cached by glyph name for the run, and is re-read only if
+        the component's GLIF file path, modification time or size differ
+        from the cached entry, or if the entry has been dropped by
+        invalidateComponentHash().
+
+        The hash data of a component, and of its nested components, starts
+        with the width of the glyph being hashed, so the cached data keeps
+        the positions of the width items, and these are filled in on use.
+        """
+        fileStat = os.stat(componentPath)
+        stamp = (componentPath, fileStat.st_mtime, fileStat.st_size)
+        key = (compGlyphName, useDefaultGlyphDir)
+        entry = self.componentHashCache.get(key)
+        if (entry is not None) and (entry[0] != stamp):
+            # The file has changed since it was hashed.
+            self.invalidateComponentHash(compGlyphName)
+            entry = None
+
+        if entry is None:
+            etRoot = ET.ElementTree()
+            componentXML = etRoot.parse(componentPath)
+            componentOutlineXML = componentXML.find("outline")
+            componentHash, componentDataList = self.buildGlyphHashValue(
+                kHashWidthPlaceholder, componentOutlineXML, glyphName,
+                useDefaultGlyphDir, level)
+            widthItem = "w%s" % kHashWidthPlaceholder
+            widthIndexes = [i for i, item in enumerate(componentDataList)
+                            if item == widthItem]
+
+            # The nested components have been cached by the call above;
+            # record them as bases of this glyph, and note the nesting depth.
+            depth = 0
+            if componentOutlineXML:
+                for childContour in componentOutlineXML:
+                    if childContour.tag != "component":
+                        continue
+                    baseName = childContour.attrib["base"]
+                    self.componentDependents.setdefault(
+                        baseName, set()).add(compGlyphName)
+                    baseEntry = self.componentHashCache.get(
+                        (baseName, useDefaultGlyphDir))
+                    if baseEntry is not None:
+                        depth = max(depth, baseEntry[1] + 1)
+            entry = (stamp, depth, componentDataList, widthIndexes)
+            self.componentHashCache[key] = entry
+
+        stamp, depth, componentDataList, widthIndexes = entry
+        if level + depth > 10:
+            raise UFOParseError(
+                "In parsing component, exceeded 10 levels of reference. "
+                "'%s'. " % (glyphName))
+        componentDataList = list(componentDataList)
+        widthItem = "w%s" % (str(width))
+        for i in widthIndexes:
+            componentDataList[i] = widthItem
+        return componentDataList
+
+    def invalidateComponentHash(self, glyphName):
+        """
+        Drops the cached component hash data for a glyph, and for all
+        the composite glyphs which use it, directly or through other
+        composites.
+        """
+        toDo = [glyphName]
+        seen = set()
+        while toDo:
+            gName = toDo.pop()
+            if gName in seen:
+                continue
+            seen.add(gName)
+            self.componentHashCache.pop((gName, True), None)
+            self.componentHashCache.pop((gName, False), None)
+            toDo.extend(self.componentDependents.get(gName, ()))
+
     def getComponentOutline(self, componentItem):
         try:
             compGlyphName = componentItem.attrib["base"]
@@ -1169,13 +1382,17 @@ class UFOFontData(object):
 
     def clearHashMap(self):
         self.hashMap = {kAdobHashMapVersionName: kAdobHashMapVersion}
+        self.changedHashEntries = set()
+        self.legacyHashMapChanged = False
+        self.hashMapFileLines = None
         hashDir = os.path.join(self.parentPath, "data")
         if not os.path.exists(hashDir):
             return
 
-        hashPath = os.path.join(hashDir, kAdobHashMapName)
-        if os.path.exists(hashPath):
-            os.remove(hashPath)
+        for fileName in [kAdobHashMapName, kAdobLegacyHashMapName]:
+            hashPath = os.path.join(hashDir, fileName)
+            if os.path.exists(hashPath):
+                os.remove(hashPath)
 
     def setWriteToDefault(self):
         self.useProcessedLayer = False
@@ -1183,6 +1400,85 @@ class UFOFontData(object):
         self.glyphWriteDir = self.glyphDefaultDir
 
 
+def writeFileIfChanged(filePath, data):
+    """
+    Writes data to filePath, unless the file already holds exactly that
+    data. Returns True if the file was written.
+    """
+    if os.path.exists(filePath) and os.path.getsize(filePath) == len(data):
+        with open(filePath, "rb") as fp:
+            if fp.read() == data:
+                return False
+    with open(filePath, "wb") as fp:
+        fp.write(data)
+    return True
+
+
+def writePlistIfChanged(value, filePath):
+    fp = io.BytesIO()
+    plistlib.writePlist(value, fp)
+    return writeFileIfChanged(filePath, fp.getvalue())
+
+
+def formatHashEntry(glyphName, hashEntry):
+    srcHash, historyList = hashEntry
+    return tounicode(json.dumps([glyphName, srcHash, historyList])) + "\n"
+
+
+def readHashMapFile(hashPath):
+    """
+    Reads a JSON lines hash map file. Returns the hash map, and the number
+    of entry lines in the file. A line which cannot be parsed, such as a
+    partly written last line, is skipped: the glyph will be processed
+    again.
+    """
+    hashMap = {}
+    numLines = 0
+    with open(hashPath, "r", encoding='utf-8') as fp:
+        header = fp.readline()
+        try:
+            version = json.loads(header)[kAdobHashMapVersionName]
+            hashMap[kAdobHashMapVersionName] = tuple(version)
+        except (ValueError, KeyError, TypeError):
+            return hashMap, None
+        for line in fp:
+            numLines += 1
+            try:
+                glyphName, srcHash, historyList = json.loads(line)
+            except ValueError:
+                continue
+            hashMap[glyphName] = [srcHash, historyList]
+    return hashMap, numLines
+
+
+def readLegacyHashMapFile(hashPath):
+    """
+    Reads a hash map file in the legacy format, which is a Python dict
+    literal. A file that can't be parsed gives an empty hash map, so that
+    all glyphs are processed again.
+    """
+    with open(hashPath, "r", encoding='utf-8') as fp:
+        data = fp.read()
+    try:
+        hashMap = ast.literal_eval(data)
+    except (ValueError, SyntaxError):
+        return {}
+    if not isinstance(hashMap, dict):
+        return {}
+    return hashMap
+
+
+def writeLegacyHashMapFile(hashPath, hashMap):
+    data = ["{"]
+    for gName in sorted(hashMap.keys()):
+        data.append("'%s': %s," % (gName, hashMap[gName]))
+    data.append("}")
+    data.append("")
+    data = '\n'.join(data)
+    with open(hashPath, "w") as fp:
+        fp.write(tounicode(data))
+
+
 def parseGlyphOrder(filePath):
     orderMap = None
     if os.path.exists(filePath):
@@ -1588,11 +1884,89 @@ def convertGLIFToBez(ufoFontData, glyphName, doAll=0):
     if outlineXML is None:
         return None, width
 
+    bezString = convertOutlineXMLToBez(ufoFontData, glyphName, outlineXML)
+    return bezString, width
+
+
+def convertOutlineXMLToBez(ufoFontData, glyphName, outlineXML):
     curX = curY = 0
     bezString, curX, curY = convertGlyphOutlineToBezString(
         outlineXML, ufoFontData, curX, curY)
     bezString = (r"%%%s%ssc " % (glyphName, os.linesep)) + bezString + " ed"
-    return bezString, width
+    return bezString
+
+
+def readGLIFFiles(glyphPaths):
+    """
+    Reads and parses GLIF files. Returns a list of (path, root element,
+    hasHints) for each file which could be read. Files which cannot be
+    read or parsed are left for the caller to read again, and report.
+    """
+    glifData = []
+    for glyphPath in glyphPaths:
+        try:
+            with open(glyphPath, "rb") as fp:
+                data = fp.read()
+            glifXML = ET.fromstring(data)
+        except (IOError, OSError, SyntaxError):
+            continue
+        glifData.append((glyphPath, glifXML, b"hintSetList" in data))
+    return glifData
+
+
+def convertGLIFsToBez(ufoFontData, glyphList=None, doAll=0, numThreads=None):
+    """
+    Yields (glyphName, bezString, width, skip) for each glyph in
+    glyphList, or in the font's glyph order if glyphList is None.
+    bezString is None if the glyph was skipped or has no outline.
+
+    The GLIF files are read and parsed on a thread pool, up to
+    kGLIFReadAhead glyphs ahead of the glyph being converted, so the
+    caller can start on the first glyphs while the rest are read. The hash
+    map checks and the bez conversion are done in glyph order on the
+    calling thread, just as by convertGLIFToBez().
+    """
+    if len(ufoFontData.glyphMap) == 0:
+        ufoFontData.loadGlyphMap()
+    if glyphList is None:
+        glyphList = ufoFontData.glyphList
+    if numThreads is None:
+        numThreads = min(kMaxGLIFReadThreads, multiprocessing.cpu_count())
+
+    pool = ThreadPool(max(1, numThreads))
+    try:
+        pending = deque()
+        glyphIter = iter(glyphList)
+        while True:
+            while len(pending) < kGLIFReadAhead:
+                try:
+                    glyphName = next(glyphIter)
+                except StopIteration:
+                    break
+                glyphPaths = ufoFontData.getPrefetchPaths(glyphName)
+                pending.append((glyphName, pool.apply_async(
+                    readGLIFFiles, (glyphPaths,))))
+            if not pending:
+                break
+
+            glyphName, asyncResult = pending.popleft()
+            for glyphPath, glifXML, hasHints in asyncResult.get():
+                ufoFontData.prefetchedGLIFs[glyphPath] = glifXML
+                ufoFontData.prefetchedHintFlags[glyphPath] = hasHints
+            width, outlineXML, skip = ufoFontData.getOrSkipGlyphXML(
+                glyphName, doAll)
+            if skip or (outlineXML is None):
+                bezString = None
+            else:
+                bezString = convertOutlineXMLToBez(
+                    ufoFontData, glyphName, outlineXML)
+            yield glyphName, bezString, width, skip
+            ufoFontData.clearPrefetchedGLIFs(glyphName)
+    finally:
+        pool.terminate()
+        pool.join()
+        ufoFontData.prefetchedGLIFs.clear()
+        ufoFontData.prefetchedHintFlags.clear()
 
 
 class HintMask:
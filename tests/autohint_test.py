@@ -2,9 +2,11 @@ from __future__ import print_function, division, absolute_import
 
 import os
 import pytest
-from shutil import copy2
+from shutil import copy2, copytree
 import tempfile
 
+from afdko.autohint import HintCache, HintEngine, openFile
+from afdko.ufotools import convertGLIFsToBez
 from runner import main as runner
 from differ import main as differ
 from test_utils import (get_input_path, get_expected_path, get_temp_file_path,
@@ -92,3 +94,151 @@ def test_basic_hinting(font_filename, opt):
 
     expected_path = get_expected_path(expected_filename)
     assert differ([expected_path, actual_path] + diff_mode + skip)
+
+
+@pytest.mark.parametrize('font_filename', ['font.otf', 'ufo3.ufo'])
+def test_hinting_with_jobs(font_filename):
+    # the fontinfo file defines several FDDicts, so that the glyphs are
+    # sent to the workers in more than one group
+    _copy_fontinfo_file()
+    if 'ufo' in font_filename:
+        actual_path = tempfile.mkdtemp()
+    else:
+        actual_path = get_temp_file_path()
+
+    runner(CMD + ['-f', get_input_path(font_filename),
+                  '-o', 'o', '_{}'.format(actual_path), 'jobs', '_3'])
+
+    head, tail = os.path.splitext(font_filename)
+    expected_filename = '{}-fi{}'.format(head, tail)
+    skip = []
+    if 'otf' in font_filename:
+        expected_filename = head + '-fi.ttx'
+        actual_path = generate_ttx_dump(actual_path, ['CFF '])
+        skip = ['-l', '2']  # <ttFont sfntVersion=
+
+    expected_path = get_expected_path(expected_filename)
+    assert differ([expected_path, actual_path] + skip)
+
+
+@pytest.mark.parametrize('font_filename', ['font.otf', 'cidfont.otf'])
+def test_hint_engine_library_matches_autohintexe(font_filename):
+    font_path = get_input_path(font_filename)
+    font_data = openFile(font_path)
+    ps_name = font_data.getPSName()
+    jobs = []
+    for name in font_data.getGlyphList():
+        bez, _, _ = font_data.convertToBez(name, 1, 1)
+        if bez is None or 'mt' not in bez:
+            continue
+        fd_index = 0
+        if font_data.isCID():
+            fd_index = font_data.getfdIndex(font_data.getGlyphID(name))
+        fd_dict = font_data.getFontInfo(ps_name, font_path, 0, 1, [], [],
+                                        fd_index)
+        jobs.append((name, fd_dict.getFontInfo(), bez))
+    font_data.close()
+
+    lib_engine = HintEngine(verbose=0)
+    if not lib_engine.useLibrary:
+        pytest.skip('psautohint extension module is not available')
+    exe_engine = HintEngine(verbose=0, useLibrary=False)
+    pool_engine = HintEngine(verbose=0, numJobs=3)
+    lib_results = [result[:2] for result in lib_engine.hintGlyphs(jobs)]
+    exe_results = [result[:2] for result in exe_engine.hintGlyphs(jobs)]
+    pool_results = [result[:2] for result in pool_engine.hintGlyphs(jobs)]
+    exe_engine.close()
+    assert [job[0] for job in jobs] == [result[0] for result in exe_results]
+    assert lib_results == exe_results
+    assert lib_results == pool_results
+
+
+@pytest.mark.parametrize('report_mode', [0, 1])
+def test_hint_engine_glyph_fails_mid_batch(report_mode):
+    font_path = get_input_path('font.otf')
+    font_data = openFile(font_path)
+    fd_dict = font_data.getFontInfo(font_data.getPSName(), font_path, 0, 1,
+                                    [], [], 0)
+    jobs = []
+    for name in font_data.getGlyphList():
+        bez, _, _ = font_data.convertToBez(name, 1, 1)
+        if bez is not None and 'mt' in bez:
+            jobs.append((name, fd_dict.getFontInfo(), bez))
+    font_data.close()
+    # autohintexe stops at a glyph with an unknown operator
+    bad_name, font_info, bez = jobs[1]
+    jobs[1] = (bad_name, font_info, bez.replace(' dt', ' xx', 1))
+
+    engine = HintEngine(verbose=0, doStems=report_mode, useLibrary=False)
+    results = list(engine.hintGlyphs(jobs))
+    expected = [(job[0],) + engine.hintGlyph(*job) for job in jobs]
+    engine.close()
+    assert len(jobs) > 2
+    assert results == expected
+    for name, new_bez, log in results:
+        if name == bad_name:
+            assert 'Unknown operator' in log
+        else:
+            assert new_bez is not None and not log
+
+
+def test_hinting_with_cache():
+    _copy_fontinfo_file()
+    cache_dir = tempfile.mkdtemp()
+    for _ in range(2):
+        actual_path = get_temp_file_path()
+        runner(CMD + ['-f', get_input_path('font.pfa'),
+                      '-o', 'o', '_{}'.format(actual_path),
+                      'cache', '_{}'.format(cache_dir)])
+        expected_path = get_expected_path('font-fi.pfa')
+        assert differ([expected_path, actual_path])
+    assert os.listdir(cache_dir)
+
+
+def test_hint_cache_lru_eviction():
+    cache_dir = tempfile.mkdtemp()
+    cache = HintCache(cache_dir, maxSize=10)
+    keys = [HintCache.makeKey('flags', 'fontinfo', str(i)) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, 'hinted{}'.format(i))
+        path = cache.getPath(key)
+        os.utime(path, (i, i))
+    assert cache.get(keys[0]) == 'hinted0'  # refreshes the first entry
+    assert cache.get(HintCache.makeKey('other')) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+    assert cache.get(keys[0]) == 'hinted0'
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is None
+
+
+@pytest.mark.parametrize('font_filename', ['ufo2.ufo', 'ufo3.ufo'])
+def test_bulk_glif_to_bez_matches_single(font_filename):
+    font_path = get_input_path(font_filename)
+    font_data = openFile(font_path)
+    glyph_list = font_data.getGlyphList()
+    expected = [(name,) + font_data.convertToBez(name, 1, 1)
+                for name in glyph_list]
+    font_data = openFile(font_path)
+    assert list(font_data.convertGlyphsToBez(glyph_list, 1, 1)) == expected
+    assert list(convertGLIFsToBez(font_data, numThreads=3)) == [
+        (name, bez, width, 0) for name, bez, width, _ in expected]
+
+
+def test_rehinting_ufo_leaves_unchanged_glifs_alone():
+    # hint a copy in its own directory, so that both runs see the same
+    # (absent) fontinfo file
+    actual_path = os.path.join(tempfile.mkdtemp(), 'font.ufo')
+    copytree(get_input_path('ufo3.ufo'), actual_path)
+    runner(CMD + ['-f', actual_path])
+    layer_dir = os.path.join(actual_path,
+                             'glyphs.com.adobe.type.processedGlyphs')
+    file_names = os.listdir(layer_dir)
+    assert file_names
+    for file_name in file_names:
+        os.utime(os.path.join(layer_dir, file_name), (1, 1))
+
+    # hint all glyphs again: the output is the same, so nothing is written
+    runner(CMD + ['-f', actual_path, '-o', 'a'])
+    for file_name in file_names:
+        assert os.path.getmtime(os.path.join(layer_dir, file_name)) == 1
@@ -3,6 +3,9 @@ from __future__ import print_function, division, absolute_import
 import os
 from shutil import copytree
 import tempfile
+from array import array
+
+import pytest
 
 from runner import main as runner
 from differ import main as differ
@@ -16,14 +19,35 @@ CMD = ['-t', TOOL]
 # Tests
 # -----
 
-def test_cjk_vf():
+@pytest.mark.parametrize('num_jobs', ['1', '2'])
+def test_cjk_vf(num_jobs):
     input_dir = get_input_path('CJKVar')
     temp_dir = os.path.join(tempfile.mkdtemp(), 'CJKVar')
     copytree(input_dir, temp_dir)
     ds_path = os.path.join(temp_dir, 'CJKVar.designspace')
-    runner(CMD + ['-o', 'p', '_{}'.format(ds_path)])
+    runner(CMD + ['-o', 'p', 'jobs', '_{}'.format(num_jobs),
+                  '_{}'.format(ds_path)])
     actual_path = os.path.join(temp_dir, 'CJKVar.otf')
     actual_ttx = generate_ttx_dump(actual_path,
                                    ['CFF2', 'HVAR', 'avar', 'fvar'])
     expected_ttx = get_expected_path('CJKVar.ttx')
     assert differ([expected_ttx, actual_ttx, '-s', '<ttFont sfntVersion'])
+
+
+def test_blend_deltas_match_variation_model():
+    from fontTools.varLib.models import VariationModel
+    from afdko.buildcff2vf import getBlendDeltas
+    locations = [{}, {'wght': 1.0}, {'wght': 0.3}, {'wdth': 1.0},
+                 {'wght': 1.0, 'wdth': 1.0}, {'wght': 0.7, 'wdth': 0.35}]
+    var_model = VariationModel(locations)
+    arg_list = [[10, 10, 10, 10, 10, 10],
+                [0, 25, -3, 7, 40, 12],
+                [1.5, 2, 0.25, -7.75, 3, 100]]
+    arg_array = array('d', [val for arg_entry in arg_list
+                            for val in arg_entry])
+    delta_list = getBlendDeltas(arg_array, len(locations), var_model)
+    assert delta_list[0] is None
+    for arg_entry, deltas in zip(arg_list[1:], delta_list[1:]):
+        expected = var_model.getDeltas(arg_entry)
+        assert deltas == expected
+        assert [type(val) for val in deltas] == [type(val) for val in expected]
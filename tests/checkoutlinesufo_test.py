@@ -9,6 +9,9 @@ from booleanOperations.booleanGlyph import BooleanGlyph
 from defcon import Glyph
 
 from afdko.checkoutlinesufo import remove_tiny_sub_paths
+from afdko.ufotools import (
+    UFOFontData, kAdobHashMapName, kAdobLegacyHashMapName, readHashMapFile,
+    readLegacyHashMapFile)
 
 from runner import main as runner
 from differ import main as differ
@@ -65,3 +68,92 @@ def test_remove_overlap(args, ufo_filename, expct_label):
     expct_filename = '{}-{}'.format(ufo_filename[:-4], expct_label)
     expected_path = get_expected_path(expct_filename)
     assert differ([expected_path, actual_path])
+
+
+def test_hash_map_files():
+    actual_path = os.path.join(tempfile.mkdtemp(), UFO2_NAME)
+    copytree(get_input_path(UFO2_NAME), actual_path)
+    runner(CMD + ['-f', actual_path, '-o', 'e', 'q'])
+    data_dir = os.path.join(actual_path, 'data')
+    hash_path = os.path.join(data_dir, kAdobHashMapName)
+    legacy_path = os.path.join(data_dir, kAdobLegacyHashMapName)
+    assert kAdobLegacyHashMapName == 'com.adobe.type.processedHashMap'
+    hash_map, num_lines = readHashMapFile(hash_path)
+    assert len(hash_map) > 1
+    assert num_lines == len(hash_map) - 1
+    assert readLegacyHashMapFile(legacy_path) == hash_map
+
+    # an unchanged entry does not mark the hash map as changed
+    ufo_data = UFOFontData(actual_path, True, 'test')
+    ufo_data.readHashMap()
+    glyph_name = sorted(hash_map)[0]
+    src_hash, history = hash_map[glyph_name]
+    ufo_data.setHashEntry(glyph_name, src_hash, history)
+    assert not ufo_data.hashMapChanged
+
+    # only the changed entry is appended; the legacy file stays in sync
+    ufo_data.setHashEntry(glyph_name, src_hash, history + ['test'])
+    ufo_data.close()
+    with open(hash_path) as fp:
+        lines = fp.read().splitlines()
+    assert len(lines) == num_lines + 2
+    assert lines[-1] == ('["%s", "%s", %s]' % (
+        glyph_name, src_hash, str(history + ['test']).replace("'", '"')))
+    hash_map[glyph_name] = [src_hash, history + ['test']]
+    assert readHashMapFile(hash_path) == (hash_map, num_lines + 1)
+    assert readLegacyHashMapFile(legacy_path) == hash_map
+
+    # a legacy file updated by another tool is read instead
+    hash_map[glyph_name] = [src_hash, history]
+    with open(legacy_path, 'w') as fp:
+        fp.write('%r\n' % hash_map)
+    mtime = os.path.getmtime(hash_path) + 10
+    os.utime(legacy_path, (mtime, mtime))
+    ufo_data = UFOFontData(actual_path, True, 'test')
+    ufo_data.readHashMap()
+    assert ufo_data.hashMap == hash_map
+    ufo_data.close()
+    assert readHashMapFile(hash_path) == (hash_map, num_lines)
+    assert os.path.getmtime(legacy_path) == mtime
+
+
+def test_legacy_hash_map_is_read_as_literal():
+    actual_path = os.path.join(tempfile.mkdtemp(), UFO2_NAME)
+    copytree(get_input_path(UFO2_NAME), actual_path)
+    data_dir = os.path.join(actual_path, 'data')
+    os.mkdir(data_dir)
+    legacy_path = os.path.join(data_dir, kAdobLegacyHashMapName)
+
+    # the hash map file is never run as code
+    flag_path = os.path.join(data_dir, 'flag')
+    with open(legacy_path, 'w') as fp:
+        fp.write("{'hashMapVersion': (1, 0), 'a': "
+                 "[open(%r, 'w').close(), []]}\n" % flag_path)
+    assert readLegacyHashMapFile(legacy_path) == {}
+    ufo_data = UFOFontData(actual_path, True, 'test')
+    ufo_data.readHashMap()
+    assert ufo_data.hashMap == {'hashMapVersion': (1, 0)}
+    assert not os.path.exists(flag_path)
+
+
+def test_component_hash_cache_invalidation():
+    ufo_data = UFOFontData(get_input_path(UFO2_NAME), True, 'test')
+    glyph_map = ufo_data.getGlyphMap()
+
+    def glyph_hash(glyph_name):
+        width, _, outline = ufo_data.getGlyphXML(
+            ufo_data.glyphDefaultDir, glyph_map[glyph_name])
+        return ufo_data.buildGlyphHashValue(width, outline, glyph_name, True)
+
+    expected = glyph_hash('Oslashmacron')
+    cache = ufo_data.componentHashCache
+    assert ('Oslash', True) in cache
+    assert ('O', True) in cache
+    assert ufo_data.componentDependents['O'] == {'Oslash'}
+
+    # a change to 'O' drops 'Oslash', which uses it, but not 'macroncmb.cap'
+    ufo_data.invalidateComponentHash('O')
+    assert ('O', True) not in cache
+    assert ('Oslash', True) not in cache
+    assert ('macroncmb.cap', True) in cache
+    assert glyph_hash('Oslashmacron') == expected
@@ -1,8 +1,13 @@
 from __future__ import print_function, division, absolute_import
 
+import json
 import os
 import pytest
+import shutil
+import tempfile
 
+from afdko import comparefamily
+from afdko.comparefamily import FontFactCache
 from runner import main as runner
 from differ import main as differ
 from test_utils import get_input_path, get_expected_path, get_temp_file_path
@@ -15,13 +20,61 @@ CMD = ['-t', TOOL]
 # Tests
 # -----
 
+@pytest.mark.parametrize('num_jobs', ['1', '4'])
 @pytest.mark.parametrize('font_format', ['otf', 'ttf'])
 @pytest.mark.parametrize('font_family', ['source-code-pro'])
-def test_report(font_family, font_format):
+def test_report(font_family, font_format, num_jobs):
     input_dir = os.path.join(get_input_path(font_family), font_format)
     log_path = get_temp_file_path()
     runner(CMD + ['-o', 'd', '_{}'.format(input_dir), 'tolerance', '_3',
-                  'rm', 'rn', 'rp', 'l', '_{}'.format(log_path)])
+                  'rm', 'rn', 'rp', 'jobs', '_{}'.format(num_jobs),
+                  'l', '_{}'.format(log_path)])
     expected_path = get_expected_path('{}_{}.txt'.format(
                                       font_family, font_format))
     assert differ([expected_path, log_path, '-l', '1'])
+
+
+def test_fact_cache():
+    font_dir = tempfile.mkdtemp()
+    input_dir = os.path.join(get_input_path('source-code-pro'), 'ttf')
+    for file_name in os.listdir(input_dir):
+        shutil.copy2(os.path.join(input_dir, file_name), font_dir)
+    cache_dir = tempfile.mkdtemp()
+    expected_path = get_expected_path('source-code-pro_ttf.txt')
+    for run in range(2):
+        log_path = get_temp_file_path()
+        stdout_path = runner(
+            CMD + ['-s', '-o', 'd', '_{}'.format(font_dir), 'tolerance', '_3',
+                   'rm', 'rn', 'rp', 'cache', '_{}'.format(cache_dir),
+                   'l', '_{}'.format(log_path)])
+        assert differ([expected_path, log_path, '-l', '1'])
+        # touching a font does not change its content hash
+        os.utime(os.path.join(font_dir, 'SourceCodePro-Bold.ttf'), None)
+    with open(stdout_path, 'r') as fp:
+        assert 'Read 14 of 14 fonts from the fact cache.' in fp.read()
+    file_names = os.listdir(cache_dir)
+    assert len(file_names) == 14
+    for file_name in file_names:
+        assert file_name.endswith('.json')
+        with open(os.path.join(cache_dir, file_name), 'r') as fp:
+            assert 'contentHash' in json.load(fp)
+
+
+def test_fact_cache_code_version(monkeypatch):
+    cache_dir = tempfile.mkdtemp()
+    font_path = os.path.join(get_input_path('source-code-pro'), 'otf',
+                             'SourceCodePro-Bold.otf')
+    facts = {'nameIDDict': {(3, 1, 1033, 1): b'Source Code Pro'},
+             'fontBBox': (-1, -2, 3, 4), 'panose': [2, 11], 'hintDict': None,
+             'isFixedPitchfromHMTX': True, 'OTFVersion': 2.03}
+    cache = FontFactCache(cache_dir)
+    content_hash = cache.getContentHash(font_path)
+    cache.put(font_path, content_hash, facts, 'report\n')
+    fact_sheet = cache.get(font_path, content_hash)
+    assert fact_sheet['facts'] == facts
+    assert fact_sheet['report'] == 'report\n'
+    assert cache.get(font_path, 'other content') is None
+
+    # fact sheets written by other code are not used
+    monkeypatch.setattr(comparefamily, 'getCodeVersion', lambda: 'other')
+    assert FontFactCache(cache_dir).get(font_path, content_hash) is None
@@ -2,9 +2,10 @@ from __future__ import print_function, division, absolute_import
 
 import os
 import pytest
+import sys
 from shutil import copy2, rmtree
 
-from afdko.convertfonttocid import mergeFontToCFF
+from afdko.convertfonttocid import main, mergeFontToCFF
 
 from differ import main as differ
 from test_utils import (get_input_path, get_expected_path, get_temp_file_path,
@@ -52,3 +53,19 @@ def test_mergeFontToCFF_bug570(font_filename, subroutinize):
     actual_ttx = generate_ttx_dump(actual_path, ['CFF '])
     expected_ttx = get_expected_path(ttx_filename)
     assert differ([expected_ttx, actual_ttx, '-l', '2'])
+
+
+def test_convert_font_to_cid_bug470(monkeypatch):
+    font_path = os.path.join(TEMP_DIR, 'bug470.pfa')
+    copy2(get_input_path('bug470.pfa'), font_path)
+    monkeypatch.setattr(sys, 'argv', [
+        MODULE, font_path, get_input_path('bug470_fontinfo')])
+
+    main()
+
+    actual_path = os.path.join(TEMP_DIR, 'bug470-CID.ps')
+    with open(actual_path, 'rb') as fp:
+        actual = fp.read()
+    with open(get_expected_path('bug470-CID.ps'), 'rb') as fp:
+        expected = fp.read()
+    assert actual == expected
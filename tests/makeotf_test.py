@@ -7,6 +7,7 @@ import pytest
 from shutil import copy2, copytree, rmtree
 import subprocess32 as subprocess
 import sys
+import time
 import tempfile
 
 from afdko.makeotf import (
@@ -497,3 +498,61 @@ def test_update_cff_bbox_bug617():
                    '    <checkSumAdjustment value=' + SPLIT_MARKER +
                    '    <created value=' + SPLIT_MARKER +
                    '    <modified value='])
+
+
+def test_family_build():
+    family_dir = os.path.join(TEMP_DIR, 'family')
+    cache_dir = os.path.join(family_dir, 'cache')
+    feature_path = os.path.join(family_dir, 'shared.fea')
+    font_dirs = []
+    for style in ('Regular', 'Bold'):
+        font_dir = os.path.join(family_dir, 'Roman', style)
+        os.makedirs(font_dir)
+        copy2(get_input_path(T1PFA_NAME), os.path.join(font_dir, 'font.pfa'))
+        font_dirs.append('_{}'.format(font_dir))
+    with open(feature_path, 'w') as fp:
+        fp.write('languagesystem DFLT dflt;\n')
+    family_args = ['-o', 'family'] + font_dirs + [
+        'ff', '_{}'.format(feature_path), 'cache', '_{}'.format(cache_dir)]
+    runner(CMD + family_args + ['jobs', '_2'])
+
+    expected_ttx = get_expected_path('t1pfa-dev.ttx')
+    mtimes = []
+    for font_dir in font_dirs:
+        font_path = os.path.join(font_dir[1:], OTF_NAME)
+        mtimes.append(os.path.getmtime(font_path))
+        assert differ([expected_ttx, generate_ttx_dump(font_path),
+                       '-s',
+                       '<ttFont sfntVersion' + SPLIT_MARKER +
+                       '    <checkSumAdjustment value=' + SPLIT_MARKER +
+                       '    <created value=' + SPLIT_MARKER +
+                       '    <modified value=',
+                       '-r', r'^\s+Version.*;hotconv.*;makeotfexe'])
+        # the build records are kept in the cache directory only
+        assert sorted(os.listdir(font_dir[1:])) == [OTF_NAME, 'font.pfa']
+    assert len(os.listdir(cache_dir)) == 2
+
+    # nothing has changed, so neither font is built again
+    runner(CMD + family_args)
+    assert mtimes == [os.path.getmtime(os.path.join(font_dir[1:], OTF_NAME))
+                      for font_dir in font_dirs]
+
+    # a change to the feature file given in the options rebuilds both fonts,
+    # even if the file keeps its size and modification time
+    stat = os.stat(feature_path)
+    with open(feature_path, 'w') as fp:
+        fp.write('languagesystem DFLT DFLT;\n')
+    os.utime(feature_path, (stat.st_atime, stat.st_mtime))
+    time.sleep(0.01)
+    runner(CMD + family_args)
+    for font_dir, mtime in zip(font_dirs, mtimes):
+        assert os.path.getmtime(os.path.join(font_dir[1:], OTF_NAME)) > mtime
+
+    # without a cache directory, every font is built
+    mtimes = [os.path.getmtime(os.path.join(font_dir[1:], OTF_NAME))
+              for font_dir in font_dirs]
+    time.sleep(0.01)
+    runner(CMD + ['-o', 'family'] + font_dirs +
+           ['ff', '_{}'.format(feature_path)])
+    for font_dir, mtime in zip(font_dirs, mtimes):
+        assert os.path.getmtime(os.path.join(font_dir[1:], OTF_NAME)) > mtime
@@ -0,0 +1,127 @@
+from __future__ import print_function, division, absolute_import
+
+import os
+import pytest
+import struct
+from shutil import rmtree
+
+from fontTools.ttLib import TTFont
+
+from afdko.otc2otf import OTCError, run
+
+from test_utils import get_input_path
+
+MODULE = 'otc2otf'
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), MODULE + '_data')
+TEMP_DIR = os.path.join(DATA_DIR, 'temp_output')
+
+OTC_FONT = 'fonts.ttc'
+
+# PostScript names of the fonts in OTC_FONT, in collection order. The
+# collection was built with otf2otc from these sfntedit test fonts.
+FONTS = [
+    ('SourceSans-Test', 'core.otf'),
+    ('SourceSansPro-It', 'italic.otf'),
+    ('SourceSansPro-Light', 'light.otf'),
+]
+
+
+def setup_module():
+    """
+    Create the temporary output directory
+    """
+    os.mkdir(TEMP_DIR)
+
+
+def teardown_module():
+    """
+    teardown the temporary output directory
+    """
+    rmtree(TEMP_DIR)
+
+
+def _get_source_font_path(file_name):
+    return os.path.join(os.path.dirname(__file__), 'sfntedit_data', 'input',
+                        file_name)
+
+
+def _calc_checksum(data):
+    data += b'\0' * (-len(data) & 3)
+    return sum(struct.unpack('>%dL' % (len(data) // 4), data)) & 0xFFFFFFFF
+
+
+def _check_font(font_path, source_path):
+    """
+    Asserts that the table checksums and the 'head' table checkSumAdjustment
+    of the extracted font are right, and that its tables have the data of
+    the source font.
+    """
+    with open(font_path, 'rb') as fp:
+        data = fp.read()
+    assert _calc_checksum(data) == 0xB1B0AFBA
+    num_tables = struct.unpack_from('>H', data, 4)[0]
+    source_font = TTFont(source_path)
+    tags = []
+    for i in range(num_tables):
+        tag, checksum, offset, length = struct.unpack_from(
+            '>4sLLL', data, 12 + i * 16)
+        assert offset % 4 == 0
+        table_data = data[offset:offset + length]
+        if tag == b'head':
+            table_data = table_data[:8] + b'\0' * 4 + table_data[12:]
+            source_data = source_font.reader[tag]
+            source_data = source_data[:8] + b'\0' * 4 + source_data[12:]
+        else:
+            source_data = source_font.reader[tag]
+        assert checksum == _calc_checksum(table_data)
+        assert table_data == source_data
+        tags.append(tag.decode('ascii'))
+    assert sorted(tags) == sorted(source_font.reader.keys())
+
+
+# -----
+# Tests
+# -----
+
+@pytest.mark.parametrize('args, font_indices', [
+    ([], [0, 1, 2]),
+    (['-i', '1'], [1]),
+    (['-i', '2', '-i', '0'], [0, 2]),
+    (['-n', 'SourceSansPro-Light'], [2]),
+    (['-n', 'SourceSans-Test', '-i', '1'], [0, 1]),
+])
+def test_extract_fonts(args, font_indices, monkeypatch):
+    out_dir = os.path.join(TEMP_DIR, '_'.join(['out'] + args))
+    os.mkdir(out_dir)
+    monkeypatch.chdir(out_dir)
+    run(args + [get_input_path(OTC_FONT)])
+    expected_names = [FONTS[i][0] + '.otf' for i in font_indices]
+    assert sorted(os.listdir(out_dir)) == sorted(expected_names)
+    for i in font_indices:
+        ps_name, source_filename = FONTS[i]
+        _check_font(os.path.join(out_dir, ps_name + '.otf'),
+                    _get_source_font_path(source_filename))
+
+
+def test_unknown_name_warning(monkeypatch, capsys):
+    out_dir = os.path.join(TEMP_DIR, 'unknown_name')
+    os.mkdir(out_dir)
+    monkeypatch.chdir(out_dir)
+    run(['-n', 'SourceSansPro-Bold', '-n', 'SourceSansPro-It',
+         get_input_path(OTC_FONT)])
+    assert ("Warning: no font with the PostScript name "
+            "'SourceSansPro-Bold'." in capsys.readouterr().out)
+    assert os.listdir(out_dir) == ['SourceSansPro-It.otf']
+
+
+@pytest.mark.parametrize('font_index', ['3', '-1'])
+def test_font_index_out_of_range(font_index, monkeypatch):
+    out_dir = os.path.join(TEMP_DIR, 'index_' + font_index)
+    os.mkdir(out_dir)
+    monkeypatch.chdir(out_dir)
+    with pytest.raises(OTCError) as err:
+        run(['-i', font_index, get_input_path(OTC_FONT)])
+    assert str(err.value) == ("Font index %s is out of range: the "
+                              "collection has 3 fonts." % font_index)
+    assert os.listdir(out_dir) == []
@@ -0,0 +1,128 @@
+from __future__ import print_function, division, absolute_import
+
+import filecmp
+import os
+import pytest
+import struct
+from shutil import rmtree
+
+from afdko import otf2otc
+from afdko.otf2otc import run
+
+from test_utils import get_expected_path
+
+MODULE = 'otf2otc'
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), MODULE + '_data')
+TEMP_DIR = os.path.join(DATA_DIR, 'temp_output')
+
+# The expected output files were made with otf2otc v1.5 (before its input
+# files were memory-mapped), so they also check that the collections are
+# byte for byte the same as before.
+
+
+def setup_module():
+    """
+    Create the temporary output directory
+    """
+    os.mkdir(TEMP_DIR)
+
+
+def teardown_module():
+    """
+    teardown the temporary output directory
+    """
+    rmtree(TEMP_DIR)
+
+
+def _get_font_path(file_name):
+    if file_name.endswith('.ttc'):
+        data_dir = 'otc2otf_data'
+    else:
+        data_dir = 'sfntedit_data'
+    return os.path.join(os.path.dirname(__file__), data_dir, 'input',
+                        file_name)
+
+
+def _read_table_offsets(otc_path):
+    """
+    Returns a list with a dict of table tag -> table offset for each font
+    in the collection.
+    """
+    with open(otc_path, 'rb') as fp:
+        data = fp.read()
+    tag, version, num_fonts = struct.unpack_from('>4sLL', data, 0)
+    assert tag == b'ttcf'
+    font_tables = []
+    for i in range(num_fonts):
+        offset = struct.unpack_from('>L', data, 12 + i * 4)[0]
+        num_tables = struct.unpack_from('>H', data, offset + 4)[0]
+        tables = {}
+        for j in range(num_tables):
+            tag, checksum, table_offset, length = struct.unpack_from(
+                '>4sLLL', data, offset + 12 + j * 16)
+            tables[tag.decode('ascii')] = table_offset
+        font_tables.append(tables)
+    return font_tables
+
+
+def _build(args, file_names, otc_name):
+    otc_path = os.path.join(TEMP_DIR, otc_name)
+    run(args + ['-o', otc_path] +
+        [_get_font_path(file_name) for file_name in file_names])
+    assert filecmp.cmp(otc_path, get_expected_path(otc_name), shallow=False)
+    return _read_table_offsets(otc_path)
+
+
+# -----
+# Tests
+# -----
+
+def test_shared_tables():
+    font_tables = _build(
+        [], ['core.otf', 'italic.otf', 'light.otf'], 'fonts.ttc')
+    assert len(font_tables) == 3
+    for tag in font_tables[0]:
+        offsets = set(tables[tag] for tables in font_tables)
+        if tag in ('BASE', 'GDEF'):
+            assert len(offsets) == 1
+        else:
+            assert len(offsets) == 3
+
+
+def test_shared_table_override():
+    font_tables = _build(
+        ['-t', 'CFF =1'], ['core.otf', 'light.otf'], 'cff_override.ttc')
+    assert len(font_tables) == 2
+    assert font_tables[0]['CFF '] == font_tables[1]['CFF ']
+    assert font_tables[0]['hmtx'] != font_tables[1]['hmtx']
+
+
+def test_otc_input():
+    font_tables = _build([], ['fonts.ttc', 'core.otf'], 'otc_input.ttc')
+    assert len(font_tables) == 4
+    # all the tables of the added font are shared with the first font of
+    # the input collection, which was made from the same font file
+    assert font_tables[3] == font_tables[0]
+    assert font_tables[1] != font_tables[0]
+
+
+def test_bad_table_override_index(monkeypatch):
+    font_data_list = []
+    read_font_file = otf2otc.readFontFile
+
+    def read_and_record_font_file(font_path):
+        font_data, font_entry_list = read_font_file(font_path)
+        font_data_list.append(font_data)
+        return font_data, font_entry_list
+
+    monkeypatch.setattr(otf2otc, 'readFontFile', read_and_record_font_file)
+    otc_path = os.path.join(TEMP_DIR, 'bad_override.ttc')
+    with pytest.raises(IndexError):
+        run(['-t', 'CFF =5', '-o', otc_path, _get_font_path('core.otf'),
+             _get_font_path('light.otf')])
+    # the mapped input files are closed when the build fails
+    assert len(font_data_list) == 2
+    for font_data in font_data_list:
+        with pytest.raises(ValueError):
+            font_data[0]
@@ -1,6 +1,12 @@
 from __future__ import print_function, division, absolute_import
 
 import pytest
+import re
+import zlib
+
+from fontTools.misc.py23 import byteord, tobytes
+
+from afdko import pdfutils
 
 from runner import main as runner
 from differ import main as differ
@@ -16,6 +22,73 @@ def _get_filename_label(file_name):
     return file_name.split('.')[0][sep_index:]
 
 
+def _get_page_count(pdf_data):
+    return int(re.search(br'/Type /Pages\s+/Count (\d+)', pdf_data).group(1))
+
+
+def _check_xref(pdf_data):
+    """
+    Asserts that the cross-reference table found through 'startxref' has
+    the byte offset of every object in the file.
+    """
+    xref_offset = int(re.search(br'startxref\s+(\d+)\s+%%EOF\s*$',
+                                pdf_data).group(1))
+    match = re.compile(br'xref\s+0 (\d+)\s+').match(pdf_data, xref_offset)
+    assert match
+    num_objects = int(match.group(1))
+    entries = re.findall(br'(\d{10}) (\d{5}) ([fn])',
+                         pdf_data[match.end():])[:num_objects]
+    assert len(entries) == num_objects
+    obj_numbers = set(int(num) for num in
+                      re.findall(br'(?m)^(\d+) 0 obj\b', pdf_data))
+    assert obj_numbers == set(range(1, num_objects))
+    for obj_num, (offset, _, in_use) in enumerate(entries[1:], 1):
+        assert in_use == b'n'
+        assert pdf_data.startswith(
+            '{} 0 obj'.format(obj_num).encode('ascii'), int(offset))
+
+
+def _get_page_streams(pdf_data):
+    """
+    Returns the decompressed data of the Flate-compressed streams.
+    """
+    streams = []
+    for match in re.finditer(br'<< /Length (\d+) /Filter ([^>]+)>>\s+stream'
+                             br'\r?\n', pdf_data):
+        data = pdf_data[match.end():match.end() + int(match.group(1))]
+        if b'ASCII85Decode' in match.group(2):
+            data = tobytes(pdfutils._AsciiBase85Decode(data.decode('latin-1')),
+                           encoding='latin-1')
+        streams.append(zlib.decompress(data))
+    return streams
+
+
+def _old_ascii85_encode(input):
+    """
+    The word-by-word ASCII85 encoder that pdfutils used to have.
+    """
+    output = []
+    whole_word_count, remainder_size = divmod(len(input), 4)
+    for i in range(whole_word_count + (remainder_size > 0)):
+        word = input[i * 4:i * 4 + 4]
+        word = word + b'\000' * (4 - len(word))
+        num = (16777216 * byteord(word[0]) + 65536 * byteord(word[1]) +
+               256 * byteord(word[2]) + byteord(word[3]))
+        if num == 0 and i < whole_word_count:
+            output.append('z')
+            continue
+        digits = []
+        for _ in range(5):
+            num, digit = divmod(num, 85)
+            digits.insert(0, chr(digit + 33))
+        if i < whole_word_count:
+            output.append(''.join(digits))
+        else:
+            output.append(''.join(digits)[:remainder_size + 1])
+    output.append('~>')
+    return ''.join(output)
+
+
 # -----
 # Tests
 # -----
@@ -100,3 +173,112 @@ def test_fontplot2_lf_option(font_filename, glyphs):
     expected_path = get_expected_path(pdf_filename)
     assert differ([expected_path, save_path,
                    '-s', '/CreationDate', '-e', 'macroman'])
+
+
+@pytest.mark.parametrize('font_filename', [
+    'cidfont.otf',
+    'font.otf',
+    'font.ttf',
+])
+def test_jobs_option(font_filename):
+    tool_name = 'hintplot'
+    if 'cid' in font_filename:
+        font_format = 'cid'
+    elif 'ttf' in font_filename:
+        font_format = 'ttf'
+    else:
+        font_format = 'otf'
+    pdf_filename = '{}_{}_glyphs_2-7.pdf'.format(tool_name, font_format)
+    font_path = get_input_path(font_filename)
+    save_path = get_temp_file_path()
+    runner(['-t', tool_name, '-o', 'o', '_{}'.format(save_path), 'g', '_2-7',
+            'dno', 'jobs', '_2', '=pageIncludeTitle', '_0', '-f', font_path,
+            '-a'])
+    expected_path = get_expected_path(pdf_filename)
+    assert differ([expected_path, save_path,
+                   '-s', '/CreationDate', '-e', 'macroman'])
+
+
+@pytest.mark.parametrize('font_filename', [
+    'cidfont.otf',
+    'font.otf',
+    'font.ttf',
+])
+def test_streamPDF_option(font_filename):
+    tool_name = 'hintplot'
+    if 'cid' in font_filename:
+        font_format = 'cid'
+    elif 'ttf' in font_filename:
+        font_format = 'ttf'
+    else:
+        font_format = 'otf'
+    pdf_filename = '{}_{}_glyphs_2-7.pdf'.format(tool_name, font_format)
+    font_path = get_input_path(font_filename)
+    save_path = get_temp_file_path()
+    runner(['-t', tool_name, '-o', 'o', '_{}'.format(save_path), 'g', '_2-7',
+            'dno', '=streamPDF', '_1', '=pageIncludeTitle', '_0',
+            '-f', font_path, '-a'])
+    with open(save_path, 'rb') as fp:
+        pdf_data = fp.read()
+    with open(get_expected_path(pdf_filename), 'rb') as fp:
+        expected_data = fp.read()
+    _check_xref(pdf_data)
+    page_count = _get_page_count(pdf_data)
+    assert page_count == _get_page_count(expected_data)
+    assert len(re.findall(br'/Type /Page\s', pdf_data)) == page_count
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+@pytest.mark.parametrize('data', [
+    b'',
+    b'\000',
+    b'\000\000\000',
+    b'\000' * 4,
+    b'\000' * 5,
+    b'\000' * 12,
+    b'\001\000\000\000' + b'\000' * 4 + b'\000\000\000\001',
+    b'\377' * 4,
+    b'\377' * 7,
+    b'ab',
+    b'abc',
+    b'abcd',
+    b'What is the average velocity of a sparrow?',
+    bytes(bytearray(range(256))) * 3 + b'\000' * 8 + b'xy',
+])
+def test_ascii85_encode(data, use_numpy, monkeypatch):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(pdfutils, 'numpy', None)
+    assert pdfutils._AsciiBase85Encode(data) == _old_ascii85_encode(data)
+
+
+@pytest.mark.parametrize('font_filename', [
+    'cidfont.otf',
+    'font.otf',
+    'font.ttf',
+])
+def test_binaryPDF_option(font_filename):
+    tool_name = 'hintplot'
+    if 'cid' in font_filename:
+        font_format = 'cid'
+    elif 'ttf' in font_filename:
+        font_format = 'ttf'
+    else:
+        font_format = 'otf'
+    pdf_filename = '{}_{}_glyphs_2-7.pdf'.format(tool_name, font_format)
+    font_path = get_input_path(font_filename)
+    save_path = get_temp_file_path()
+    runner(['-t', tool_name, '-o', 'o', '_{}'.format(save_path), 'g', '_2-7',
+            'dno', '=binaryPDF', '_1', '=pageIncludeTitle', '_0',
+            '-f', font_path, '-a'])
+    with open(save_path, 'rb') as fp:
+        pdf_data = fp.read()
+    with open(get_expected_path(pdf_filename), 'rb') as fp:
+        expected_data = fp.read()
+    assert b'ASCII85Decode' not in pdf_data
+    _check_xref(pdf_data)
+    assert _get_page_count(pdf_data) == _get_page_count(expected_data)
+    page_streams = _get_page_streams(pdf_data)
+    assert page_streams
+    assert page_streams == _get_page_streams(expected_data)
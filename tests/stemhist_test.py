@@ -3,9 +3,14 @@ from __future__ import print_function, division, absolute_import
 import pytest
 import subprocess32 as subprocess
 
+from afdko import stemhist
+from afdko.beztools import CFFFontData
+from afdko.stemhist import (ACFontError, ACOptions, collectGlyphReports,
+                            collectGlyphReportsInPool, getFontDicts,
+                            openFontFile)
 from runner import main as runner
 from differ import main as differ
-from test_utils import get_expected_path, get_temp_file_path
+from test_utils import get_expected_path, get_input_path, get_temp_file_path
 
 TOOL = 'stemhist'
 CMD = ['-t', TOOL]
@@ -45,3 +50,108 @@ def test_stems_and_zones(arg, font_filename):
             exp_suffix = '.all' + suffix
         expected_path = get_expected_path('{}{}'.format(prefix, exp_suffix))
         assert differ([expected_path, actual_path, '-l', '1'])
+
+
+@pytest.mark.parametrize('arg', ([], ['a']))
+@pytest.mark.parametrize('font_filename', [
+    'font.pfa', 'font.ufo', 'cidfont.ps'])
+def test_stems_and_zones_with_jobs(arg, font_filename):
+    prefix = font_filename.split('.')[0]
+    if 'a' in arg:
+        suffixes = ['.top.txt', '.bot.txt']
+    else:
+        suffixes = ['.hstm.txt', '.vstm.txt']
+
+    report_path = get_temp_file_path()
+    runner(CMD + ['-f', font_filename, '-o', 'jobs', '_3',
+                  'o', '_{}'.format(report_path)] + arg)
+    for suffix in suffixes:
+        actual_path = '{}{}'.format(report_path, suffix)
+        expected_path = get_expected_path('{}{}'.format(prefix, suffix))
+        assert differ([expected_path, actual_path, '-l', '1'])
+
+
+@pytest.mark.parametrize('do_align', [0, 1])
+def test_stems_and_zones_with_failing_glyph(do_align, capsys):
+    path = get_input_path('font.otf')
+    options = ACOptions()
+    options.doAlign = do_align
+    font_data = openFontFile(path)
+    glyph_list = font_data.getGlyphList()
+    fd_glyph_dict, font_dict_list = getFontDicts(font_data, path, glyph_list)
+    expected = collectGlyphReports(font_data, path, options, glyph_list,
+                                   fd_glyph_dict, font_dict_list).glyphs
+
+    # autohintexe stops at a glyph with an unknown operator; the glyphs
+    # after it must still get their reports
+    bad_name = glyph_list[2]
+    convert_to_bez = font_data.convertToBez
+
+    def convert_bad_glyph(name, *args):
+        bez, width, has_hints = convert_to_bez(name, *args)
+        if name == bad_name:
+            bez = bez.replace(' dt', ' xx', 1)
+        return bez, width, has_hints
+
+    font_data.convertToBez = convert_bad_glyph
+    capsys.readouterr()
+    actual = collectGlyphReports(font_data, path, options, glyph_list,
+                                 fd_glyph_dict, font_dict_list).glyphs
+    font_data.close()
+    assert 'Unknown operator' in capsys.readouterr().out
+    del expected[bad_name]
+    del actual[bad_name]
+    assert actual == expected
+
+
+def test_raw_data_with_jobs(monkeypatch):
+    path = get_input_path('font.otf')
+    options = ACOptions()
+    options.debug = 1
+    font_data = openFontFile(path)
+    glyph_list = font_data.getGlyphList()
+    fd_glyph_dict, font_dict_list = getFontDicts(font_data, path, glyph_list)
+    monkeypatch.setattr(stemhist, 'rawData', [])
+    collectGlyphReports(font_data, path, options, glyph_list,
+                        fd_glyph_dict, font_dict_list)
+    font_data.close()
+    expected = stemhist.rawData
+
+    # the raw reports are collected in the worker processes and must be
+    # returned to the parent for the -debug rawdata.txt file
+    monkeypatch.setattr(stemhist, 'rawData', [])
+    options.jobs = 2
+    collectGlyphReportsInPool(path, options, glyph_list)
+    assert expected
+    assert stemhist.rawData == expected
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_illegal_number_terminator(jobs, monkeypatch):
+    path = get_input_path('font.otf')
+    options = ACOptions()
+    options.jobs = jobs
+    font_data = openFontFile(path)
+    glyph_list = font_data.getGlyphList()
+    fd_glyph_dict, font_dict_list = getFontDicts(font_data, path, glyph_list)
+
+    # patched on the class, so that the worker processes see it too
+    bad_name = glyph_list[2]
+    convert_to_bez = CFFFontData.convertToBez
+
+    def convert_bad_glyph(self, name, *args):
+        bez, width, has_hints = convert_to_bez(self, name, *args)
+        if name == bad_name:
+            bez = bez.replace(' mt', 'q mt', 1)
+        return bez, width, has_hints
+
+    monkeypatch.setattr(CFFFontData, 'convertToBez', convert_bad_glyph)
+    with pytest.raises(ACFontError) as err:
+        if jobs > 1:
+            collectGlyphReportsInPool(path, options, glyph_list)
+        else:
+            collectGlyphReports(font_data, path, options, glyph_list,
+                                fd_glyph_dict, font_dict_list)
+    font_data.close()
+    assert str(err.value) == ("Error: failed to read the outline data of "
+                              "glyph %s in font <font.otf>." % bad_name)
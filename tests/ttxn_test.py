@@ -1,11 +1,18 @@
 from __future__ import print_function, division, absolute_import
 
+import os
 import pytest
 import tempfile
+from shutil import rmtree
 
+from fontTools.ttLib import TTFont
+
+from afdko.ttxn import (TableDumpCache, TTXNTTFont, TxCharStringDumper,
+                        getTxCharList, main as ttxn)
 from runner import main as runner
 from differ import main as differ
-from test_utils import get_expected_path
+from test_utils import (get_input_path, get_expected_path,
+                        get_temp_file_path)
 
 TOOL = 'ttxn'
 
@@ -42,3 +49,100 @@ def test_dump(args, font_filename, exp_filename):
             'o{}'.format(save_path)] + args)
     expected_path = get_expected_path(exp_filename)
     assert differ([expected_path, save_path, '-s', '<ttFont sfntVersion'])
+
+
+def _read_cache(cache_dir):
+    """
+    Returns a dict of file name -> (contents, modification time) for the
+    files in the dump cache directory.
+    """
+    cache = {}
+    for file_name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, file_name)
+        with open(path, 'rb') as fp:
+            cache[file_name] = (fp.read(), os.stat(path).st_mtime)
+    return cache
+
+
+def _run_cached_dump(args, fonts, cache_dir):
+    save_dir = tempfile.mkdtemp()
+    try:
+        assert not ttxn(['-jobs', '2', '-cache', cache_dir,
+                         '-d', save_dir] + args +
+                        [get_input_path(font) for font, _ in fonts])
+        for font, exp_filename in fonts:
+            save_path = os.path.join(
+                save_dir, os.path.splitext(font)[0] + '.ttx')
+            assert differ([get_expected_path(exp_filename), save_path,
+                           '-s', '<ttFont sfntVersion'])
+    finally:
+        rmtree(save_dir)
+
+
+@pytest.mark.parametrize('args, fonts', [
+    (['-t', 'GPOS'], [(OTF2_FONT, 'OTF2_GPOS_only.ttx'),
+                      (OTF3_FONT, 'OTF3_GPOS_only.ttx'),
+                      (TTF2_FONT, 'TTF2_GPOS_only.ttx')]),
+    (['-t', 'GSUB'], [(OTF2_FONT, 'OTF2_GSUB_only.ttx'),
+                      (OTF3_FONT, 'OTF3_GSUB_only.ttx'),
+                      (TTF2_FONT, 'TTF2_GSUB_only.ttx')]),
+    ([], [(OTF_FONT, 'OTF.ttx')]),
+    (['-nh'], [(OTF_FONT, 'OTF_no_hints.ttx')]),
+])
+def test_dump_jobs_cache(args, fonts, monkeypatch):
+    cache_dir = tempfile.mkdtemp()
+    try:
+        _run_cached_dump(args, fonts, cache_dir)
+        cache = _read_cache(cache_dir)
+        assert cache
+
+        # the warm run must take every cached table from the cache, and
+        # leave the cache as it is. The patch is inherited by the forked
+        # worker processes.
+        table_content_to_xml = TTXNTTFont._tableContentToXML
+
+        def dump_uncached_table(self, writer, tag, table):
+            assert tag not in TableDumpCache.kTableTags
+            table_content_to_xml(self, writer, tag, table)
+
+        monkeypatch.setattr(TTXNTTFont, '_tableContentToXML',
+                            dump_uncached_table)
+        _run_cached_dump(args, fonts, cache_dir)
+        assert _read_cache(cache_dir) == cache
+    finally:
+        rmtree(cache_dir)
+
+
+def test_dump_cache_cff_options():
+    # the CFF dump depends on -nh, so a hinted dump in the cache must not be
+    # used for a dump without hints
+    cache_dir = tempfile.mkdtemp()
+    try:
+        _run_cached_dump(['-t', 'CFF '], [(OTF_FONT, 'OTF_CFF_only.ttx')],
+                         cache_dir)
+        cache = _read_cache(cache_dir)
+        _run_cached_dump(['-t', 'CFF ', '-nh'],
+                         [(OTF_FONT, 'OTF_CFF_no_hints.ttx')], cache_dir)
+        assert len(_read_cache(cache_dir)) == len(cache) + 1
+    finally:
+        rmtree(cache_dir)
+
+
+def test_dump_fixed_operands():
+    # -30000.5 is in the range that tx prints as a positive number
+    font = TTFont(get_input_path(OTF_FONT))
+    char_string = font['CFF '].cff.topDictIndex[0].CharStrings['A']
+    char_string.decompile()
+    char_string.program = [100, -30000.5, 0, 'rmoveto',
+                           32000.25, -20000.5, 'rlineto',
+                           -29000.75, 10, 'rlineto', 'endchar']
+    font_path = get_temp_file_path()
+    font.save(font_path)
+    font = TTFont(font_path)
+    cff = font['CFF '].cff
+    dumper = TxCharStringDumper(cff.GlobalSubrs, False)
+    lines = dumper.dumpGlyph(cff.topDictIndex[0].CharStrings['A'])
+    tx_entries = [entry.splitlines() for entry in
+                  getTxCharList(font_path, False, False)]
+    assert ['A'] + lines in tx_entries
+    assert '  35535.50 0 move' in lines